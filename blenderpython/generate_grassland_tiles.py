@@ -32,12 +32,84 @@ We explicitly construct a pointy-top hex mesh (one vertex on the +Y axis in
 Blender's local space, then rotate so that when exported (Y up) and imported
 into three.js (Y up) the axial formulas align with coords.ts. The previous
 version relied on `primitive_cylinder_add` (flat-top for our usage), so we
-replace that with a custom bmesh build.
+replace that with a custom build.
+
+GEOMETRY CORE
+=============
+All shapes (hex prism, displaced top, rocks, tufts, trees) are generated by
+the bpy-free `tile_geometry.py` next to this file as NumPy arrays. The
+Blender functions here (`create_base_hex`, `displace_top_surface`,
+`add_simple_rock`, `add_tuft`, `add_tree`, `build_variation`) are thin
+adapters that turn those arrays into objects, so the same geometry can be
+generated and checked in plain CPython without starting Blender.
 
 CLI CHANGES
 ===========
 Added: --size (alias -S) to override HEX_RADIUS at generation time so you can
 export multiple scale variants without editing the file.
+Added: --writer (alias -w) native|blender. `native` (default) writes GLBs
+directly from mesh arrays via `tile_glb.py`; `blender` uses the glTF add-on,
+which cannot honour --merge, --palette, --quantize, --compress or --optimize:
+combining them with `--writer blender` is rejected before anything is built.
+Added: --merge (alias -m) joins each variant into one mesh with one primitive
+per material (Grass/Rock/Tuft/Trunk/Leaf) with the native writer.
+Added: --instanced (alias -i) builds rocks/tufts/trees as linked duplicates of
+a few shared prototypes; the native writer emits them once with per-instance
+TRS (EXT_mesh_gpu_instancing). The prototype meshes are built once per run
+(`PrototypeLibrary`) and shared by every variant.
+Added: incremental cache. Headless exports record a content hash (seed,
+params, HEX_RADIUS, HEX_THICKNESS, export options, script sources) per output
+in `.tile-cache.json`; unchanged variants are neither rebuilt nor exported.
+--force rebuilds everything.
+Added: --resolution (alias -r) N subdivides the hex top into N rings of
+triangles so displacement shapes real terrain (1 = original flat top).
+Multi-LOD sibling files (grass_v0_lod1.glb, ...) come from
+`tile_batch.py --lods 8 3 1`.
+Added: --seamless fades the top displacement to zero over a band inside the
+hex boundary, so edge vertices of every variant sit exactly on the flat top
+and neighbouring tiles meet without cracks (use with --resolution > 1).
+Added: --biome (alias -b) KEY builds a biome recipe from biomes/<KEY>.json
+(see tile_biomes.py) instead of grassland; exports are named <KEY>_v<i>.glb.
+--resolution now defaults to the recipe's own value.
+Added: --palette bakes each material's colour into vertex colours (COLOR_0)
+and exports every part with the one shared Tile_Mat (native writer), so all
+tiles of all biomes share a single material.
+Added: --quantize (alias -q) writes KHR_mesh_quantization attributes and
+--compress meshopt runs gltfpack (EXT_meshopt_compression) on each export;
+exported sizes are printed per variant. Full before/after totals come from
+`tile_batch.py --quantize --compress meshopt`.
+Added: --optimize welds identical vertices and reorders triangles for the
+vertex cache and overdraw (tile_optimize.py) before writing, printing the
+ACMR/ATVR change per exported file.
+Added: --profile prints a per-stage timing breakdown (plan, base hex,
+displacement, each scatter pass, materials, scene objects, duplication,
+export) and datablock counts created/freed (tile_profile.py); --trace FILE
+also writes the spans as a Chrome trace JSON (chrome://tracing, Perfetto).
+Added: --serve keeps Blender running as a resident worker answering JSON-line
+job requests on stdin (or on 127.0.0.1 with --port N); materials and
+instanced prototype meshes stay warm between jobs (see tile_server.py).
+Added: datablock tracking. Meshes, materials, collections and scenes created
+here are recorded and purged once orphaned (`clear_collection`,
+`purge_orphans`), including the add-on export's temporary copies, so
+regenerating in one session does not grow it. --memory-report prints
+datablock counts and process memory before/after; --repeat N regenerates N
+times (soak test).
+Added: --max-tris N decimates each tile (scatter meshes and the displaced
+top, quadric error, see tile_decimate.py) until it has at most N triangles
+and prints the triangle change and the max geometric error introduced.
+Added: --bake-normals SIZE bakes the full-resolution displaced top into a
+SIZE x SIZE tangent-space normal map on each tile's ground material
+(tile_bake.py, CPU only, no Cycles), wired through a Normal Map node so
+both writers export it. Use with --resolution 1 for 12-vertex tiles that
+still shade like the detailed top.
+Added: --impostors FRAME renders each exported variant from nine views
+(CPU rasterizer, tile_impostor.py) into <name>_impostor.png (albedo +
+alpha) and <name>_impostor_nd.png (normal + depth) with a JSON index, so
+the web scene can draw distant tiles as a single quad.
+Added: --pack (with a directory export) rewrites <dir>/tiles.pack after
+the export: every <biome>_v<N>.glb in the directory, batch-built biomes
+included, in one indexed file (tile_pack.py) that the web loader fetches
+in a single request instead of one per variant.
 
 USAGE:
     blender --background --python generate_grassland_tiles.py -- --export ./out --size 0.51
@@ -47,12 +119,11 @@ USAGE:
 import random
 import sys
 import os
-from math import pi, sin, cos
+from math import pi
 
 try:
     import bpy
-    import bmesh
-    from mathutils import Vector, noise
+    from mathutils import Vector
 except Exception:  # pragma: no cover - happens outside Blender
     print("This script must be run inside Blender (bpy available).\n"
           "Run it from Blender's Text Editor or: blender --background --python generate_grassland_tiles.py")
@@ -73,6 +144,25 @@ bl_info = {
 # Script directory (for resolving export paths relative to this file)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# The bpy-free geometry core lives next to this script; Blender does not put
+# the script directory on sys.path by itself.
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import numpy as np  # bundled with Blender
+
+import tile_bake
+import tile_biomes
+import tile_geometry as geo
+import tile_cache
+import tile_decimate
+import tile_glb
+import tile_impostor
+import tile_optimize
+import tile_pack
+import tile_profile as prof
+import tile_server
+
 def _resolve_export_path(path: str | None) -> str | None:
     if not path:
         return path
@@ -83,103 +173,158 @@ def _resolve_export_path(path: str | None) -> str | None:
 # --- Parameters (aligned to repo defaults) ----------------------------------
 # NOTE: Keep in sync with `DEFAULT_HEX_SIZE` in the web project (coords.ts).
 # If changed there, re-export here. Overridable via CLI --size.
-HEX_RADIUS = 0.51
-HEX_THICKNESS = 0.08
-SEED = 42
+HEX_RADIUS = geo.HEX_RADIUS
+HEX_THICKNESS = geo.HEX_THICKNESS
+SEED = geo.SEED
+
+
+# Names of the datablocks this script created, per `bpy.data` collection;
+# `purge_orphans` removes the ones nothing uses any more.
+_CREATED = {'meshes': set(), 'materials': set(), 'images': set(), 'collections': set(), 'scenes': set()}
+
+
+def track(kind: str, block):
+    """Record a datablock created by this script (kind is its `bpy.data` collection name); returns it."""
+    _CREATED[kind].add(block.name)
+    prof.count(f'{kind}.created')
+    return block
+
+
+def purge_orphans(kinds=None, keep=()):
+    """Remove tracked datablocks without users; returns how many were removed.
+
+    `kinds` limits the purge to some `bpy.data` collections (default: all
+    tracked ones) and names in `keep` survive. Runs until nothing changes,
+    since removing a mesh can orphan its materials.
+    """
+    freed = 0
+    removed = True
+    while removed:
+        removed = False
+        for kind in kinds or _CREATED:
+            names = _CREATED[kind]
+            data = getattr(bpy.data, kind)
+            for name in list(names):
+                block = data.get(name)
+                if block is None:
+                    names.discard(name)
+                elif block.users == 0 and name not in keep:
+                    data.remove(block)
+                    names.discard(name)
+                    prof.count(f'{kind}.freed')
+                    freed += 1
+                    removed = True
+    return freed
+
+
+def remove_objects(objs):
+    """Remove objects, then those of their meshes left without users."""
+    meshes = {o.data.name: o.data for o in objs if o.type == 'MESH'}
+    for obj in objs:
+        bpy.data.objects.remove(obj, do_unlink=True)
+    prof.count('objects.freed', len(objs))
+    for name, mesh in meshes.items():
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+            _CREATED['meshes'].discard(name)
+            prof.count('meshes.freed')
+
+
+def remove_collection_tree(col):
+    """Remove a collection, its child collections and all of their objects."""
+    for child in list(col.children):
+        remove_collection_tree(child)
+    objs = list(col.objects)
+    for obj in objs:
+        bpy.data.objects.remove(obj, do_unlink=True)
+    bpy.data.collections.remove(col)
+    prof.count('objects.freed', len(objs))
+    prof.count('collections.freed')
 
 
 def clear_collection(name: str):
-    """Remove an existing collection with the given name (if present)."""
+    """Remove an existing collection with the given name (if present) and purge what it leaves orphaned.
+
+    Child collections and objects go with it; their meshes and materials
+    are removed once unused (see `purge_orphans`), so regenerating does not
+    grow the session.
+    """
     col = bpy.data.collections.get(name)
     if not col:
         return col
-    # unlink objects and remove
-    for obj in list(col.objects):
-        bpy.data.objects.remove(obj, do_unlink=True)
-    bpy.data.collections.remove(col)
+    remove_collection_tree(col)
+    purge_orphans()
     return None
 
 
-def create_base_hex(name: str, radius=HEX_RADIUS, thickness=HEX_THICKNESS):
-    """Create a POINTY-TOP hexagonal prism centered at origin.
-
-    We build the top face manually (point at +Y). Then extrude down to give
-    thickness. The local +Z remains "up" for displacement logic.
-    """
-    # Compute 6 corner positions for pointy-top orientation. Angle 0 at +Y.
-    # Standard pointy-top layout uses 30° offset if starting at +X; here we
-    # start at +Y so angle step = 60° and initial angle = 0.
-    angles = [0, 60, 120, 180, 240, 300]
-    verts_top = []
-    import bmesh
-    mesh = bpy.data.meshes.new(f"{name}_mesh")
-    bm = bmesh.new()
-    for deg in angles:
-        rad = (deg * 3.141592653589793) / 180.0
-        x = radius * sin(rad)   # swap sin/cos so first point sits on +Y
-        y = radius * cos(rad)
-        verts_top.append(bm.verts.new((x, y, thickness / 2.0)))
-    bm.faces.new(verts_top)
-    bm.normal_update()
-    # Duplicate downward verts
-    verts_bottom = []
-    for v in verts_top:
-        verts_bottom.append(bm.verts.new((v.co.x, v.co.y, -thickness / 2.0)))
-    # Create side faces
-    for i in range(6):
-        v_top_a = verts_top[i]
-        v_top_b = verts_top[(i + 1) % 6]
-        v_bot_b = verts_bottom[(i + 1) % 6]
-        v_bot_a = verts_bottom[i]
-        bm.faces.new([v_top_a, v_top_b, v_bot_b, v_bot_a])
-    # Bottom face (reverse order for correct normal)
-    bm.faces.new(list(reversed(verts_bottom)))
-    
-    # Ensure all faces have proper normals
-    bm.normal_update()
-    bm.faces.ensure_lookup_table()
-    
-    # Generate UV coordinates for proper Three.js compatibility
-    uv_layer = bm.loops.layers.uv.new()
-    for face in bm.faces:
-        for loop in face.loops:
-            # Basic planar UV mapping (top-down projection)
-            loop[uv_layer].uv = ((loop.vert.co.x / radius + 1) * 0.5, 
-                                  (loop.vert.co.y / radius + 1) * 0.5)
-    
-    bm.to_mesh(mesh)
-    bm.free()
-    
-    # Ensure mesh has proper data
-    mesh.update()
+def memory_report():
+    """Datablock counts in the session and created by this script, plus process memory in MB."""
+    report = {kind: len(getattr(bpy.data, kind)) for kind in ('objects', 'meshes', 'materials', 'images',
+                                                               'collections', 'scenes')}
+    report['tracked'] = sum(len(names) for names in _CREATED.values())
+    rss = prof.rss_bytes()
+    report['rss_mb'] = None if rss is None else round(rss / 2 ** 20, 1)
+    return report
+
+
+def format_memory(report) -> str:
+    return ', '.join(f'{key} {value}' for key, value in report.items() if value is not None)
+
+
+def mesh_from_data(name: str, data):
+    """Create a Blender mesh datablock from a `tile_geometry.MeshData` (bulk foreach_set, no Python lists)."""
+    mesh = track('meshes', bpy.data.meshes.new(name))
+    tris = np.asarray(data.indices, dtype=np.int32).reshape(-1)
+    n_faces = len(tris) // 3
+    mesh.vertices.add(len(data.positions))
+    mesh.vertices.foreach_set('co', np.asarray(data.positions, dtype=np.float32).ravel())
+    mesh.loops.add(len(tris))
+    mesh.loops.foreach_set('vertex_index', tris)
+    mesh.polygons.add(n_faces)
+    mesh.polygons.foreach_set('loop_start', np.arange(0, len(tris), 3, dtype=np.int32))
+    mesh.polygons.foreach_set('loop_total', np.full(n_faces, 3, dtype=np.int32))
+    if data.uvs is not None:
+        uv_layer = mesh.uv_layers.new()
+        loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_verts)
+        uv_layer.data.foreach_set('uv', data.uvs[loop_verts].ravel())
+    mesh.update(calc_edges=True)
     mesh.validate()
-    
+    return mesh
+
+
+def object_from_mesh(name: str, mesh, location=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0), collection=None):
+    """Create an object using an existing mesh (linked duplicate) and link it to `collection` (default: active)."""
     obj = bpy.data.objects.new(name, mesh)
-    bpy.context.collection.objects.link(obj)
+    prof.count('objects.created')
+    obj.location = location
+    obj.scale = scale
+    (collection or bpy.context.collection).objects.link(obj)
     return obj
 
 
-def displace_top_surface(obj, amplitude=0.06, scale=1.5, seed=0):
-    """Apply vertex displacement to the top surface using mathutils.noise.
+def object_from_mesh_data(name: str, data, location=(0.0, 0.0, 0.0), collection=None):
+    """Create a Blender object from a `tile_geometry.MeshData` and link it to `collection` (default: active)."""
+    return object_from_mesh(name, mesh_from_data(f"{name}_mesh", data), location, collection=collection)
 
-    Only displaces vertices with local Z >= 0 (top hemisphere of the prism).
+
+def create_base_hex(name: str, radius=HEX_RADIUS, thickness=HEX_THICKNESS):
+    """Create a POINTY-TOP hexagonal prism centered at origin.
+
+    Geometry comes from `tile_geometry.build_base_hex` (point at +Y, planar
+    UVs for Three.js). The local +Z remains "up" for displacement logic.
     """
+    return object_from_mesh_data(name, geo.build_base_hex(radius, thickness))
+
+
+def displace_top_surface(obj, amplitude=0.06, scale=1.5, seed=0):
+    """Apply noise displacement to the top surface (local Z >= 0) of `obj` via the geometry core."""
     me = obj.data
-    bm = bmesh.new()
-    bm.from_mesh(me)
-    for v in bm.verts:
-        # Local coordinate
-        co = v.co
-        if co.z >= 0:
-            # noise expects Vector
-            n = noise.noise(Vector((co.x * scale + seed, co.y * scale + seed, seed)))
-            # push along Z and slightly along vertex normal
-            disp = n * amplitude
-            # approximate normal by direction from center for lateral component
-            lateral = Vector((co.x, co.y, 0)).normalized() if (co.x != 0 or co.y != 0) else Vector((0, 0, 0))
-            v.co += Vector((lateral.x, lateral.y, 0)) * (disp * 0.15) + Vector((0, 0, disp))
-    bm.to_mesh(me)
-    bm.free()
+    co = np.empty(len(me.vertices) * 3, dtype=np.float32)
+    me.vertices.foreach_get('co', co)
+    data = geo.MeshData(co, np.zeros((0, 3)))
+    geo.displace_top(data, amplitude=amplitude, scale=scale, seed=seed)
+    me.vertices.foreach_set('co', data.positions.ravel())
     me.update()
 
 
@@ -192,7 +337,7 @@ def get_or_create_material(name: str, base_color=(0.5, 0.5, 0.5, 1.0), metallic=
     """Return a principled material with given base color. Reuse if already exists."""
     mat = bpy.data.materials.get(name)
     if mat is None:
-        mat = bpy.data.materials.new(name=name)
+        mat = track('materials', bpy.data.materials.new(name=name))
         mat.use_nodes = True
         bsdf = mat.node_tree.nodes.get('Principled BSDF')
         if bsdf:
@@ -244,212 +389,446 @@ def assign_material_to_object(obj, mat, base_color=(1.0, 1.0, 1.0, 1.0)):
         pass
 
 
-def get_grass_material_for_tile(index: int, base_color=(0.22, 0.55, 0.18, 1.0)):
-    """Create or return a per-tile grass material with tiny random variation to reduce repetition."""
-    name = f"Grass_Mat_v{index}"
-    mat = bpy.data.materials.get(name)
-    if mat is None:
-        # jitter color and roughness slightly
-        jitter = (random.uniform(-0.03, 0.03), random.uniform(-0.03, 0.03), random.uniform(-0.03, 0.03), 0)
-        color = tuple(max(0.0, min(1.0, base_color[i] + jitter[i])) for i in range(4))
-        rough = max(0.2, min(1.0, 0.85 + random.uniform(-0.12, 0.12)))
-        mat = get_or_create_material(name, base_color=color, metallic=0.0, roughness=rough)
-    return mat
+def get_ground_material_for_tile(index: int, base_name='Grass_Mat', base_color=(0.22, 0.55, 0.18, 1.0), rng=random):
+    """Create or update a per-tile ground material with tiny random variation to reduce repetition.
+
+    The jitter is drawn on every call, so a material reused by name (e.g.
+    by the resident worker) always matches the current tile and recipe.
+    """
+    name, spec = geo.ground_material_for_tile(index, rng=rng, base_name=base_name, base_color=base_color)
+    with prof.span('materials'):
+        return get_or_create_material(name, **spec)
+
+
+def set_normal_map(mat, pixels):
+    """Feed (H, W, 3) uint8 tangent-space `pixels` into `mat`'s BSDF through Image Texture -> Normal Map nodes.
+
+    The image is named after the material and packed; rebuilding reuses the
+    image and nodes, so the map is updated in place.
+    """
+    height, width = pixels.shape[:2]
+    name = f'{mat.name}_normal'
+    img = bpy.data.images.get(name)
+    if img is None:
+        img = track('images', bpy.data.images.new(name, width, height, alpha=False))
+    elif tuple(img.size) != (width, height):
+        img.scale(width, height)
+    img.colorspace_settings.name = 'Non-Color'
+    rgba = np.ones((height, width, 4), dtype=np.float32)
+    rgba[..., :3] = pixels[::-1] / 255.0  # Blender image rows run bottom-up
+    img.pixels.foreach_set(rgba.ravel())
+    img.pack()
+    mat.use_nodes = True
+    nodes, links = mat.node_tree.nodes, mat.node_tree.links
+    tex = nodes.get('Baked Normal') or nodes.new('ShaderNodeTexImage')
+    tex.name = 'Baked Normal'
+    tex.image = img
+    normal_map = nodes.get('Normal Map') or nodes.new('ShaderNodeNormalMap')
+    links.new(tex.outputs['Color'], normal_map.inputs['Color'])
+    bsdf = nodes.get('Principled BSDF')
+    if bsdf:
+        links.new(normal_map.outputs['Normal'], bsdf.inputs['Normal'])
+
+
+def image_png_bytes(img) -> bytes:
+    """Encode a Blender image's RGB as PNG bytes (top row first, as glTF expects)."""
+    width, height = img.size
+    px = np.empty(width * height * 4, dtype=np.float32)
+    img.pixels.foreach_get(px)
+    rgb = px.reshape(height, width, 4)[::-1, :, :3]
+    return tile_bake.png_bytes(np.clip(np.rint(rgb * 255.0), 0, 255).astype(np.uint8))
+
+
+def refresh_materials(materials=None):
+    """Re-apply the specs (recipe `materials` over `tile_geometry.MATERIALS`) to materials that already exist."""
+    specs = dict(geo.MATERIALS)
+    specs.update(materials or {})
+    with prof.span('materials'):
+        for name, spec in specs.items():
+            if bpy.data.materials.get(name) is not None:
+                get_or_create_material(name, **spec)
+
+
+def get_material_for_part(material: str, materials=None):
+    """Return the shared Blender material for a recipe material or `tile_geometry.MATERIALS` name."""
+    spec = (materials or {}).get(material) or geo.MATERIALS[material]
+    with prof.span('materials'):
+        return get_or_create_material(material, **spec)
+
+
+def add_part_object(part, location=(0.0, 0.0, 0.0), materials=None, collection=None):
+    """Create a smooth-shaded, material-assigned object for a `tile_geometry.TilePart`."""
+    obj = object_from_mesh_data(part.name, part.mesh, location, collection)
+    shade_smooth(obj)
+    mat = get_material_for_part(part.material, materials)
+    assign_material_to_object(obj, mat, base_color=mat.diffuse_color[:])
+    return obj
 
 
 def add_simple_rock(location, scale=0.07, seed=0, name_prefix="rock"):
-    """Create a low-poly rock by starting from an icosphere and displacing vertices with noise."""
-    bpy.ops.mesh.primitive_ico_sphere_add(subdivisions=2, radius=scale, enter_editmode=False, location=location)
-    rock = bpy.context.active_object
-    rock.name = f"{name_prefix}_{rock.name}"
-    # Displace vertices procedurally
-    me = rock.data
-    bm = bmesh.new()
-    bm.from_mesh(me)
-    for v in bm.verts:
-        n = noise.noise(Vector((v.co.x * 3 + seed, v.co.y * 3 + seed, v.co.z * 3 + seed)))
-        v.co += v.co.normalized() * (n * scale * 0.35)
-    bm.to_mesh(me)
-    bm.free()
-    me.update()
-    shade_smooth(rock)
-    # Assign rock material
-    rock_mat = get_or_create_material('Rock_Mat', base_color=(0.45, 0.45, 0.48, 1.0), metallic=0.0, roughness=0.8)
-    assign_material_to_object(rock, rock_mat, base_color=(0.45, 0.45, 0.48, 1.0))
-    return rock
+    """Create a low-poly rock (noise-displaced icosphere) from the geometry core."""
+    part = geo.TilePart(name_prefix, geo.build_rock((0, 0, 0), scale=scale, seed=seed), 'Rock_Mat')
+    return add_part_object(part, location)
 
 
 def add_tuft(location, scale=0.06, name_prefix="tuft"):
-    """Create a simple grass tuft as a slightly bent plane (two faces) scaled up in Z axis."""
-    # Make a plane, rotate so it stands upright
-    bpy.ops.mesh.primitive_plane_add(size=1, enter_editmode=False, location=location)
-    tuft = bpy.context.active_object
-    tuft.scale = (scale * 0.25, scale * 0.02, scale)
-    tuft.rotation_euler[0] = pi / 2  # make it vertical
-    tuft.name = f"{name_prefix}_{tuft.name}"
-    # Bend the tuft a little by moving its top vertices
-    me = tuft.data
-    bm = bmesh.new()
-    bm.from_mesh(me)
-    for v in bm.verts:
-        # move top vertices (positive Y in local plane) forward
-        if v.co.y > 0:
-            v.co.x += (random.uniform(-0.02, 0.02) + 0.02) * scale
-            v.co.z += random.uniform(0.01, 0.03) * scale
-    bm.to_mesh(me)
-    bm.free()
-    me.update()
-    shade_smooth(tuft)
-    # Assign tuft material (a bright grass green)
-    tuft_mat = get_or_create_material('Tuft_Mat', base_color=(0.16, 0.6, 0.12, 1.0), metallic=0.0, roughness=0.9)
-    assign_material_to_object(tuft, tuft_mat, base_color=(0.16, 0.6, 0.12, 1.0))
-    return tuft
+    """Create a simple grass tuft (slightly bent upright plane) from the geometry core."""
+    part = geo.TilePart(name_prefix, geo.build_tuft((0, 0, 0), scale=scale, rng=random), 'Tuft_Mat')
+    return add_part_object(part, location)
 
 
 def add_tree(location, trunk_height=0.18, crown_radius=0.16, seed=0, name_prefix="tree"):
-    """Create a simple low-poly tree (cylinder trunk + icosphere crown)."""
-    # trunk
-    bpy.ops.mesh.primitive_cylinder_add(vertices=8, radius=trunk_height * 0.12, depth=trunk_height, location=(location[0], location[1], location[2] + trunk_height / 2))
-    trunk = bpy.context.active_object
-    trunk.name = f"{name_prefix}_trunk_{trunk.name}"
-    # crown
-    crown_loc = (location[0], location[1], location[2] + trunk_height + crown_radius * 0.6)
-    bpy.ops.mesh.primitive_ico_sphere_add(subdivisions=2, radius=crown_radius, location=crown_loc)
-    crown = bpy.context.active_object
-    crown.name = f"{name_prefix}_crown_{crown.name}"
-    # roughen crown
-    me = crown.data
-    bm = bmesh.new()
-    bm.from_mesh(me)
-    for v in bm.verts:
-        n = noise.noise(Vector((v.co.x * 2 + seed, v.co.y * 2 + seed, v.co.z * 2 + seed)))
-        v.co += v.co.normalized() * (n * crown_radius * 0.12)
-    bm.to_mesh(me)
-    bm.free()
-    me.update()
-    shade_smooth(trunk)
-    shade_smooth(crown)
-    # Assign trunk and crown materials
-    trunk_mat = get_or_create_material('Trunk_Mat', base_color=(0.35, 0.2, 0.08, 1.0), metallic=0.0, roughness=0.9)
-    leaf_mat = get_or_create_material('Leaf_Mat', base_color=(0.12, 0.5, 0.14, 1.0), metallic=0.0, roughness=0.8)
-    assign_material_to_object(trunk, trunk_mat, base_color=(0.35, 0.2, 0.08, 1.0))
-    assign_material_to_object(crown, leaf_mat, base_color=(0.12, 0.5, 0.14, 1.0))
+    """Create a simple low-poly tree (cylinder trunk + icosphere crown) from the geometry core."""
+    trunk, crown = geo.build_tree(location, trunk_height=trunk_height, crown_radius=crown_radius, seed=seed)
+    trunk = add_part_object(geo.TilePart(f"{name_prefix}_trunk", trunk, 'Trunk_Mat'))
+    crown = add_part_object(geo.TilePart(f"{name_prefix}_crown", crown, 'Leaf_Mat'))
     return trunk, crown
 
 
 def random_point_on_hex(radius=HEX_RADIUS, margin=0.0):
-    """Return a random (x, y) point inside a flat-top hexagon by rejection sampling within circle then test distance to hex edges.
+    """Return a random (x, y) point inside the hex (see `tile_geometry.random_point_on_hex`)."""
+    return geo.random_point_on_hex(radius=radius, margin=margin, rng=random)
+
+
+def prototype_mesh(group, materials=None):
+    """Smooth-shaded, material-assigned Blender mesh for an InstanceGroup's prototype."""
+    mesh = mesh_from_data(f"{group.name}_{group.material}_proto", group.mesh)
+    for poly in mesh.polygons:
+        poly.use_smooth = True
+    mesh.materials.append(get_material_for_part(group.material, materials))
+    return mesh
+
+
+class PrototypeLibrary:
+    """Per-run cache of scatter prototypes: each shape becomes one Blender mesh, shared by every tile.
+
+    `shapes` are the `tile_geometry.build_scatter_prototypes` MeshData pools
+    (a few noise-varied rocks, tufts and crowns plus a unit trunk), built
+    once per seed; `mesh_for` turns a prototype into a smooth-shaded,
+    material-assigned mesh datablock the first time it is asked for and
+    returns the same datablock afterwards, so scattering only creates
+    lightweight objects (location + scale) that link to it.
+    """
 
-    This is cheap and acceptable for small counts.
+    def __init__(self, seed=SEED, materials=None):
+        self.shapes = geo.build_scatter_prototypes(seed)
+        self.materials = materials
+        self.meshes = {}
+        self._shape_ids = {id(shape) for shapes in self.shapes.values() for shape in shapes}
+
+    def mesh_for(self, group):
+        """Shared mesh for a group of library shapes; a group with its own (e.g. decimated) mesh gets a new one."""
+        shared = id(group.mesh) in self._shape_ids
+        key = (group.name, group.material)
+        mesh = self.meshes.get(key) if shared else None
+        if mesh is None:
+            mesh = prototype_mesh(group, self.materials)
+            if shared:
+                self.meshes[key] = mesh
+        return mesh
+
+
+def add_instance_objects(group, tile_col, offset=(0.0, 0.0, 0.0), materials=None, library=None):
+    """Create one linked duplicate per instance of a `tile_geometry.InstanceGroup` (shared mesh).
+
+    With a `PrototypeLibrary` the mesh is shared across every tile of the
+    run; without one only this group's prototype mesh is made.
     """
-    attempts = 0
-    while True:
-        attempts += 1
-        # sample within circle first
-        r = random.random() ** 0.5 * (radius - margin)
-        theta = random.random() * 2 * pi
-        x = r * cos(theta)
-        y = r * sin(theta)
-        # convert to axial basis for flat-top hex check
-        # Use the property that in flat-top hex, max(|x'|, |y'|, |z'|) <= radius where x',y',z' are cube coords scaled
-        # Quick approximate check: project to hex axial coordinates
-        q = (2.0 / 3.0) * x / radius
-        r_ax = (-1.0 / 3.0) * x / radius + (1.0 / 3.0) * (2 ** 0.5) * y / radius
-        if abs(q) <= 1.0 and abs(r_ax) <= 1.0:
-            return x, y
-        if attempts > 50:
-            # give up and return a near-center point
-            return x * 0.5, y * 0.5
-
-
-def build_variation(index: int, col, seed_offset=0, params=None):
+    mesh = library.mesh_for(group) if library else prototype_mesh(group, materials)
+    color = mesh.materials[0].diffuse_color[:]
+    for k in range(group.count):
+        t = group.translations[k]
+        inst = object_from_mesh(f"{group.name}_{k}", mesh,
+                                (offset[0] + t[0], offset[1] + t[1], offset[2] + t[2]), tuple(group.scales[k]),
+                                collection=tile_col)
+        inst.color = color
+
+
+def build_variation(index: int, col, seed_offset=0, params=None, seed=SEED, instanced=False, materials=None,
+                    library=None, max_tris=None):
     """Build a single tile variation and add it to the given collection.
 
+    The geometry is generated by `tile_geometry.build_tile_parts`; this only
+    creates one Blender object per part, offset along X for side-by-side
+    preview. With instanced=True rocks, tufts and trees become linked
+    duplicates of the run's shared prototype meshes
+    (`tile_geometry.build_tile_instanced` + `PrototypeLibrary`).
+    `materials` holds the biome recipe's extra material specs. With
+    `max_tris` the tile is decimated to that triangle budget
+    (`tile_decimate.fit_budget`) and the error introduced is printed.
     Returns the main tile object.
     """
-    if params is None:
-        params = {}
-    random.seed(SEED + seed_offset + index)
-
-    name = f"grassland_tile_{index}"
-    obj = create_base_hex(name, radius=HEX_RADIUS, thickness=HEX_THICKNESS)
-    # Assign grass material to base tile (use helper to set viewport color)
-    grass_mat = get_or_create_material('Grass_Mat', base_color=(0.22, 0.55, 0.18, 1.0), metallic=0.0, roughness=0.9)
-    assign_material_to_object(obj, grass_mat, base_color=(0.22, 0.55, 0.18, 1.0))
-    obj.location.x = index * (HEX_RADIUS * 2.6)
-    # Keep all variants aligned (no random rotation) for consistent tile placement
-    # obj.rotation_euler[2] = 0  # All tiles face the same direction (pointy-top aligned)
-
-    # displace top
-    displace_top_surface(obj, amplitude=params.get('height_amp', 0.06), scale=params.get('noise_scale', 1.5), seed=SEED + index + seed_offset)
-    shade_smooth(obj)
+    groups = []
+    with prof.span('tile.geometry'):
+        if instanced:
+            library = library or PrototypeLibrary(seed, materials)
+            parts, groups = geo.build_tile_instanced(index, params, seed=seed, seed_offset=seed_offset,
+                                                     radius=HEX_RADIUS, thickness=HEX_THICKNESS, rng=random,
+                                                     prototypes=library.shapes)
+        else:
+            parts = geo.build_tile_parts(index, params, seed=seed, seed_offset=seed_offset,
+                                         radius=HEX_RADIUS, thickness=HEX_THICKNESS, rng=random)
+    if max_tris:
+        with prof.span('decimate'):
+            parts, groups, stats = tile_decimate.fit_budget(parts, groups, max_tris,
+                                                            seamless=bool(params.get('seamless')),
+                                                            radius=HEX_RADIUS, thickness=HEX_THICKNESS)
+        print(tile_decimate.format_stats(f'tile_{index}', stats))
+    offset = (index * (HEX_RADIUS * 2.6), 0.0, 0.0)
 
     # create an empty collection per tile for organization
-    tile_col = bpy.data.collections.new(f"tile_{index}_col")
+    tile_col = track('collections', bpy.data.collections.new(f"tile_{index}_col"))
     col.children.link(tile_col)
-    tile_col.objects.link(obj)
-
-    # Scatter rocks
-    rock_count = params.get('rocks', 3)
-    for i in range(rock_count):
-        rx, ry = random_point_on_hex(radius=HEX_RADIUS * 0.7, margin=0.02)
-        rz = HEX_THICKNESS / 2 + 0.01
-        rock_scale = random.uniform(0.045, 0.12) * params.get('rock_scale_mult', 1.0)
-        rock = add_simple_rock((obj.location.x + rx, ry, rz), scale=rock_scale, seed=SEED + i + index)
-        tile_col.objects.link(rock)
-
-    # Scatter tufts
-    tuft_count = params.get('tufts', 18)
-    tuft_master = None
-    for i in range(tuft_count):
-        tx, ty = random_point_on_hex(radius=HEX_RADIUS * 0.92, margin=0.02)
-        tz = HEX_THICKNESS / 2 + 0.002
-        tuft = add_tuft((obj.location.x + tx, ty, tz), scale=random.uniform(0.04, 0.09))
-        tile_col.objects.link(tuft)
-
-    # Add a sparse tree optionally
-    tree_prob = params.get('tree_prob', 0.35)
-    if random.random() < tree_prob:
-        tx, ty = random_point_on_hex(radius=HEX_RADIUS * 0.6, margin=0.05)
-        trunk, crown = add_tree((obj.location.x + tx, ty, HEX_THICKNESS / 2), trunk_height=params.get('trunk_height', 0.16), crown_radius=params.get('crown_radius', 0.14))
-        tile_col.objects.link(trunk)
-        tile_col.objects.link(crown)
 
+    obj = None
+    with prof.span('scene.objects'):
+        for part in parts:
+            part_obj = add_part_object(part, offset, materials, collection=tile_col)
+            if obj is None:
+                obj = part_obj
+    with prof.span('scene.instances'):
+        for group in groups:
+            add_instance_objects(group, tile_col, offset, materials, library)
     return obj
 
 
+def apply_ground_material(tile_obj, index: int, params, materials=None, seed=SEED, seed_offset=0):
+    """Replace the main tile's first material (ground) with its per-tile variant.
+
+    The jitter comes from the tile's ('ground', 'material') stream
+    (`tile_geometry.tile_stream`), like the batch driver's.
+    """
+    if not tile_obj or not tile_obj.data:
+        return
+    ground = params.get('materials', {}).get('ground', 'Grass_Mat')
+    spec = (materials or {}).get(ground) or geo.MATERIALS[ground]
+    rng = geo.tile_stream(params, seed, seed_offset, index, 'ground', 'material')
+    mat = get_ground_material_for_tile(index, ground, spec['base_color'], rng)
+    if tile_obj.data.materials:
+        tile_obj.data.materials[0] = mat
+    else:
+        tile_obj.data.materials.append(mat)
+
+
+def bake_ground_normal_map(tile_obj, index: int, params, seed=SEED, seed_offset=0, size=256):
+    """Bake the full-resolution top into a normal map on the tile's ground material; returns the bake stats.
+
+    Bakes onto the tile object's own (possibly decimated) mesh, so the map
+    matches what gets exported; see `tile_bake.bake_normal_map`.
+    """
+    if not tile_obj or not tile_obj.data or not tile_obj.data.materials:
+        return None
+    with prof.span('bake'):
+        plan = geo.plan_surface(index, params, seed, seed_offset, HEX_RADIUS, HEX_THICKNESS)
+        pixels, stats = tile_bake.bake_normal_map(plan, mesh_data_from_object(tile_obj, world=False), size)
+        set_normal_map(tile_obj.data.materials[0], pixels)
+    return stats
+
+
 def main():
     # This main is a thin wrapper kept for backwards compatibility.
     main_with_options(seed=SEED, build_count=3, export_path=None, export_format='GLB')
 
 
-def export_collection(collection, filepath: str, fmt: str = 'GLB', isolated: bool = True):
-    """Export objects in the collection to filepath. fmt is 'GLB' or 'OBJ'.
+def collect_objects(col):
+    """Return the objects of a collection and all of its child collections."""
+    objs = list(col.objects)
+    for ch in col.children_recursive:
+        objs += list(ch.objects)
+    return objs
+
+
+def find_main_tile(objs):
+    """Return the hex base object of a variant (named `<tile_name>_<i>`, e.g. `grassland_tile_0`), if any."""
+    return next((o for o in objs if '_tile_' in o.name), None)
+
 
-    When isolated=True, creates a temporary scene with ONLY the collection's
-    objects linked (duplicates) so the GLB contains no sibling collections.
+def material_spec(mat):
+    """Read principled BSDF inputs of a Blender material into a `tile_glb` material spec."""
+    spec = {'base_color': tuple(mat.diffuse_color), 'metallic': 0.0, 'roughness': 0.5}
+    try:
+        bsdf = mat.node_tree.nodes.get('Principled BSDF') if mat.use_nodes else None
+        if bsdf:
+            spec['base_color'] = tuple(bsdf.inputs['Base Color'].default_value)
+            spec['metallic'] = bsdf.inputs['Metallic'].default_value
+            spec['roughness'] = bsdf.inputs['Roughness'].default_value
+            normal = bsdf.inputs['Normal'].links[0].from_node if bsdf.inputs['Normal'].is_linked else None
+            if normal and normal.type == 'NORMAL_MAP' and normal.inputs['Color'].is_linked:
+                tex = normal.inputs['Color'].links[0].from_node
+                if tex.type == 'TEX_IMAGE' and tex.image:
+                    spec['normal_texture'] = image_png_bytes(tex.image)
+    except Exception:
+        # non-critical if node setup differs; keep viewport colour
+        pass
+    return spec
+
+
+def mesh_data_from_object(obj, origin=(0.0, 0.0, 0.0), world=True):
+    """Return the evaluated mesh of `obj` as `tile_geometry.MeshData` in world space minus `origin`.
+
+    With world=False the mesh stays in object-local space (used for instance prototypes).
     """
-    def collect_objects(col):
-        objs = list(col.objects)
-        for ch in col.children_recursive:
-            objs += list(ch.objects)
-        return objs
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    eval_obj = obj.evaluated_get(depsgraph)
+    me = eval_obj.to_mesh()
+    try:
+        me.calc_loop_triangles()
+        co = np.empty(len(me.vertices) * 3, dtype=np.float32)
+        me.vertices.foreach_get('co', co)
+        tris = np.empty(len(me.loop_triangles) * 3, dtype=np.int32)
+        me.loop_triangles.foreach_get('vertices', tris)
+        if world:
+            mw = np.array(obj.matrix_world, dtype=np.float64)
+            pos = co.reshape(-1, 3) @ mw[:3, :3].T + mw[:3, 3] - np.asarray(origin, dtype=np.float64)
+        else:
+            pos = co.reshape(-1, 3)
+        uvs = None
+        if me.uv_layers.active:
+            loop_verts = np.empty(len(me.loops), dtype=np.int32)
+            me.loops.foreach_get('vertex_index', loop_verts)
+            loop_uv = np.empty(len(me.loops) * 2, dtype=np.float32)
+            me.uv_layers.active.data.foreach_get('uv', loop_uv)
+            uvs = np.zeros((len(me.vertices), 2), dtype=np.float32)
+            uvs[loop_verts] = loop_uv.reshape(-1, 2)
+        return geo.MeshData(pos, tris, uvs)
+    finally:
+        eval_obj.to_mesh_clear()
+
+
+def export_collection_native(collection, filepath: str, merge: bool = False, instanced: bool = False,
+                             palette: bool = False, quantize: bool = False, compress: str | None = None,
+                             optimize: bool = False):
+    """Write the collection's mesh objects straight to a GLB with `tile_glb` (no temp scene, no add-on).
+
+    Positions are recentered on the variant's main tile like the isolated
+    add-on export. With merge=True all objects are joined into one mesh with
+    one primitive per material. With instanced=True objects sharing a mesh
+    (linked duplicates) are written once with EXT_mesh_gpu_instancing.
+    With palette=True material colours become vertex colours on the one
+    shared `tile_glb.PALETTE_MATERIAL`; quantize/compress shrink the file
+    (see `tile_glb.write_tile_glb`); optimize welds and reorders indices and
+    prints the ACMR/ATVR change. Returns the number of bytes written.
+    """
+    with prof.span('export.collect'):
+        parts, groups, specs = collect_export_data(collection, instanced)
+    stats = []
+    with prof.span('export.write'):
+        size = tile_glb.write_tile_glb(filepath, parts, materials=specs, merge=merge, instances=groups,
+                                       palette=palette, quantize=quantize, compress=compress, optimize=optimize,
+                                       stats=stats)
+    if stats:
+        print(tile_optimize.format_stats(os.path.basename(filepath), tile_optimize.summarize(stats)))
+    return size
+
+
+def export_impostor(collection, filepath: str, frame=128, instanced=False):
+    """Render a variant collection's impostor atlas next to its export `filepath` (see `tile_impostor`)."""
+    with prof.span('impostor'):
+        parts, groups, specs = collect_export_data(collection, instanced)
+        info = tile_impostor.write_impostor(filepath, parts, groups, specs, frame)
+    print('Impostor', '->', os.path.join(os.path.dirname(filepath), info['index']), f"({info['bytes']} bytes)")
+    return info
+
+
+def collect_export_data(collection, instanced=False):
+    """Gather the collection's mesh objects as (parts, instance groups, material specs) for `tile_glb`.
+
+    Positions are relative to the variant's main tile; with instanced=True
+    objects sharing a mesh become `tile_geometry.InstanceGroup`s.
+    """
+    objs = [o for o in collect_objects(collection) if o.type == 'MESH']
+    main_tile = find_main_tile(objs)
+    if main_tile is not None:
+        # main tile first so merged output is named after it
+        objs.remove(main_tile)
+        objs.insert(0, main_tile)
+    origin = main_tile.matrix_world.to_translation() if main_tile else Vector((0.0, 0.0, 0.0))
+
+    shared = {}
+    if instanced:
+        for o in objs:
+            if o is not main_tile:
+                shared.setdefault(o.data.name, []).append(o)
+        shared = {name: users for name, users in shared.items() if len(users) > 1}
+    instance_objs = {o.name for users in shared.values() for o in users}
+
+    parts, groups, specs = [], [], {}
+
+    def material_name(o):
+        mat = o.active_material
+        if mat and mat.name not in specs:
+            specs[mat.name] = material_spec(mat)
+        return mat.name if mat else 'Material'
+
+    for o in objs:
+        if o.name in instance_objs:
+            continue
+        data = mesh_data_from_object(o, origin)
+        if data.triangle_count == 0:
+            continue
+        parts.append(geo.TilePart(o.name, data, material_name(o)))
+    for mesh_name, users in shared.items():
+        translations, rotations, scales = [], [], []
+        for o in users:
+            loc, rot, sca = o.matrix_world.decompose()
+            translations.append(tuple(loc - origin))
+            rotations.append((rot.x, rot.y, rot.z, rot.w))
+            scales.append(tuple(sca))
+        groups.append(geo.InstanceGroup(mesh_name, mesh_data_from_object(users[0], world=False),
+                                        material_name(users[0]), translations, scales, rotations))
+    return parts, groups, specs
+
+
+def native_only_options(writer: str, **options):
+    """Names of the set `options` (merge, palette, quantize, compress, optimize) that `writer` would ignore.
+
+    Only the native writer honours them; the glTF add-on writes its own
+    layout, so asking for them with writer='blender' is an error rather
+    than a silently different file.
+    """
+    if writer == 'native':
+        return []
+    return [name for name, value in options.items() if value]
+
+
+def check_writer_options(writer: str, **options):
+    """Raise ValueError when `writer` cannot honour the set `options` (see `native_only_options`)."""
+    ignored = native_only_options(writer, **options)
+    if ignored:
+        flags = ', '.join(ignored)
+        raise ValueError(f"{flags} need the native writer; writer='{writer}' would ignore them")
+
+
+def export_collection(collection, filepath: str, fmt: str = 'GLB', isolated: bool = True, writer: str = 'native', merge: bool = False, instanced: bool = False, palette: bool = False, quantize: bool = False, compress: str | None = None, optimize: bool = False):
+    """Export objects in the collection to filepath. fmt is 'GLB' or 'OBJ'.
 
+    writer='native' (default for GLB) serializes mesh data directly with
+    `tile_glb` (merge=True joins the variant into one mesh with one primitive
+    per material, instanced=True writes linked duplicates with
+    EXT_mesh_gpu_instancing, palette=True bakes colours into COLOR_0 on one
+    shared material); writer='blender' uses the glTF add-on. With the add-on and
+    isolated=True, a temporary scene with ONLY the collection's objects
+    linked (duplicates) is created so the GLB contains no sibling collections.
+    merge, palette, quantize, compress and optimize are native-writer options:
+    passing any of them with writer='blender' raises ValueError.
+    """
+    check_writer_options(writer, merge=merge, palette=palette, quantize=quantize, compress=compress,
+                         optimize=optimize)
     fmtU = fmt.upper()
 
+    if fmtU in ('GLB', 'GLTF') and writer == 'native':
+        return export_collection_native(collection, filepath, merge=merge, instanced=instanced, palette=palette,
+                                        quantize=quantize, compress=compress, optimize=optimize)
+
     if isolated:
         # Build a temporary scene with only this collection's objects
         src_objs = collect_objects(collection)
-        tmp_scene = bpy.data.scenes.new('TMP_EXPORT_SCENE')
+        tmp_scene = track('scenes', bpy.data.scenes.new('TMP_EXPORT_SCENE'))
         try:
             # Duplicate and link copies to the temp scene
             dupes = []
             # Find the main hex tile object to use as reference
-            main_tile = None
-            for o in src_objs:
-                if 'grassland_tile_' in o.name:
-                    main_tile = o
-                    break
+            main_tile = find_main_tile(src_objs)
             
             # Compute the main tile world translation so we can recenter everything
             # Use matrix_world to capture any parent/scene transforms that may apply
@@ -462,29 +841,33 @@ def export_collection(collection, filepath: str, fmt: str = 'GLB', isolated: boo
 
             from mathutils import Matrix
 
-            for o in src_objs:
-                dup = o.copy()
-                if o.data:
-                    dup.data = o.data.copy()
-                # Preserve the object's world transform then translate so main tile sits at origin
-                try:
-                    # Copy full world matrix to preserve rotations/scales
-                    dup.matrix_world = o.matrix_world.copy()
-                    if main_tile_world_loc is not None:
-                        dup.matrix_world.translation -= main_tile_world_loc
-                except Exception:
-                    # Fallback: adjust local location relative to main tile world location
-                    if main_tile_world_loc is not None:
-                        dup.location = (
-                            o.location.x - main_tile_world_loc.x,
-                            o.location.y - main_tile_world_loc.y,
-                            o.location.z - main_tile_world_loc.z,
-                        )
-                    else:
-                        dup.location = o.location
-
-                tmp_scene.collection.objects.link(dup)
-                dupes.append(dup)
+            with prof.span('export.duplicate'):
+                for o in src_objs:
+                    dup = o.copy()
+                    if o.data:
+                        dup.data = o.data.copy()
+                        if dup.type == 'MESH':
+                            track('meshes', dup.data)
+                    # Preserve the object's world transform then translate so main tile sits at origin
+                    try:
+                        # Copy full world matrix to preserve rotations/scales
+                        dup.matrix_world = o.matrix_world.copy()
+                        if main_tile_world_loc is not None:
+                            dup.matrix_world.translation -= main_tile_world_loc
+                    except Exception:
+                        # Fallback: adjust local location relative to main tile world location
+                        if main_tile_world_loc is not None:
+                            dup.location = (
+                                o.location.x - main_tile_world_loc.x,
+                                o.location.y - main_tile_world_loc.y,
+                                o.location.z - main_tile_world_loc.z,
+                            )
+                        else:
+                            dup.location = o.location
+
+                    tmp_scene.collection.objects.link(dup)
+                    dupes.append(dup)
+            prof.count('objects.created', len(dupes))
 
             # Make temp scene active
             old_scene = bpy.context.window.scene if bpy.context.window else bpy.context.scene
@@ -493,15 +876,16 @@ def export_collection(collection, filepath: str, fmt: str = 'GLB', isolated: boo
 
             # Export entire temp scene (no selection filtering needed)
             if fmtU in ('GLB', 'GLTF'):
-                bpy.ops.export_scene.gltf(
-                    filepath=filepath, 
-                    use_selection=False, 
-                    export_apply=True,
-                    export_normals=True,
-                    export_texcoords=True,
-                    export_materials='EXPORT',
-                    export_original_specular=False
-                )
+                with prof.span('export.gltf'):
+                    bpy.ops.export_scene.gltf(
+                        filepath=filepath,
+                        use_selection=False,
+                        export_apply=True,
+                        export_normals=True,
+                        export_texcoords=True,
+                        export_materials='EXPORT',
+                        export_original_specular=False
+                    )
             elif fmtU == 'OBJ':
                 bpy.ops.export_scene.obj(filepath=filepath, use_selection=False)
             else:
@@ -513,7 +897,10 @@ def export_collection(collection, filepath: str, fmt: str = 'GLB', isolated: boo
         finally:
             # Clean up temp scene and duplicated data
             try:
+                remove_objects(dupes)
+                _CREATED['scenes'].discard(tmp_scene.name)
                 bpy.data.scenes.remove(tmp_scene)
+                prof.count('scenes.freed')
             except Exception:
                 pass
     else:
@@ -522,15 +909,16 @@ def export_collection(collection, filepath: str, fmt: str = 'GLB', isolated: boo
         for obj in collect_objects(collection):
             obj.select_set(True)
         if fmtU in ('GLB', 'GLTF'):
-            bpy.ops.export_scene.gltf(
-                filepath=filepath, 
-                use_selection=True, 
-                export_apply=True,
-                export_normals=True,
-                export_texcoords=True,
-                export_materials='EXPORT',
-                export_original_specular=False
-            )
+            with prof.span('export.gltf'):
+                bpy.ops.export_scene.gltf(
+                    filepath=filepath,
+                    use_selection=True,
+                    export_apply=True,
+                    export_normals=True,
+                    export_texcoords=True,
+                    export_materials='EXPORT',
+                    export_original_specular=False
+                )
         elif fmtU == 'OBJ':
             bpy.ops.export_scene.obj(filepath=filepath, use_selection=True)
         else:
@@ -546,7 +934,12 @@ def parse_args(argv=None):
         args = argv[argv.index('--') + 1:]
     else:
         args = []
-    out = {'seed': SEED, 'build_count': 3, 'export_path': None, 'export_format': 'GLB', 'size': HEX_RADIUS}
+    out = {'seed': SEED, 'build_count': 3, 'export_path': None, 'export_format': 'GLB', 'size': HEX_RADIUS,
+           'export_writer': 'native', 'merge': False, 'instanced': False, 'force': False, 'resolution': None,
+           'seamless': False, 'biome': 'grass', 'palette': False, 'quantize': False, 'compress': None,
+           'optimize': False, 'profile': False, 'trace': None, 'serve': False, 'port': None, 'repeat': 1,
+           'memory_report': False, 'max_tris': None, 'bake_normals': None, 'impostors': None,
+           'pack': False}
     i = 0
     while i < len(args):
         a = args[i]
@@ -560,45 +953,108 @@ def parse_args(argv=None):
             out['export_format'] = args[i + 1]; i += 2; continue
         if a in ('--size', '-S') and i + 1 < len(args):
             out['size'] = float(args[i + 1]); i += 2; continue
+        if a in ('--writer', '-w') and i + 1 < len(args):
+            out['export_writer'] = args[i + 1].lower(); i += 2; continue
+        if a in ('--merge', '-m'):
+            out['merge'] = True; i += 1; continue
+        if a in ('--instanced', '-i'):
+            out['instanced'] = True; i += 1; continue
+        if a in ('--resolution', '-r') and i + 1 < len(args):
+            out['resolution'] = int(args[i + 1]); i += 2; continue
+        if a in ('--biome', '-b') and i + 1 < len(args):
+            out['biome'] = args[i + 1]; i += 2; continue
+        if a == '--seamless':
+            out['seamless'] = True; i += 1; continue
+        if a == '--palette':
+            out['palette'] = True; i += 1; continue
+        if a in ('--quantize', '-q'):
+            out['quantize'] = True; i += 1; continue
+        if a == '--optimize':
+            out['optimize'] = True; i += 1; continue
+        if a == '--compress' and i + 1 < len(args):
+            out['compress'] = args[i + 1].lower(); i += 2; continue
+        if a == '--force':
+            out['force'] = True; i += 1; continue
+        if a == '--profile':
+            out['profile'] = True; i += 1; continue
+        if a == '--trace' and i + 1 < len(args):
+            out['trace'] = args[i + 1]; out['profile'] = True; i += 2; continue
+        if a == '--serve':
+            out['serve'] = True; i += 1; continue
+        if a == '--repeat' and i + 1 < len(args):
+            out['repeat'] = max(1, int(args[i + 1])); i += 2; continue
+        if a == '--memory-report':
+            out['memory_report'] = True; i += 1; continue
+        if a == '--max-tris' and i + 1 < len(args):
+            out['max_tris'] = int(args[i + 1]); i += 2; continue
+        if a == '--bake-normals' and i + 1 < len(args):
+            out['bake_normals'] = int(args[i + 1]); i += 2; continue
+        if a == '--impostors' and i + 1 < len(args):
+            out['impostors'] = int(args[i + 1]); i += 2; continue
+        if a == '--pack':
+            out['pack'] = True; i += 1; continue
+        if a in ('--port', '-p') and i + 1 < len(args):
+            out['port'] = int(args[i + 1]); i += 2; continue
         i += 1
     return out
 
 
-def main_with_options(seed=42, build_count=3, export_path=None, export_format='GLB', enable_ao=False, enable_lights=True, export_per_variant=True, size=HEX_RADIUS):
-    """Main generation entry with options. build_count <= 3 (we have 3 predefined variations).
+def main_with_options(seed=42, build_count=3, export_path=None, export_format='GLB', enable_ao=False, enable_lights=True, export_per_variant=True, size=HEX_RADIUS, export_writer='native', export_merge=False, instanced=False, variant_indices=None, resolution=None, seamless=False, biome='grass', export_palette=False, max_tris=None, bake_normals=None, impostors=None):
+    """Main generation entry with options. build_count <= the biome recipe's variation count (3 built in).
+
+    For more variants, biomes or sizes use the bpy-free batch driver
+    (`tile_batch.py`), which fans the work out over a process pool.
 
     New params:
     - enable_ao: toggle Eevee AO when running interactively
     - enable_lights: add the simple area light setup
     - export_per_variant: when export_path is a directory, export each variant separately
+    - export_writer: 'native' (direct GLB via tile_glb) or 'blender' (glTF add-on); the add-on
+      cannot honour export_merge or export_palette, so combining them raises ValueError before building
+    - export_merge: with the native writer, join each variant into one mesh with one primitive per material
+    - instanced: build rocks/tufts/trees as linked duplicates of shared prototypes and export them with EXT_mesh_gpu_instancing
+    - variant_indices: build only these variant indices (used by the incremental cache); default all
+    - resolution: rings of subdivision on the hex top (1 = flat 6-vertex top); None keeps the recipe's
+    - biome: recipe key from blenderpython/biomes/*.json (see tile_biomes.py)
+    - seamless: pin the displaced top's edges flat so any variant can sit next to any other
+    - export_palette: with the native writer, bake material colours into vertex colours on one shared material
+    - max_tris: triangle budget per tile; scatter and top are decimated to fit (None/0 = no budget)
+    - bake_normals: bake the full-resolution top into a normal map of this size on each ground material (None/0 = off)
+    - impostors: with per-variant export, also render each variant's impostor atlas with frames of this size (None/0 = off)
     """
+    if export_path:
+        check_writer_options(export_writer, merge=export_merge, palette=export_palette)
     random.seed(seed)
     col_name = 'GrasslandTiles'
     clear_collection(col_name)
-    top_col = bpy.data.collections.new(col_name)
+    top_col = track('collections', bpy.data.collections.new(col_name))
     bpy.context.scene.collection.children.link(top_col)
 
-    variations = [
-        {'tufts': 22, 'rocks': 2, 'tree_prob': 0.45, 'height_amp': 0.06},
-        {'tufts': 12, 'rocks': 5, 'rock_scale_mult': 1.6, 'tree_prob': 0.25, 'height_amp': 0.05},
-        {'tufts': 14, 'rocks': 3, 'tree_prob': 0.6, 'trunk_height': 0.2, 'crown_radius': 0.18, 'height_amp': 0.07},
-    ]
+    recipe = tile_biomes.RECIPES[biome]
+    variations = tile_biomes.recipe_variations(recipe)
+    materials = tile_biomes.recipe_materials(recipe)
 
     # clamp build_count
     build_count = max(1, min(build_count, len(variations)))
-    for i in range(build_count):
-        params = variations[i]
+    if variant_indices is None:
+        variant_indices = range(build_count)
+    # one prototype mesh pool for the whole run (instanced mode)
+    library = PrototypeLibrary(seed, materials) if instanced else None
+    for i in variant_indices:
+        params = dict(variations[i])
+        if resolution is not None:
+            params['resolution'] = resolution
+        if seamless:
+            params['seamless'] = True
         # per-tile material variation: apply distinct grass material
         # Temporarily patch global HEX_RADIUS if a custom size was passed (simple approach)
         # This keeps internal helpers that default to HEX_RADIUS consistent.
-        tile_obj = build_variation(i, top_col, seed_offset=100, params=params)
-        # replace first material (grass) with a per-tile variant
-        if tile_obj and tile_obj.data:
-            mat = get_grass_material_for_tile(i)
-            if tile_obj.data.materials:
-                tile_obj.data.materials[0] = mat
-            else:
-                tile_obj.data.materials.append(mat)
+        tile_obj = build_variation(i, top_col, seed_offset=100, params=params, seed=seed, instanced=instanced,
+                                   materials=materials, library=library, max_tris=max_tris)
+        apply_ground_material(tile_obj, i, params, materials, seed, 100)
+        if bake_normals:
+            print(tile_bake.format_stats(f'tile_{i}', bake_ground_normal_map(tile_obj, i, params, seed, 100,
+                                                                             bake_normals)))
 
     # camera layout (best-effort)
     try:
@@ -609,7 +1065,7 @@ def main_with_options(seed=42, build_count=3, export_path=None, export_format='G
     except Exception:
         pass
 
-    print(f'Generated {build_count} grassland tile variations in collection: {col_name}')
+    print(f'Generated {len(variant_indices)} {biome} tile variations in collection: {col_name}')
 
     # Apply lighting / viewport preferences when running inside Blender UI
     try:
@@ -649,13 +1105,16 @@ def main_with_options(seed=42, build_count=3, export_path=None, export_format='G
                     # If a filename was given but export_per_variant is True, use its directory or script dir
                     out_dir = os.path.dirname(export_path) or SCRIPT_DIR
                 os.makedirs(out_dir, exist_ok=True)
-                for i, child in enumerate(top_col.children):
-                    fname = f'grassland_v{i}.glb' if export_format.upper() in ('GLB', 'GLTF') else f'grassland_v{i}.obj'
+                for child in top_col.children:
+                    i = variant_index(child)
+                    fname = f'{biome}_v{i}.glb' if export_format.upper() in ('GLB', 'GLTF') else f'{biome}_v{i}.obj'
                     outp = os.path.join(out_dir, fname)
-                    export_collection(child, outp, fmt=export_format, isolated=True)
+                    export_collection(child, outp, fmt=export_format, isolated=True, writer=export_writer, merge=export_merge, instanced=instanced, palette=export_palette)
                     print('Exported variant', i, '->', outp)
+                    if impostors:
+                        export_impostor(child, outp, impostors, instanced)
             else:
-                export_collection(top_col, export_path, fmt=export_format, isolated=True)
+                export_collection(top_col, export_path, fmt=export_format, isolated=True, writer=export_writer, merge=export_merge, instanced=instanced, palette=export_palette)
                 print('Exported collection ->', export_path)
         except Exception as ex:
             print('Export failed:', ex)
@@ -665,7 +1124,10 @@ def setup_simple_lighting():
     """Add a simple 3-point-ish light setup (area lights) for thumbnails; idempotent."""
     # Remove existing helper lights created by this script
     for o in [o for o in bpy.data.objects if o.name.startswith('GW_Light_')]:
+        light = o.data
         bpy.data.objects.remove(o, do_unlink=True)
+        if light is not None and light.users == 0:
+            bpy.data.lights.remove(light)
     # Key
     bpy.ops.object.light_add(type='AREA', location=(1.5, -2.0, 2.0))
     key = bpy.context.active_object
@@ -695,13 +1157,73 @@ def enable_eevee_ao(enable=True):
         pass
 
 
+def variant_index(tile_col) -> int:
+    """Return the variant index of a `tile_<i>_col` collection."""
+    return int(tile_col.name.split('_')[1])
+
+
+def variant_cache_key(index: int, seed: int, fingerprint: str, biome='grass', **options) -> str:
+    """Content key of one variant: seed, recipe params/materials, hex dimensions, export options and script sources."""
+    recipe = tile_biomes.RECIPES[biome]
+    inputs = {
+        'biome': biome,
+        'variant': index,
+        'seed': seed,
+        'seed_offset': 100,
+        'params': tile_biomes.recipe_variations(recipe)[index],
+        'materials': tile_biomes.recipe_materials(recipe),
+        'radius': HEX_RADIUS,
+        'thickness': HEX_THICKNESS,
+    }
+    inputs.update(options)
+    return tile_cache.cache_key(inputs, fingerprint)
+
+
 def run_headless_from_args():
     opts = parse_args()
+    if opts.get('serve'):
+        worker = BlenderTileWorker(_resolve_export_path(opts.get('export_path')))
+        tile_server.serve(tile_server.Server(worker), opts.get('port'))
+        return
+    if opts.get('profile'):
+        prof.enable()
+        try:
+            _run_headless(opts)
+        finally:
+            print(prof.report())
+            if opts.get('trace'):
+                print('Trace ->', prof.write_chrome_trace(opts['trace']))
+    else:
+        _run_headless(opts)
+
+
+def _run_headless(opts):
     seed = opts.get('seed', SEED)
-    count = opts.get('build_count', 3)
+    biome = opts.get('biome', 'grass')
+    count = max(1, min(opts.get('build_count', 3), len(tile_biomes.RECIPES[biome]['variations'])))
     size = opts.get('size', HEX_RADIUS)
     export_path = _resolve_export_path(opts.get('export_path'))
     export_format = opts.get('export_format', 'GLB')
+    export_writer = opts.get('export_writer', 'native')
+    export_merge = opts.get('merge', False)
+    instanced = opts.get('instanced', False)
+    resolution = opts.get('resolution')
+    seamless = opts.get('seamless', False)
+    palette = opts.get('palette', False)
+    max_tris = opts.get('max_tris')
+    bake_normals = opts.get('bake_normals')
+    impostors = opts.get('impostors')
+    if bake_normals and palette:
+        print('--bake-normals and --palette cannot be combined (palette tiles share one material)')
+        return
+    glb_opts = dict(quantize=opts.get('quantize', False), compress=opts.get('compress'),
+                    optimize=opts.get('optimize', False))
+    if export_path:
+        try:
+            check_writer_options(export_writer, merge=export_merge, palette=palette, **glb_opts)
+        except ValueError as ex:
+            print(f'--writer {export_writer}: {ex}')
+            return
 
     # If export_path is a directory, we'll export per-variant files into it
     export_dir_mode = False
@@ -711,8 +1233,51 @@ def run_headless_from_args():
         if not os.path.exists(out_dir):
             os.makedirs(out_dir, exist_ok=True)
 
+    # Incremental cache: skip variants whose inputs (and script sources) are unchanged
+    cache, keys, outputs = None, {}, {}
+    if export_path:
+        cache = tile_cache.BuildCache(out_dir if export_dir_mode else (os.path.dirname(export_path) or SCRIPT_DIR))
+        if opts.get('force'):
+            cache.entries.clear()
+        fingerprint = tile_cache.source_fingerprint(tile_cache.CORE_SOURCES + (os.path.basename(__file__),))
+        export_opts = dict(format=export_format.upper(), writer=export_writer, merge=export_merge, instanced=instanced,
+                           resolution=resolution, seamless=seamless, palette=palette, max_tris=max_tris, bake_normals=bake_normals,
+                           impostors=impostors, **glb_opts)
+        for i in range(count):
+            keys[i] = variant_cache_key(i, seed, fingerprint, biome, **export_opts)
+            fname = f'{biome}_v{i}.glb' if export_format.upper() in ('GLB', 'GLTF') else f'{biome}_v{i}.obj'
+            outputs[i] = os.path.join(out_dir, fname) if export_dir_mode else export_path
+        if not export_dir_mode:
+            # single file: one key over every variant it contains
+            keys = {0: tile_cache.cache_key({'variants': [keys[i] for i in range(count)]}, fingerprint)}
+            outputs = {0: export_path}
+        stale = [i for i in keys if not cache.is_fresh(keys[i], outputs[i])]
+        if not stale:
+            print(f'All {count} variants up to date (cache: {cache.path}); nothing to build.')
+            if opts.get('pack') and export_dir_mode:
+                write_pack(out_dir)
+            return
+        variant_indices = stale if export_dir_mode else None
+    else:
+        variant_indices = None
+
     # Pass size forward (currently used for validation hooks if extended later)
-    main_with_options(seed=seed, build_count=count, export_path=None, export_format=export_format, size=size)
+    # --repeat regenerates in place (each run clears the previous one) to check memory stays flat
+    repeat = opts.get('repeat', 1)
+    if opts.get('memory_report'):
+        before = memory_report()
+        print('Memory before:', format_memory(before))
+    for _ in range(repeat):
+        with prof.span('generate'):
+            main_with_options(seed=seed, build_count=count, export_path=None, export_format=export_format,
+                              size=size, instanced=instanced, variant_indices=variant_indices,
+                              resolution=resolution, seamless=seamless, biome=biome, max_tris=max_tris,
+                              bake_normals=bake_normals)
+    if opts.get('memory_report'):
+        after = memory_report()
+        growth = {key: after[key] - before[key] for key in after if after[key] is not None and before[key] is not None}
+        print(f'Memory after {repeat} generation(s):', format_memory(after))
+        print('Growth:', format_memory(growth))
 
     top_col = bpy.data.collections.get('GrasslandTiles')
     if not top_col:
@@ -721,15 +1286,130 @@ def run_headless_from_args():
 
     if export_path:
         if export_dir_mode:
-            # export each variant as separate file
-            for i, child in enumerate(top_col.children):
-                fname = f'grass_v{i}.glb' if export_format.upper() in ('GLB','GLTF') else f'grass_v{i}.obj'
-                outp = os.path.join(out_dir, fname)
-                export_collection(child, outp, fmt=export_format)
-                print('Exported variant', i, '->', outp)
+            # export each (rebuilt) variant as separate file
+            for child in top_col.children:
+                i = variant_index(child)
+                outp = outputs[i]
+                with prof.span('export'):
+                    size = export_collection(child, outp, fmt=export_format, writer=export_writer, merge=export_merge, instanced=instanced, palette=palette, **glb_opts)
+                if impostors:
+                    export_impostor(child, outp, impostors, instanced)
+                cache.record(keys[i], outp, variant=i)
+                print('Exported variant', i, '->', outp, f'({size} bytes)' if size else '')
+            skipped = count - len(top_col.children)
+            if skipped:
+                print(f'Skipped {skipped} up-to-date variant(s)')
         else:
-            export_collection(top_col, export_path, fmt=export_format)
+            with prof.span('export'):
+                export_collection(top_col, export_path, fmt=export_format, writer=export_writer, merge=export_merge, instanced=instanced, palette=palette, **glb_opts)
+            cache.record(keys[0], export_path, variants=count)
             print('Exported collection ->', export_path)
+            if impostors:
+                print('--impostors renders one atlas per variant; export to a directory to get them')
+        cache.save()
+        if opts.get('pack'):
+            if export_dir_mode:
+                write_pack(out_dir)
+            else:
+                print('--pack packs an export directory; export to a directory to get tiles.pack')
+
+
+def write_pack(out_dir):
+    """Rewrite `<out_dir>/tiles.pack` from every variant GLB in the directory (see tile_pack.py)."""
+    try:
+        path, index = tile_pack.pack_directory(out_dir)
+    except (OSError, ValueError) as ex:
+        print('Pack failed:', ex)
+        return
+    print(f"Packed {len(index['entries'])} GLBs ({os.path.getsize(path)} bytes) -> {path}")
+
+
+class BlenderTileWorker:
+    """`tile_server` worker that builds each job in this Blender session.
+
+    Jobs are built with `build_variation` into one scratch collection and
+    written with the native exporter. Materials are reused by name and the
+    instanced scatter prototypes live in one `PrototypeLibrary` per
+    (seed, biome), so they are created once and shared by every later job;
+    the previous job's objects and meshes are removed before the next one.
+    Every job re-applies its recipe's material specs, so a reused material
+    (prototype meshes included) never keeps a previous job's or recipe's
+    colours. The module-level HEX_RADIUS is set to the job's size only
+    while the job runs.
+    """
+
+    COLLECTION = 'TileServer'
+
+    def __init__(self, out_dir=None, recipe_dirs=()):
+        self.out_dir = out_dir
+        self.recipe_dirs = tuple(recipe_dirs)
+        self.recipes = tile_biomes.load_recipes(tile_biomes.RECIPES_DIR, *self.recipe_dirs)
+        self.libraries = {}
+        clear_collection(self.COLLECTION)
+        self.col = track('collections', bpy.data.collections.new(self.COLLECTION))
+        bpy.context.scene.collection.children.link(self.col)
+
+    def reload(self):
+        """Re-read recipes; prototype meshes are rebuilt since recipe materials may have changed."""
+        self.recipes = tile_biomes.load_recipes(tile_biomes.RECIPES_DIR, *self.recipe_dirs)
+        self.libraries.clear()
+        self.clear()
+        return {'biomes': list(self.recipes)}
+
+    def clear(self):
+        """Remove the previous job's tile collections, objects and meshes (prototype meshes stay)."""
+        for tile_col in list(self.col.children):
+            remove_collection_tree(tile_col)
+        keep = {mesh.name for library in self.libraries.values() for mesh in library.meshes.values()}
+        # materials are reused by name, so they stay warm too
+        purge_orphans(('meshes', 'collections'), keep)
+
+    def stats(self):
+        return memory_report()
+
+    def build(self, request):
+        global HEX_RADIUS
+        job = tile_server.job_from_request(request, self.recipes, self.out_dir)
+        if job['compress']:
+            tile_glb.compressor_path(job['compress'])
+        self.clear()
+        refresh_materials(job['materials'])
+        radius = HEX_RADIUS
+        HEX_RADIUS = job['size']
+        try:
+            return self._build(job)
+        finally:
+            HEX_RADIUS = radius
+
+    def _build(self, job):
+        random.seed(job['seed'])
+        library = None
+        if job['instanced']:
+            key = (job['seed'], job['biome'])
+            library = self.libraries.get(key)
+            if library is None:
+                library = self.libraries[key] = PrototypeLibrary(job['seed'], job['materials'])
+        tile_obj = build_variation(job['variant'], self.col, seed_offset=job['seed_offset'], params=job['params'],
+                                   seed=job['seed'], instanced=job['instanced'], materials=job['materials'],
+                                   library=library, max_tris=job['max_tris'])
+        apply_ground_material(tile_obj, job['variant'], job['params'], job['materials'], job['seed'],
+                              job['seed_offset'])
+        bake = None
+        if job['bake_normals']:
+            bake = bake_ground_normal_map(tile_obj, job['variant'], job['params'], job['seed'], job['seed_offset'],
+                                          job['bake_normals'])
+        tile_col = self.col.children[0]
+        os.makedirs(os.path.dirname(job['output']), exist_ok=True)
+        size = export_collection(tile_col, job['output'], writer='native', merge=job['merge'],
+                                 instanced=job['instanced'], palette=job['palette'], quantize=job['quantize'],
+                                 compress=job['compress'], optimize=job['optimize'])
+        result = {'output': job['output'], 'bytes': size, 'objects': len(tile_col.objects)}
+        if bake:
+            result['deviation'] = bake['deviation']
+        if job['impostors']:
+            info = export_impostor(tile_col, job['output'], job['impostors'], job['instanced'])
+            result['impostor'] = os.path.join(os.path.dirname(job['output']), info['index'])
+        return result
 
 
 ### Blender Operator + Panel (for in-Blender UI) ---------------------------
@@ -744,11 +1424,27 @@ class GW_OT_generate_grassland(bpy.types.Operator):
     export_format: bpy.props.EnumProperty(name='Format', items=[('GLB','GLB',''),('OBJ','OBJ','')], default='GLB')
     export_path: bpy.props.StringProperty(name='Export Path', default='')
     export_dir_per_variant: bpy.props.BoolProperty(name='Export per-variant', default=True)
+    export_writer: bpy.props.EnumProperty(name='Writer', items=[('native','Native GLB','Direct GLB writer (fast)'),('blender','glTF Add-on','Blender glTF exporter')], default='native')
+    export_merge: bpy.props.BoolProperty(name='Merge by material', default=False)
+    instanced: bpy.props.BoolProperty(name='Instanced scatter', default=False)
+    export_palette: bpy.props.BoolProperty(name='Palette (vertex colours)', description='One shared material; colours baked into COLOR_0', default=False)
+    resolution: bpy.props.IntProperty(name='Top resolution', description='0 = biome recipe default', default=0, min=0, max=64)
+    biome: bpy.props.EnumProperty(name='Biome', items=[(k, k, '') for k in tile_biomes.RECIPES], default='grass')
+    seamless: bpy.props.BoolProperty(name='Seamless edges', default=False)
+    max_tris: bpy.props.IntProperty(name='Triangle budget', description='Max triangles per tile, 0 = no budget', default=0, min=0, max=100000)
+    bake_normals: bpy.props.IntProperty(name='Normal map size', description='Bake the detailed top into a normal map of this size, 0 = off', default=0, min=0, max=4096)
+    impostors: bpy.props.IntProperty(name='Impostor frame', description='Render an impostor atlas per exported variant with frames of this size, 0 = off', default=0, min=0, max=1024)
     enable_ao: bpy.props.BoolProperty(name='Enable AO', default=False)
     enable_lights: bpy.props.BoolProperty(name='Add light setup', default=True)
 
     def execute(self, context):
-        main_with_options(seed=self.seed, build_count=self.build_count, export_path=self.export_path if self.export else None, export_format=self.export_format, export_per_variant=self.export_dir_per_variant, enable_ao=self.enable_ao, enable_lights=self.enable_lights)
+        if self.export:
+            try:
+                check_writer_options(self.export_writer, merge=self.export_merge, palette=self.export_palette)
+            except ValueError as ex:
+                self.report({'ERROR'}, str(ex))
+                return {'CANCELLED'}
+        main_with_options(seed=self.seed, build_count=self.build_count, export_path=self.export_path if self.export else None, export_format=self.export_format, export_per_variant=self.export_dir_per_variant, export_writer=self.export_writer, export_merge=self.export_merge, instanced=self.instanced, export_palette=self.export_palette, resolution=self.resolution or None, seamless=self.seamless, biome=self.biome, enable_ao=self.enable_ao, enable_lights=self.enable_lights, max_tris=self.max_tris or None, bake_normals=self.bake_normals or None, impostors=self.impostors or None)
         return {'FINISHED'}
 
 
@@ -774,6 +1470,16 @@ class GW_PT_grassland_panel(bpy.types.Panel):
         layout.prop(props, 'export_format')
         layout.prop(props, 'export_path')
         layout.prop(props, 'export_dir_per_variant')
+        layout.prop(props, 'export_writer')
+        layout.prop(props, 'export_merge')
+        layout.prop(props, 'instanced')
+        layout.prop(props, 'export_palette')
+        layout.prop(props, 'biome')
+        layout.prop(props, 'resolution')
+        layout.prop(props, 'seamless')
+        layout.prop(props, 'max_tris')
+        layout.prop(props, 'bake_normals')
+        layout.prop(props, 'impostors')
         layout.operator(GW_OT_generate_grassland.bl_idname)
 
 
@@ -784,6 +1490,16 @@ class GWProps(bpy.types.PropertyGroup):
     export_format: bpy.props.EnumProperty(name='Format', items=[('GLB','GLB',''),('OBJ','OBJ','')], default='GLB')
     export_path: bpy.props.StringProperty(name='Export Path', default='')
     export_dir_per_variant: bpy.props.BoolProperty(name='Export per-variant', default=True)
+    export_writer: bpy.props.EnumProperty(name='Writer', items=[('native','Native GLB','Direct GLB writer (fast)'),('blender','glTF Add-on','Blender glTF exporter')], default='native')
+    export_merge: bpy.props.BoolProperty(name='Merge by material', default=False)
+    instanced: bpy.props.BoolProperty(name='Instanced scatter', default=False)
+    export_palette: bpy.props.BoolProperty(name='Palette (vertex colours)', description='One shared material; colours baked into COLOR_0', default=False)
+    resolution: bpy.props.IntProperty(name='Top resolution', description='0 = biome recipe default', default=0, min=0, max=64)
+    biome: bpy.props.EnumProperty(name='Biome', items=[(k, k, '') for k in tile_biomes.RECIPES], default='grass')
+    seamless: bpy.props.BoolProperty(name='Seamless edges', default=False)
+    max_tris: bpy.props.IntProperty(name='Triangle budget', description='Max triangles per tile, 0 = no budget', default=0, min=0, max=100000)
+    bake_normals: bpy.props.IntProperty(name='Normal map size', description='Bake the detailed top into a normal map of this size, 0 = off', default=0, min=0, max=4096)
+    impostors: bpy.props.IntProperty(name='Impostor frame', description='Render an impostor atlas per exported variant with frames of this size, 0 = off', default=0, min=0, max=1024)
     enable_ao: bpy.props.BoolProperty(name='Enable AO', default=False)
     enable_lights: bpy.props.BoolProperty(name='Add light setup', default=True)
 
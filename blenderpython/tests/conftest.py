@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tile modules import each other as top-level modules (see SCRIPT_DIR in each script).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+import tile_bake
+import tile_geometry as geo
+
+
+def flat_top(resolution=3):
+    """Just the top of an undisplaced hex, so every vertex normal is +Z."""
+    xy, tris = geo.build_hex_grid(resolution=resolution)
+    pos = np.column_stack([xy, np.full(len(xy), geo.HEX_THICKNESS / 2)])
+    return geo.MeshData(pos, tris, geo.planar_uvs(pos))
+
+
+@pytest.mark.parametrize('size', [16, 64])
+def test_flat_heightfield_bakes_to_the_flat_normal(size):
+    plan = geo.plan_surface(0, {'height_amp': 0.0})
+
+    pixels, stats = tile_bake.bake_normal_map(plan, flat_top(), size)
+
+    assert pixels.shape == (size, size, 3)
+    assert (pixels == tile_bake.FLAT).all()
+    assert stats['deviation'] == 0.0
+    # the hex covers 3 * sqrt(3) / 8 of its bounding square
+    assert stats['coverage'] == pytest.approx(3 * np.sqrt(3) / 8, abs=0.05)
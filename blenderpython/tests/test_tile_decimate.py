@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import tile_decimate as dec
+import tile_geometry as geo
+
+
+def tile(seamless=False):
+    params = dict(geo.GRASSLAND_VARIATIONS[0], resolution=8, seamless=seamless)
+    return geo.build_tile_parts(0, params, seed_offset=0)
+
+
+@pytest.mark.parametrize('budget', [600, 300, 150])
+def test_fit_budget_meets_the_budget_and_reports_its_error(budget):
+    parts = tile()
+    before = dec.triangle_count(parts)
+
+    new, _, stats = dec.fit_budget(parts, max_tris=budget)
+
+    assert stats['triangles'] == (before, dec.triangle_count(new))
+    assert stats['triangles'][1] <= budget
+    # the reported error is the largest distance from an original vertex to the decimated surface
+    measured = max(float(dec.point_surface_distance(old.mesh.positions, part.mesh).max())
+                   for old, part in zip(parts, new))
+    assert stats['error'] == pytest.approx(measured, abs=1e-6)
+    assert 0.0 < stats['error'] < 0.05
+
+
+def test_fit_budget_leaves_tiles_within_budget_alone():
+    parts = tile()
+
+    new, _, stats = dec.fit_budget(parts, max_tris=dec.triangle_count(parts))
+
+    assert new is parts
+    assert stats['error'] == 0.0
+
+
+@pytest.mark.parametrize('budget', [300, 150])
+def test_seamless_tiles_keep_their_top_rim(budget):
+    ground = tile(seamless=True)[0].mesh
+    rim = ground.positions[dec.rim_vertices(ground)]
+    assert len(rim) == 6 * 8
+
+    new, _, stats = dec.fit_budget(tile(seamless=True), max_tris=budget, seamless=True)
+
+    assert stats['triangles'][1] <= budget
+    kept = {tuple(p) for p in new[0].mesh.positions.tolist()}
+    assert all(tuple(p) in kept for p in rim.tolist())
@@ -0,0 +1,107 @@
+import random
+
+import numpy as np
+import pytest
+
+import tile_geometry as geo
+
+
+def directed_edges(indices):
+    tris = np.asarray(indices)
+    return np.concatenate([tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]])
+
+
+@pytest.mark.parametrize('resolution', [1, 2, 5])
+def test_base_hex_is_a_closed_outward_prism(resolution):
+    mesh = geo.build_base_hex(resolution=resolution)
+
+    # every edge is used once in each direction: watertight and consistently wound
+    edges = [tuple(e) for e in directed_edges(mesh.indices)]
+    assert len(set(edges)) == len(edges)
+    assert all((b, a) in set(edges) for a, b in edges)
+
+    # outward winding gives a positive signed volume equal to the prism's
+    v = mesh.positions.astype(np.float64)[mesh.indices]
+    volume = np.einsum('ij,ij->i', v[:, 0], np.cross(v[:, 1], v[:, 2])).sum() / 6.0
+    area = 1.5 * np.sqrt(3.0) * geo.HEX_RADIUS ** 2
+    assert volume == pytest.approx(area * geo.HEX_THICKNESS, rel=1e-5)
+
+
+@pytest.mark.parametrize('resolution', [1, 3, 8])
+def test_hex_grid_counts(resolution):
+    xy, tris = geo.build_hex_grid(resolution=resolution)
+
+    assert len(xy) == 1 + 3 * resolution * (resolution + 1)
+    assert len(tris) == 6 * resolution ** 2
+    assert (geo.hex_edge_distance(xy[:, 0], xy[:, 1]) >= -1e-9).all()
+
+
+def test_tile_parts_are_deterministic():
+    params = dict(geo.GRASSLAND_VARIATIONS[1], resolution=3)
+
+    first = geo.build_tile_parts(1, params, seed_offset=100)
+    second = geo.build_tile_parts(1, params, seed_offset=100)
+
+    assert [p.name for p in first] == [p.name for p in second]
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a.mesh.positions, b.mesh.positions)
+        np.testing.assert_array_equal(a.mesh.indices, b.mesh.indices)
+
+
+def test_poisson_disk_keeps_class_spacing_inside_the_hex():
+    classes = [
+        {'kind': 'rock', 'min_dist': 0.12, 'margin': 0.03},
+        {'kind': 'tuft', 'min_dist': 0.05, 'extent': 0.8},
+    ]
+    points = geo.poisson_disk_hex(classes=classes, rng=random.Random(7))
+    apothem = geo.HEX_RADIUS * np.sqrt(3.0) / 2.0
+
+    rocks, tufts = np.asarray(points['rock']), np.asarray(points['tuft'])
+    assert len(rocks) > 5 and len(tufts) > 20
+
+    def min_distance(a, b):
+        d = np.linalg.norm(a[:, None, :] - b[None, :, :], axis=2)
+        if a is b:
+            d[np.diag_indices(len(a))] = np.inf
+        return d.min()
+
+    assert min_distance(rocks, rocks) >= 0.12
+    assert min_distance(tufts, tufts) >= 0.05
+    assert min_distance(rocks, tufts) >= (0.12 + 0.05) / 2
+    assert (geo.hex_edge_distance(rocks[:, 0], rocks[:, 1]) >= 0.03 - 1e-9).all()
+    assert (geo.hex_edge_distance(tufts[:, 0], tufts[:, 1]) >= apothem * 0.2 - 1e-9).all()
+
+
+def test_poisson_disk_count_is_an_upper_bound():
+    classes = [{'kind': 'tuft', 'min_dist': 0.05, 'count': 10}]
+    points = geo.poisson_disk_hex(classes=classes, rng=random.Random(3))
+
+    assert len(points['tuft']) == 10
+
+
+class CountingRandom(random.Random):
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.calls = 0
+
+    def random(self):
+        self.calls += 1
+        return super().random()
+
+
+def test_counted_poisson_classes_stop_once_placed():
+    # growing the maximal set first cost thousands of candidates per tile (~200x slower plans)
+    classes = [
+        {'kind': 'rock', 'min_dist': 0.12, 'extent': 0.7, 'margin': 0.02, 'count': 3},
+        {'kind': 'tuft', 'min_dist': 0.06, 'extent': 0.92, 'margin': 0.02, 'count': 22},
+    ]
+    rng = CountingRandom(5)
+    points = geo.poisson_disk_hex(classes=classes, rng=rng)
+
+    assert [len(points['rock']), len(points['tuft'])] == [3, 22]
+    # three draws per dart; a few darts per placed point
+    assert rng.calls < 3 * 6 * 25
+    tufts = np.asarray(points['tuft'])
+    # spread over the hex rather than clustered: every sextant gets some
+    sextants = ((np.degrees(np.arctan2(tufts[:, 1], tufts[:, 0])) + 360.0) // 60.0).astype(int) % 6
+    assert len(set(sextants.tolist())) == 6
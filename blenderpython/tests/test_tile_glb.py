@@ -0,0 +1,63 @@
+import subprocess
+
+import numpy as np
+import pytest
+
+import tile_geometry as geo
+import tile_glb
+
+UNSIGNED_SHORT = 5123
+FLOAT = 5126
+
+
+def uv_accessors(builder):
+    gltf = builder.gltf
+    return [gltf['accessors'][prim['attributes']['TEXCOORD_0']]
+            for mesh in gltf['meshes'] for prim in mesh['primitives']]
+
+
+def test_every_primitive_has_uvs():
+    parts = geo.build_tile_parts(0, dict(geo.GRASSLAND_VARIATIONS[0], resolution=2))
+
+    builder = tile_glb.build_tile_glb(parts)
+
+    assert len(uv_accessors(builder)) == len(parts)
+
+
+def test_quantized_uv_encoding_is_chosen_per_file():
+    inside = geo.TilePart('ground', geo.build_base_hex(), 'Grass_Mat')
+    rock = geo.build_rock()
+    outside = geo.TilePart('rock', geo.MeshData(rock.positions, rock.indices,
+                                                uvs=np.full((rock.vertex_count, 2), 1.5)), 'Rock_Mat')
+
+    mixed = uv_accessors(tile_glb.build_tile_glb([inside, outside], quantize=True))
+    unit = uv_accessors(tile_glb.build_tile_glb([inside], quantize=True))
+
+    assert {a['componentType'] for a in mixed} == {FLOAT}
+    assert [(a['componentType'], a.get('normalized')) for a in unit] == [(UNSIGNED_SHORT, True)]
+
+
+def test_palette_exports_have_no_uvs():
+    parts = geo.build_tile_parts(0, dict(geo.GRASSLAND_VARIATIONS[0], resolution=2))
+
+    builder = tile_glb.build_tile_glb(parts, palette=True, merge=True)
+
+    prims = [prim for mesh in builder.gltf['meshes'] for prim in mesh['primitives']]
+    assert prims and all('TEXCOORD_0' not in prim['attributes'] for prim in prims)
+
+
+def test_compressor_failures_carry_its_error_output(tmp_path, monkeypatch):
+    path = tmp_path / 'grass_v0.glb'
+    path.write_bytes(b'original')
+
+    def failing_run(cmd, **kwargs):
+        open(cmd[cmd.index('-o') + 1], 'wb').close()
+        raise subprocess.CalledProcessError(1, cmd, stderr=b'Error loading grass_v0.glb: invalid GLB\n')
+
+    monkeypatch.setattr(tile_glb, 'compressor_path', lambda method: '/usr/bin/gltfpack')
+    monkeypatch.setattr(tile_glb.subprocess, 'run', failing_run)
+
+    with pytest.raises(RuntimeError, match='gltfpack failed .*exit 1.*: Error loading grass_v0.glb: invalid GLB$'):
+        tile_glb.compress_glb(str(path))
+    assert path.read_bytes() == b'original'
+    assert [p.name for p in tmp_path.iterdir()] == ['grass_v0.glb']
@@ -0,0 +1,58 @@
+import numpy as np
+
+import tile_geometry as geo
+import tile_impostor
+
+RED, BLUE = (1.0, 0.0, 0.0), (0.0, 0.0, 1.0)
+
+
+def flat_triangle(height, scale, color):
+    """A horizontal glTF-frame triangle around the Y axis at `height`, facing up."""
+    positions = np.array([[-1.0, height, 1.0], [1.0, height, 1.0], [0.0, height, -1.0]]) * [scale, 1.0, scale]
+    normals = np.tile([0.0, 1.0, 0.0], (3, 1))
+    return positions, normals, color
+
+
+def scene(*triangles):
+    positions, normals, colors = zip(*triangles)
+    return np.stack(positions), np.stack(normals), np.asarray(colors)
+
+
+def test_overlapping_triangles_keep_the_nearer_one():
+    near, far = flat_triangle(0.5, 0.4, BLUE), flat_triangle(0.0, 1.0, RED)
+    center, frame = np.array([0.0, 0.25, 0.0]), 16
+
+    for triangles in (scene(near, far), scene(far, near)):
+        albedo, alpha, _, depth = tile_impostor.render_view(triangles, center, 1.5, 0.0, 90.0, frame, supersample=1)
+
+        # (row, column): top-down, columns follow +X and rows +Z; `edge` is on the far triangle only
+        middle, edge = (8, 8), (11, 10)
+        np.testing.assert_allclose(albedo[middle], BLUE)
+        np.testing.assert_allclose(albedo[edge], RED)
+        assert alpha[middle] == alpha[edge] == 1.0
+        # the top-down camera looks along -Y: the raised triangle is nearer
+        assert depth[middle] < depth[edge]
+
+
+def test_atlas_grid_size_and_rects_agree():
+    params = dict(geo.GRASSLAND_VARIATIONS[0], resolution=2)
+    parts = geo.build_tile_parts(0, params)
+    frame = 16
+
+    color, normal_depth, index = tile_impostor.build_atlas(parts, frame=frame)
+
+    cols, rows = index['grid']
+    assert cols * rows >= len(tile_impostor.DEFAULT_VIEWS) == len(index['views'])
+    assert index['size'] == [cols * frame, rows * frame]
+    assert color.shape == normal_depth.shape == (rows * frame, cols * frame, 4)
+    cells = set()
+    for view in index['views']:
+        x, y, w, h = view['rect']
+        assert (w, h) == (frame, frame)
+        assert x % frame == 0 and y % frame == 0 and x + w <= index['size'][0] and y + h <= index['size'][1]
+        cells.add((x, y))
+        # the tile fills the middle of every frame, and nothing covers the frame corners
+        alpha = color[y:y + h, x:x + w, 3]
+        assert alpha[h // 2, w // 2] > 0
+        assert alpha[0, 0] == 0
+    assert len(cells) == len(index['views'])
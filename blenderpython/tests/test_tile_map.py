@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pytest
+
+import tile_glb
+import tile_map
+
+COORDS = [(0, 0), (1, 0), (0, 1), (5, -3), (-1, -1), (-7, 4), (-40, -40), (39, -12), (12345, -6789),
+          (-100000, 250000)]
+
+
+# Expected values from `variantIndexFor` in src/scene/scene.tsx, run under node.
+@pytest.mark.parametrize('count, expected', [
+    (3, [0, 1, 2, 0, 0, 2, 1, 2, 2, 1]),
+    (4, [0, 2, 3, 0, 0, 2, 1, 3, 3, 1]),
+    (7, [0, 3, 5, 1, 1, 4, 2, 6, 6, 3]),
+])
+def test_variant_index_matches_the_scene_hash(count, expected):
+    assert [tile_map.variant_index_for(q, r, count) for q, r in COORDS] == expected
+
+
+def test_variant_index_of_a_single_variant_is_zero():
+    assert tile_map.variant_index_for(-3, 8, 1) == 0
+    assert tile_map.variant_index_for(-3, 8, 0) == 0
+
+
+@pytest.mark.parametrize('data', [
+    {'map': {'tiles': [{'coord': {'q': 0, 'r': -1}, 'biome': 'grass', 'elevation': 0.4},
+                       {'coord': {'q': -2, 'r': 3}, 'biome': 'grassland'}]}},
+    {'contentExt': {'tiles': {'0,-1': {'q': 0, 'r': -1, 'biome': 'grass', 'elevation': 0.4},
+                              '-2,3': {'q': -2, 'r': 3, 'biome': 'grassland'}}}},
+    [{'q': 0, 'r': -1, 'biome': 'grass', 'elevation': 0.4}, {'q': -2, 'r': 3, 'biome': 'grassland'}],
+])
+def test_load_map_tiles_reads_every_documented_shape(data, tmp_path):
+    expected = [{'q': 0, 'r': -1, 'biome': 'grass', 'elevation': 0.4},
+                {'q': -2, 'r': 3, 'biome': 'grass', 'elevation': 0.5}]
+    path = tmp_path / 'map.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+    assert tile_map.load_map_tiles(data) == expected
+    assert tile_map.load_map_tiles(str(path)) == expected
+
+
+def test_load_map_tiles_applies_content_aliases():
+    tiles = tile_map.load_map_tiles([{'q': 0, 'r': 0, 'biome': 'snow'}, {'q': 1, 'r': 0, 'biome': 'swamp'}])
+    assert [t['biome'] for t in tiles] == ['ice', 'swamp']
+
+    custom = tile_map.load_map_tiles([{'q': 0, 'r': 0, 'biome': 'grassland'}], aliases={'grassland': 'plains'})
+    assert custom[0]['biome'] == 'plains'
+
+
+def test_load_map_tiles_rejects_maps_without_tiles():
+    with pytest.raises(ValueError, match='no tiles'):
+        tile_map.load_map_tiles({'units': []})
+
+
+def test_chunks_floor_negative_coordinates():
+    assert tile_map.chunk_of(0, 0, (4, 4)) == (0, 0)
+    assert tile_map.chunk_of(-1, -1, (4, 4)) == (-1, -1)
+    assert tile_map.chunk_of(-4, 3, (4, 4)) == (-1, 0)
+    assert tile_map.chunk_of(-5, -8, (4, 4)) == (-2, -2)
+
+    tiles = [{'q': q, 'r': r} for q, r in [(1, -1), (-1, -1), (0, 0), (-2, -1), (3, 0)]]
+    chunks = tile_map.group_chunks(tiles, (2, 2))
+
+    assert {key: [(t['q'], t['r']) for t in members] for key, members in chunks.items()} == {
+        (-1, -1): [(-2, -1), (-1, -1)],
+        (0, -1): [(1, -1)],
+        (0, 0): [(0, 0)],
+        (1, 0): [(3, 0)],
+    }
+
+
+def test_run_chunk_writes_a_glb_with_its_origin_in_gltf_space(tmp_path):
+    tiles = tile_map.load_map_tiles([{'q': -2, 'r': -2, 'biome': 'grassland', 'elevation': 0.3},
+                                     {'q': -1, 'r': -2, 'biome': 'desert'},
+                                     {'q': -2, 'r': -1, 'biome': 'swamp'}])
+    [spec] = tile_map.make_chunk_specs(tiles, str(tmp_path), chunk=(2, 2), resolution=2)
+    assert (spec['cq'], spec['cr']) == (-1, -1)
+    assert sorted(spec['recipes']) == ['desert', 'grass']
+
+    entry = tile_map.run_chunk(spec)
+
+    # center of the chunk's axial block, placed like axialToWorld in src/scene/utils/coords.ts
+    q, r, size = -1.5, -1.5, spec['size']
+    expected = [size * np.sqrt(3.0) * (q + r / 2.0), 0.0, size * 1.5 * r]
+    assert entry['origin'] == pytest.approx(expected)
+    assert entry['tiles'] == 3 and entry['triangles'] > 0
+    with open(entry['output'], 'rb') as fh:
+        gltf, _ = tile_glb.read_glb(fh.read())
+    assert gltf['nodes'][0]['translation'] == pytest.approx(expected)
@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+
+import tile_geometry as geo
+import tile_optimize
+
+
+def canonical(tris):
+    """Triangles rotated to start at their smallest index (winding kept), sorted."""
+    tris = np.asarray(tris).reshape(-1, 3)
+    shift = tris.argmin(axis=1)
+    rolled = np.stack([np.roll(t, -s) for t, s in zip(tris, shift)])
+    return rolled[np.lexsort(rolled.T[::-1])]
+
+
+def shuffled_grid(resolution=8, seed=1):
+    mesh = geo.build_base_hex(resolution=resolution)
+    order = np.random.default_rng(seed).permutation(mesh.triangle_count)
+    return geo.MeshData(mesh.positions, mesh.indices[order], mesh.uvs)
+
+
+def test_vertex_cache_order_is_a_permutation_of_the_triangles():
+    mesh = shuffled_grid()
+
+    tris = tile_optimize.optimize_vertex_cache(mesh.indices, mesh.vertex_count)
+
+    np.testing.assert_array_equal(canonical(tris), canonical(mesh.indices))
+
+
+def test_vertex_cache_order_does_not_worsen_acmr():
+    mesh = shuffled_grid()
+    before = tile_optimize.cache_stats(mesh.indices, mesh.vertex_count)['acmr']
+
+    tris = tile_optimize.optimize_vertex_cache(mesh.indices, mesh.vertex_count)
+    after = tile_optimize.cache_stats(tris, mesh.vertex_count)['acmr']
+
+    assert after <= before
+    assert after < 1.0
+
+
+def test_vertex_cache_order_stays_linear_on_disjoint_triangles():
+    # every triangle empties the cache; a linear scan per restart took ~60 s for 32k triangles
+    small, large = np.arange(3 * 2000).reshape(-1, 3), np.arange(3 * 16000).reshape(-1, 3)
+
+    start = time.perf_counter()
+    tile_optimize.optimize_vertex_cache(small, len(small) * 3)
+    middle = time.perf_counter()
+    tris = tile_optimize.optimize_vertex_cache(large, len(large) * 3)
+    end = time.perf_counter()
+
+    np.testing.assert_array_equal(canonical(tris), canonical(large))
+    # 8x the triangles; quadratic would be ~64x
+    assert end - middle < 20 * (middle - start) + 0.5
+
+
+def surface(mesh):
+    """Triangle corner positions, each triangle rotated to start at its smallest corner, sorted."""
+    corners = np.round(mesh.positions[mesh.indices].astype(np.float64), 6)
+    rows = []
+    for tri in corners:
+        first = min(range(3), key=lambda k: tuple(tri[k]))
+        rows.append(np.roll(tri, -first, axis=0).ravel())
+    rows = np.asarray(rows)
+    return rows[np.lexsort(rows.T[::-1])]
+
+
+def test_optimize_mesh_keeps_the_surface():
+    mesh = shuffled_grid()
+
+    optimized, _, stats = tile_optimize.optimize_mesh(mesh)
+
+    assert stats['acmr'][1] <= stats['acmr'][0]
+    np.testing.assert_array_equal(surface(optimized), surface(mesh))
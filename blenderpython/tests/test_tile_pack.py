@@ -0,0 +1,72 @@
+import gc
+import mmap
+import struct
+import weakref
+
+import pytest
+
+import tile_glb
+import tile_pack
+
+
+def write_glbs(directory, names):
+    """Tiny files with the GLB magic; the packer only checks that and the length."""
+    blobs = {}
+    for k, name in enumerate(names):
+        data = struct.pack('<I', tile_glb.GLB_MAGIC) + bytes(range(k + 1)) * (k + 3)
+        (directory / f'{name}.glb').write_bytes(data)
+        blobs[name] = data
+    return blobs
+
+
+def test_pack_round_trips_every_variant(tmp_path):
+    blobs = write_glbs(tmp_path, ['grass_v1', 'grass_v0', 'forest_v0', 'grass_v0_lod1'])
+    (tmp_path / 'notes.glb').write_bytes(b'not a variant')
+
+    path, index = tile_pack.pack_directory(str(tmp_path))
+
+    names = [entry['name'] for entry in index['entries']]
+    assert names == ['forest_v0', 'grass_v0', 'grass_v0_lod1', 'grass_v1']
+    assert all(entry['offset'] % tile_pack.ALIGNMENT == 0 for entry in index['entries'])
+    with tile_pack.TilePack(path) as pack:
+        assert pack.index == index
+        assert pack.names(biome='grass', lod=0) == ['grass_v0', 'grass_v1']
+        for name, data in blobs.items():
+            assert bytes(pack.blob(name)) == data
+
+
+def test_truncated_pack_is_rejected_and_unmapped(tmp_path, monkeypatch):
+    write_glbs(tmp_path, ['grass_v0', 'grass_v1'])
+    path, index = tile_pack.pack_directory(str(tmp_path))
+    with open(path, 'r+b') as fh:
+        fh.truncate(index['entries'][-1]['offset'] + 1)
+    maps, real_mmap = [], mmap.mmap
+
+    def recording_mmap(*args, **kwargs):
+        maps.append(real_mmap(*args, **kwargs))
+        return maps[-1]
+
+    monkeypatch.setattr(tile_pack.mmap, 'mmap', recording_mmap)
+
+    with pytest.raises(ValueError, match='runs past the end'):
+        tile_pack.TilePack(path)
+    assert len(maps) == 1 and maps[0].closed
+
+
+def test_blobs_outlive_the_pack(tmp_path):
+    blobs = write_glbs(tmp_path, ['grass_v0', 'grass_v1'])
+    path, _ = tile_pack.pack_directory(str(tmp_path))
+
+    with tile_pack.TilePack(path) as pack:
+        blob = pack.blob('grass_v0')
+        mapped = weakref.ref(pack._map)
+
+    assert bytes(blob) == blobs['grass_v0']
+    with pytest.raises(ValueError, match='closed'):
+        pack.blob('grass_v1')
+    pack.close()  # closing twice is fine
+    assert mapped() is not None
+    blob.release()
+    del pack
+    gc.collect()
+    assert mapped() is None
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import tile_rng
+
+
+def test_key_is_stable_and_separates_parts():
+    assert tile_rng.key(42, 100, 0, 'rock', 'scale') == tile_rng.key(42, 100, 0, 'rock', 'scale')
+    assert tile_rng.key(42, 100, 0, 'rock', 'scale') != tile_rng.key(42, 100, 0, 'tuft', 'scale')
+    assert tile_rng.key(1, 23) != tile_rng.key(12, 3)
+
+
+@pytest.mark.parametrize('count', [1, 3, 300])
+def test_uniforms_do_not_depend_on_batch_size(count):
+    k = tile_rng.key(42, 100, 0, 'rock', 'scale')
+    reference = tile_rng.uniforms(k, 320)
+
+    np.testing.assert_array_equal(tile_rng.uniforms(k, count), reference[:count])
+    # any window of counters matches the same counters drawn in one batch
+    np.testing.assert_array_equal(tile_rng.uniforms(k, count, start=7), reference[7:7 + count])
+    assert ((reference >= 0.0) & (reference < 1.0)).all()
+
+
+def test_uniforms_reshape_in_row_major_order():
+    k = tile_rng.key('grid')
+
+    np.testing.assert_array_equal(tile_rng.uniforms(k, (4, 5)), tile_rng.uniforms(k, 20).reshape(4, 5))
+
+
+def test_stream_follows_the_batched_counters_across_blocks():
+    stream = tile_rng.Stream(42, 100, 0, 'layout', 'tuft')
+    count = 600  # more than two blocks
+
+    drawn = [stream.random() for _ in range(count)]
+
+    np.testing.assert_array_equal(drawn, tile_rng.uniforms(stream.key, count))
+    assert stream.counter == count
@@ -0,0 +1,220 @@
+"""tile_bake.py
+
+CPU normal-map baking: full-resolution tile relief on a low-poly hex top.
+
+The hex top is either the flat 12-vertex prism (cheap, but the noise relief
+only moves its six corners) or a dense displaced grid (detailed, but
+hundreds of vertices per tile). `bake_normal_map` keeps the cheap mesh and
+moves the detail into a tangent-space normal map:
+
+- the high-resolution surface is never meshed: every texel maps back
+  through the planar top UVs (`tile_geometry.planar_uvs`) to an undisplaced
+  (x, y), and `tile_geometry.top_surface_points` evaluates the same noise,
+  relief and lateral shift `displace_top` applies, as one vectorized
+  heightfield sample per texel; the high normal comes from central
+  differences with the neighbouring texels;
+- the low-poly mesh's top triangles are rasterized in UV space, giving each
+  texel its low surface point, interpolated vertex normal and per-triangle
+  tangent frame (+X along u, +Y along v, OpenGL / glTF convention);
+- texels outside the hex are dilated from their neighbours for a few
+  pixels (so mipmaps and bilinear filtering do not bleed the background in)
+  and the rest is the flat normal (128, 128, 255).
+
+No TANGENT attribute is written; glTF viewers (three.js' GLTFLoader among
+them) derive the frame from the UVs, which are planar over the top, so the
+per-triangle frame used here matches. Maps are written as 8-bit PNGs by a
+small zlib encoder (`png_bytes`, RGB or RGBA), so no imaging library is
+needed.
+
+USAGE:
+    import tile_bake, tile_geometry as geo
+    plan = geo.plan_surface(0, params)
+    pixels, stats = tile_bake.bake_normal_map(plan, geo.build_tile_base(plan, resolution=1).mesh, size=256)
+    tile_bake.write_png('grass_v0_normal.png', pixels)
+
+    python blenderpython/tile_batch.py --out out --resolution 1 --bake-normals 256   # embedded in each GLB
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+import tile_geometry as geo
+
+# Texels a triangle may miss by and still count as inside (seams between triangles).
+_EDGE_EPS = 1e-6
+FLAT = (128, 128, 255)
+# PNG colour type per channel count (truecolour, truecolour with alpha)
+_PNG_COLOR_TYPES = {3: 2, 4: 6}
+
+
+def _high_surface(plan, size):
+    """High-resolution points (size, size, 3) and unit normals of the plan's top, one per texel.
+
+    Row 0 is the top of the image, i.e. glTF v = 0 / Blender v = 1.
+    """
+    radius = plan['radius']
+    # one extra texel on every side for the central differences
+    t = (np.arange(-1, size + 1) + 0.5) / size
+    u, v = np.meshgrid(t, 1.0 - t)
+    points = geo.top_surface_points(plan, (2 * u - 1) * radius, (2 * v - 1) * radius)
+    du = points[1:-1, 2:] - points[1:-1, :-2]     # towards +u (+x)
+    dv = points[:-2, 1:-1] - points[2:, 1:-1]     # towards +v (+y)
+    normals = np.cross(du, dv)
+    normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+    return points[1:-1, 1:-1], normals
+
+
+def _top_triangles(mesh):
+    """Indices of the triangles with positive UV area (the top; bottom and sides are mirrored or degenerate)."""
+    uv = mesh.uvs.astype(np.float64)
+    a, b, c = uv[mesh.indices[:, 0]], uv[mesh.indices[:, 1]], uv[mesh.indices[:, 2]]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    return np.flatnonzero(area > 1e-12)
+
+
+def _rasterize(mesh, size):
+    """Low surface samples per covered texel.
+
+    Returns (rows, cols, points, normals, du, dv): texel indices, the
+    interpolated low position and normal, and dP/du, dP/dv of the sample's
+    triangle.
+    """
+    pos = mesh.positions.astype(np.float64)
+    nrm = mesh.normals.astype(np.float64)
+    uv = mesh.uvs.astype(np.float64)
+    # texel-space coordinates: texel (i, j) has its center at (j, i)
+    px = np.column_stack([uv[:, 0] * size - 0.5, (1.0 - uv[:, 1]) * size - 0.5])
+    covered = np.zeros((size, size), dtype=bool)
+    out = [[] for _ in range(6)]
+    for tri in mesh.indices[_top_triangles(mesh)]:
+        (x0, y0), (x1, y1), (x2, y2) = px[tri]
+        i_lo, i_hi = max(int(np.ceil(min(y0, y1, y2))), 0), min(int(np.floor(max(y0, y1, y2))), size - 1)
+        j_lo, j_hi = max(int(np.ceil(min(x0, x1, x2))), 0), min(int(np.floor(max(x0, x1, x2))), size - 1)
+        if i_lo > i_hi or j_lo > j_hi:
+            continue
+        ii, jj = np.mgrid[i_lo:i_hi + 1, j_lo:j_hi + 1]
+        det = (y1 - y2) * (x0 - x2) + (x2 - x1) * (y0 - y2)
+        w0 = ((y1 - y2) * (jj - x2) + (x2 - x1) * (ii - y2)) / det
+        w1 = ((y2 - y0) * (jj - x2) + (x0 - x2) * (ii - y2)) / det
+        w2 = 1.0 - w0 - w1
+        inside = (w0 >= -_EDGE_EPS) & (w1 >= -_EDGE_EPS) & (w2 >= -_EDGE_EPS) & ~covered[ii, jj]
+        if not inside.any():
+            continue
+        ii, jj = ii[inside], jj[inside]
+        w = np.column_stack([w0[inside], w1[inside], w2[inside]])
+        covered[ii, jj] = True
+        # constant per triangle: solve [e1 e2] = [dP/du dP/dv] [duv1 duv2]
+        e = pos[tri[1:]] - pos[tri[0]]
+        duv = uv[tri[1:]] - uv[tri[0]]
+        dp = np.linalg.solve(duv, e)    # rows: dP/du, dP/dv
+        out[0].append(ii)
+        out[1].append(jj)
+        out[2].append(w @ pos[tri])
+        out[3].append(w @ nrm[tri])
+        out[4].append(np.broadcast_to(dp[0], (len(w), 3)))
+        out[5].append(np.broadcast_to(dp[1], (len(w), 3)))
+    if not out[0]:
+        raise ValueError('mesh has no UV-mapped top triangles to bake onto')
+    return tuple(np.concatenate(column) for column in out)
+
+
+def _normalize(v):
+    length = np.linalg.norm(v, axis=-1, keepdims=True)
+    return v / np.where(length > 0, length, 1.0)
+
+
+def dilate(pixels, mask, passes=4):
+    """Grow the `mask`ed pixels (H, W, 3 float) outward by `passes` texels, averaging covered neighbours."""
+    pixels, mask = pixels.copy(), mask.copy()
+    for _ in range(passes):
+        padded = np.pad(pixels * mask[..., None], ((1, 1), (1, 1), (0, 0)))
+        weight = np.pad(mask.astype(np.float64), 1)
+        total, count = np.zeros_like(pixels), np.zeros(mask.shape)
+        for di in (0, 1, 2):
+            for dj in (0, 1, 2):
+                total += padded[di:di + mask.shape[0], dj:dj + mask.shape[1]]
+                count += weight[di:di + mask.shape[0], dj:dj + mask.shape[1]]
+        grow = ~mask & (count > 0)
+        if not grow.any():
+            break
+        pixels[grow] = total[grow] / count[grow, None]
+        mask |= grow
+    return pixels, mask
+
+
+def bake_normal_map(plan, mesh, size=256, padding=4):
+    """Bake the plan's full-resolution top onto `mesh` (the tile base, any resolution).
+
+    `plan` is a `tile_geometry.plan_surface` / `plan_tile` dict and `mesh`
+    the tile's base MeshData with its planar UVs. Returns (pixels, stats):
+    a (size, size, 3) uint8 tangent-space normal map (row 0 = glTF v 0) and
+    {'size', 'coverage' (fraction of texels on the top), 'deviation' (max
+    distance between the high and the low surface along the low normal)}.
+    """
+    if mesh.uvs is None:
+        raise ValueError('mesh has no UVs to bake into')
+    size = int(size)
+    if size < 2:
+        raise ValueError(f'normal map size must be >= 2, got {size}')
+    high_points, high_normals = _high_surface(plan, size)
+    rows, cols, points, normals, du, dv = _rasterize(mesh, size)
+    normals = _normalize(normals)
+    tangent = _normalize(du - normals * np.einsum('ij,ij->i', du, normals)[:, None])
+    bitangent = np.cross(normals, tangent)
+    # mirrored UVs flip the bitangent (never for planar top UVs, but keep the frame honest)
+    bitangent *= np.where(np.einsum('ij,ij->i', bitangent, dv) < 0, -1.0, 1.0)[:, None]
+    high = high_normals[rows, cols]
+    local = _normalize(np.column_stack([np.einsum('ij,ij->i', high, tangent),
+                                        np.einsum('ij,ij->i', high, bitangent),
+                                        np.einsum('ij,ij->i', high, normals)]))
+    deviation = np.abs(np.einsum('ij,ij->i', high_points[rows, cols] - points, normals))
+
+    image = np.zeros((size, size, 3))
+    mask = np.zeros((size, size), dtype=bool)
+    image[rows, cols] = local * 0.5 + 0.5
+    mask[rows, cols] = True
+    image, filled = dilate(image, mask, padding)
+    pixels = np.empty((size, size, 3), dtype=np.uint8)
+    pixels[:] = FLAT
+    pixels[filled] = np.clip(np.rint(image[filled] * 255.0), 0, 255).astype(np.uint8)
+    stats = {'size': size, 'coverage': round(float(mask.mean()), 4),
+             'deviation': round(float(deviation.max()), 6)}
+    return pixels, stats
+
+
+def png_bytes(pixels) -> bytes:
+    """Encode an (H, W, 3) RGB or (H, W, 4) RGBA uint8 array as an 8-bit PNG (Sub filter on every row)."""
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    height, width, channels = pixels.shape
+    if channels not in _PNG_COLOR_TYPES:
+        raise ValueError(f'expected RGB or RGBA pixels, got {channels} channels')
+    # Sub filter: each byte minus the byte one pixel to its left (mod 256)
+    rows = pixels.reshape(height, width * channels)
+    filtered = rows.copy()
+    filtered[:, channels:] -= rows[:, :-channels]
+    raw = np.column_stack([np.ones(height, dtype=np.uint8), filtered]).tobytes()
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, _PNG_COLOR_TYPES[channels], 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 9))
+            + chunk(b'IEND', b''))
+
+
+def write_png(path: str, pixels) -> int:
+    """Write `pixels` as a PNG file and return the number of bytes written."""
+    data = png_bytes(pixels)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+    return len(data)
+
+
+def format_stats(name: str, stats) -> str:
+    """One report line for a baked map (`bake_normal_map` stats, plus the PNG's 'bytes' when known)."""
+    encoded = f", {stats['bytes']} bytes" if 'bytes' in stats else ''
+    return (f"{name}: normal map {stats['size']}x{stats['size']}{encoded}, "
+            f"coverage {100 * stats['coverage']:.1f}%, max deviation {stats['deviation']:.4f}")
@@ -0,0 +1,456 @@
+"""tile_batch.py
+
+Parallel, bpy-free batch driver for the tile library.
+
+`generate_grassland_tiles.py` builds at most the three hand-tuned variants in
+one Blender session. This driver takes N variants x M biomes x K sizes
+(every biome recipe in `biomes/*.json` by default, see tile_biomes.py), turns
+every combination into an independent job and fans the jobs out over a
+process pool. Each job only uses `tile_geometry` + `tile_glb`, so no Blender
+is needed and the run scales with core count.
+
+DETERMINISM
+===========
+Every random decision of a tile comes from a counter-based `tile_rng`
+stream keyed by (seed, seed_offset, variant, object class[, instance]) (see
+`tile_geometry.plan_tile` and `tile_geometry.tile_stream`), so a variant's
+output depends only on its job spec — not on worker count, scheduling order,
+which process ran it or what else was drawn first. The `random.Random()`
+`build_job` passes is unseeded and only feeds recipes with
+"sampler": "legacy", which reseed it with `seed + seed_offset + variant` (the
+original `build_variation` formula) before drawing.
+
+OUTPUT
+======
+    <out>/grass_v0.glb ...            one size
+    <out>/r0.51/grass_v0.glb ...      several sizes (one sub-directory each)
+    <out>/grass_v0_lod1.glb ...       coarser levels when --lods is given (LOD0 keeps the plain name)
+    <out>/grass_v0_impostor.json ...  impostor atlas + index when --impostors is given (tile_impostor.py)
+    <out>/manifest.json               job spec + file/bytes/vertex/triangle counts
+    <out>/tiles.pack                  every variant GLB in one indexed file when --pack is given (tile_pack.py)
+    <out>/.tile-cache.json            content hash -> output (see tile_cache.py)
+
+INCREMENTAL BUILDS
+==================
+Each job is keyed by a hash of its spec plus the generator sources. Jobs
+whose key is already recorded for an existing output are skipped, so a
+rerun after changing one variant's params only rebuilds that variant.
+Use --force to rebuild everything.
+
+USAGE:
+    python blenderpython/tile_batch.py --out src/scene/assets --variants 3 --merge \
+        --biomes desert forest mountain ocean tundra ice --pack    # the committed web assets (grass is a Blender export)
+    python blenderpython/tile_batch.py --out out --biomes desert mountain --recipes my_biomes/
+    python blenderpython/tile_batch.py --out out --variants 24 --sizes 0.51 1.0 --workers 8 --merge
+    python blenderpython/tile_batch.py --out out --merge --quantize --compress meshopt   # prints before/after bytes
+    python blenderpython/tile_batch.py --out out --force --profile --trace trace.json    # per-stage timings
+    python blenderpython/tile_batch.py --out out --max-tris 400      # decimate to a per-tile budget
+    python blenderpython/tile_batch.py --out out --resolution 1 --bake-normals 256   # 12-vertex tops + normal maps
+    python blenderpython/tile_batch.py --out out --impostors 128    # far-distance impostor atlas per variant
+    python blenderpython/tile_batch.py --out src/scene/assets --pack   # also pack the directory for the web loader
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import tile_bake
+import tile_biomes
+import tile_cache
+import tile_decimate
+import tile_geometry as geo
+import tile_glb
+import tile_impostor
+import tile_optimize
+import tile_pack
+import tile_profile as prof
+
+MANIFEST_NAME = 'manifest.json'
+# Per-run entry fields (cache hit, wall-clock time): reported on stdout, never written to
+# the manifest or the cache, so reruns of the same inputs leave both byte-identical.
+RUN_FIELDS = ('cached', 'seconds')
+
+
+def lod_output(output: str, level: int) -> str:
+    """Sibling file name for LOD `level` (LOD0 is `output` itself)."""
+    if level == 0:
+        return output
+    stem, ext = os.path.splitext(output)
+    return f'{stem}_lod{level}{ext}'
+
+
+def make_jobs(out_dir: str, variants=3, biomes=None, sizes=(geo.HEX_RADIUS,), seed=geo.SEED,
+              seed_offset=100, merge=False, instanced=False, resolution=None, lods=None,
+              seamless=False, recipes=None, palette=False, quantize=False, compress=None, optimize=False,
+              max_tris=None, bake_normals=None, impostors=None):
+    """Expand N variants x M biomes x K sizes into a list of job dicts (in a stable order).
+
+    `biomes` defaults to every recipe in `recipes` (default: the built-in
+    `tile_biomes.RECIPES`). `resolution` overrides the recipes' top
+    resolution when given.
+
+    `lods` is a list of top resolutions (LOD0 first); the last level also
+    drops tufts. It cannot be combined with `instanced`. `seamless` pins
+    every variant's top edges flat (see `tile_geometry.plan_tile`).
+    `palette` writes material colours as vertex colours on one shared
+    material, `quantize` writes KHR_mesh_quantization attributes and
+    `compress` ('meshopt') compresses each file and `optimize` welds and
+    reorders indices (see `tile_glb.write_tile_glb`). `max_tris` decimates
+    each tile (every LOD level) to at most that many triangles
+    (`tile_decimate.fit_budget`). `bake_normals` bakes the full-resolution
+    top into a normal map of that size on each tile's ground material
+    (`tile_bake.bake_normal_map`); it needs per-tile materials, so not
+    `palette`. `impostors` also renders each variant's impostor atlas with
+    frames of that many pixels (`tile_impostor.write_impostor`).
+    """
+    if lods and instanced:
+        raise ValueError('--lods and --instanced cannot be combined')
+    if bake_normals and palette:
+        raise ValueError('--bake-normals and --palette cannot be combined')
+    lod_specs = None
+    if lods:
+        lod_specs = [{'resolution': r} for r in lods]
+        if len(lod_specs) > 1:
+            lod_specs[-1]['drop'] = ['tuft']
+    recipes = tile_biomes.RECIPES if recipes is None else recipes
+    biomes = list(recipes) if not biomes else biomes
+    jobs = []
+    for size in sizes:
+        size_dir = out_dir if len(sizes) == 1 else os.path.join(out_dir, f'r{size:g}')
+        for biome in biomes:
+            if biome not in recipes:
+                raise ValueError(f'Unknown biome: {biome} (known: {", ".join(sorted(recipes))})')
+            variations = tile_biomes.recipe_variations(recipes[biome])
+            materials = tile_biomes.recipe_materials(recipes[biome])
+            for index in range(variants):
+                params = geo.variation_params(index, variations)
+                if resolution is not None:
+                    params['resolution'] = resolution
+                if seamless:
+                    params['seamless'] = True
+                jobs.append({
+                    'biome': biome,
+                    'variant': index,
+                    'size': size,
+                    'thickness': geo.HEX_THICKNESS,
+                    'seed': seed,
+                    'seed_offset': seed_offset,
+                    'params': params,
+                    'materials': materials,
+                    'lods': lod_specs,
+                    'merge': merge,
+                    'instanced': instanced,
+                    'palette': palette,
+                    'quantize': quantize,
+                    'compress': compress,
+                    'optimize': optimize,
+                    'max_tris': max_tris,
+                    'bake_normals': bake_normals,
+                    'impostors': impostors,
+                    'output': os.path.join(size_dir, f'{biome}_v{index}.glb'),
+                })
+    return jobs
+
+
+@lru_cache(maxsize=None)
+def scatter_prototypes(seed):
+    """Prototype pool per seed, built once per worker process and shared by all of its instanced jobs."""
+    return geo.build_scatter_prototypes(seed)
+
+
+def build_job(job):
+    """Generate one job's geometry.
+
+    Returns (levels, instance_groups, material_specs) where levels is a list
+    of TilePart lists, LOD0 first (a single level unless the job has lods).
+    Material specs are the job's recipe materials plus the per-tile ground
+    material.
+    """
+    rng = random.Random()
+    kwargs = dict(seed=job['seed'], seed_offset=job['seed_offset'], radius=job['size'],
+                  thickness=job['thickness'], rng=rng)
+    groups = []
+    if job.get('lods'):
+        levels = geo.build_tile_lods(job['variant'], job['params'], lods=job['lods'], **kwargs)
+    elif job['instanced']:
+        parts, groups = geo.build_tile_instanced(job['variant'], job['params'],
+                                                 prototypes=scatter_prototypes(job['seed']), **kwargs)
+        levels = [parts]
+    else:
+        levels = [geo.build_tile_parts(job['variant'], job['params'], **kwargs)]
+    # per-tile ground material from its own stream (legacy: drawn after the geometry like the Blender flow)
+    materials = dict(job.get('materials') or {})
+    ground = levels[0][0].material
+    base_color = materials.get(ground, geo.MATERIALS.get(ground, geo.MATERIALS['Grass_Mat']))['base_color']
+    ground_rng = geo.tile_stream(job['params'], job['seed'], job['seed_offset'], job['variant'], 'ground', 'material',
+                                 rng=rng)
+    name, spec = geo.ground_material_for_tile(job['variant'], ground_rng, ground, base_color)
+    for parts in levels:
+        parts[0].material = name
+    materials[name] = spec
+    return levels, groups, materials
+
+
+def run_job(job):
+    """Build and export one job; returns its manifest entry. Top-level so it pickles for the pool."""
+    start = time.perf_counter()
+    with prof.span('tile.geometry'):
+        levels, groups, materials = build_job(job)
+    decimation = None
+    if job.get('max_tris'):
+        with prof.span('decimate'):
+            rim = dict(seamless=bool(job['params'].get('seamless')), radius=job['size'], thickness=job['thickness'])
+            levels[0], groups, decimation = tile_decimate.fit_budget(levels[0], groups, job['max_tris'], **rim)
+            for level in range(1, len(levels)):
+                levels[level] = tile_decimate.fit_budget(levels[level], (), job['max_tris'], **rim)[0]
+    level_materials = [materials] * len(levels)
+    bakes = []
+    if job.get('bake_normals'):
+        with prof.span('bake'):
+            level_materials, bakes = bake_levels(job, levels, materials)
+    os.makedirs(os.path.dirname(job['output']) or '.', exist_ok=True)
+    layout = dict(merge=job['merge'], instances=groups, palette=job.get('palette', False))
+    stats = []
+    with prof.span('export'):
+        lod_bytes = [tile_glb.write_tile_glb(lod_output(job['output'], level), parts, level_materials[level],
+                                             quantize=job.get('quantize', False), compress=job.get('compress'),
+                                             optimize=job.get('optimize', False),
+                                             stats=stats if level == 0 else None, **layout)
+                     for level, parts in enumerate(levels)]
+    impostor = None
+    if job.get('impostors'):
+        with prof.span('impostor'):
+            impostor = tile_impostor.write_impostor(job['output'], levels[0], groups, level_materials[0],
+                                                    job['impostors'])
+    parts = levels[0]
+    entry = dict(job)
+    if stats:
+        entry['index_stats'] = tile_optimize.summarize(stats)
+    if decimation:
+        entry['decimation'] = decimation
+    if bakes:
+        entry['normal_map'] = bakes[0]
+    if impostor:
+        entry['impostor'] = impostor
+    if job.get('quantize') or job.get('compress'):
+        # size of the plain float32 layout, for the before/after report
+        entry['raw_bytes'] = len(tile_glb.build_tile_glb(parts, level_materials[0], **layout).to_bytes())
+    entry.update({
+        'bytes': lod_bytes[0],
+        'vertices': sum(p.mesh.vertex_count for p in parts) + sum(g.mesh.vertex_count for g in groups),
+        'triangles': sum(p.mesh.triangle_count for p in parts) + sum(g.mesh.triangle_count * g.count for g in groups),
+        'seconds': round(time.perf_counter() - start, 6),
+    })
+    if len(levels) > 1:
+        entry['lod_files'] = [{
+            'output': os.path.basename(lod_output(job['output'], level)),
+            'bytes': lod_bytes[level],
+            'triangles': sum(p.mesh.triangle_count for p in levels[level]),
+            **({'normal_map': bakes[level]} if bakes else {}),
+        } for level in range(len(levels))]
+    return entry
+
+
+def bake_levels(job, levels, materials):
+    """Bake a normal map onto each level's ground (parts[0]).
+
+    Returns (per-level material dicts, per-level bake stats); each level's
+    ground spec gets its own PNG under 'normal_texture', since the map is
+    relative to that level's low surface.
+    """
+    plan = geo.plan_surface(job['variant'], job['params'], job['seed'], job['seed_offset'], job['size'],
+                            job['thickness'])
+    level_materials, bakes = [], []
+    for parts in levels:
+        ground = parts[0]
+        pixels, bake = tile_bake.bake_normal_map(plan, ground.mesh, job['bake_normals'])
+        png = tile_bake.png_bytes(pixels)
+        bake['bytes'] = len(png)
+        level_materials.append(dict(materials, **{ground.material: dict(materials[ground.material],
+                                                                         normal_texture=png)}))
+        bakes.append(bake)
+    return level_materials, bakes
+
+
+def source_fingerprint() -> str:
+    """Fingerprint of every source file that affects batch output."""
+    return tile_cache.source_fingerprint(tile_cache.CORE_SOURCES + ('tile_batch.py',))
+
+
+def job_key(job, fingerprint: str, out_dir: str) -> str:
+    """Content key of a job: its spec (output relative to out_dir) plus the source fingerprint."""
+    inputs = dict(job)
+    inputs['output'] = os.path.relpath(job['output'], out_dir).replace(os.sep, '/')
+    return tile_cache.cache_key(inputs, fingerprint)
+
+
+def _run_jobs(jobs, workers=None):
+    if workers == 1 or len(jobs) <= 1:
+        return [run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs, chunksize=max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))))
+
+
+def run_batch(jobs, workers=None, cache=None):
+    """Run jobs over a process pool (workers=1 runs inline). Returns entries in job order.
+
+    With a `tile_cache.BuildCache`, jobs that are up to date are not rebuilt;
+    their recorded manifest entry is returned with `cached: True`.
+    """
+    if cache is None:
+        return _run_jobs(jobs, workers)
+    fingerprint = source_fingerprint()
+    keys = [job_key(job, fingerprint, cache.out_dir) for job in jobs]
+    stale = [i for i, (job, key) in enumerate(zip(jobs, keys)) if not cache.is_fresh(key, job['output'])]
+    built = dict(zip(stale, _run_jobs([jobs[i] for i in stale], workers)))
+    entries = []
+    for i, (job, key) in enumerate(zip(jobs, keys)):
+        if i in built:
+            entry = built[i]
+            entry['key'] = key
+            cache.record(key, job['output'], entry['bytes'],
+                         entry={k: v for k, v in entry.items() if k != 'output' and k not in RUN_FIELDS})
+            entries.append(dict(entry, cached=False))
+        else:
+            entries.append(dict(cache.get(key)['entry'], output=job['output'], cached=True))
+    cache.save()
+    return entries
+
+
+def write_manifest(out_dir: str, entries, path=None):
+    """Write the manifest (paths relative to out_dir) and return its path."""
+    path = path or os.path.join(out_dir, MANIFEST_NAME)
+    rows = []
+    for entry in entries:
+        row = dict(entry)
+        row['output'] = os.path.relpath(entry['output'], out_dir).replace(os.sep, '/')
+        for key in RUN_FIELDS:
+            row.pop(key, None)
+        rows.append(row)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({'generator': tile_glb.GENERATOR, 'variants': rows}, fh, indent=2)
+    return path
+
+
+def write_packs(entries):
+    """Pack each output directory (one per size) into its `tiles.pack`; returns [(path, index)]."""
+    by_dir = {}
+    for entry in entries:
+        directory, name = os.path.split(entry['output'])
+        by_dir.setdefault(directory, []).append(dict(entry, output=name))
+    return [tile_pack.pack_directory(directory, meta=tile_pack.manifest_meta(rows))
+            for directory, rows in by_dir.items()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate tile GLBs in parallel without Blender.')
+    parser.add_argument('--out', '-o', required=True, help='output directory')
+    parser.add_argument('--variants', '-n', type=int, default=3, help='variants per biome and size')
+    parser.add_argument('--biomes', '-b', nargs='+', default=None, help='biome keys to build (default: every recipe)')
+    parser.add_argument('--recipes', nargs='+', default=[], help='extra recipe directories (override built-ins by key)')
+    parser.add_argument('--sizes', '-S', nargs='+', type=float, default=[geo.HEX_RADIUS], help='hex radii')
+    parser.add_argument('--seed', '-s', type=int, default=geo.SEED)
+    parser.add_argument('--workers', '-j', type=int, default=None, help='process count (default: all cores)')
+    parser.add_argument('--merge', '-m', action='store_true', help='one primitive per material')
+    parser.add_argument('--instanced', '-i', action='store_true', help='instance rocks/tufts/trees')
+    parser.add_argument('--resolution', '-r', type=int, default=None,
+                        help="rings of subdivision on the hex top (default: each recipe's)")
+    parser.add_argument('--lods', nargs='+', type=int, default=None,
+                        help='top resolution per LOD, LOD0 first (e.g. 8 3 1); writes *_lod<k>.glb siblings')
+    parser.add_argument('--seamless', action='store_true', help='pin top edges flat so variants tile without cracks')
+    parser.add_argument('--quantize', '-q', action='store_true',
+                        help='KHR_mesh_quantization: 16-bit positions/UVs, 8-bit normals')
+    parser.add_argument('--compress', choices=tile_glb.COMPRESSORS, default=None,
+                        help='compress each GLB (meshopt: needs gltfpack on PATH)')
+    parser.add_argument('--optimize', action='store_true',
+                        help='weld vertices and reorder indices for vertex cache/overdraw; prints ACMR/ATVR')
+    parser.add_argument('--palette', action='store_true',
+                        help='bake material colours into vertex colours; one shared material for every tile')
+    parser.add_argument('--max-tris', type=int, default=None,
+                        help='triangle budget per tile: decimate scatter and top until it fits; prints the error')
+    parser.add_argument('--bake-normals', type=int, default=None, metavar='SIZE',
+                        help='bake the full-resolution top into a SIZE x SIZE normal map per tile (try --resolution 1)')
+    parser.add_argument('--impostors', type=int, default=None, metavar='FRAME',
+                        help='also render an impostor atlas per variant (views of FRAME x FRAME pixels)')
+    parser.add_argument('--pack', action='store_true',
+                        help=f'also write every variant GLB of each output directory into {tile_pack.PACK_NAME}')
+    parser.add_argument('--force', action='store_true', help='ignore the build cache and rebuild everything')
+    parser.add_argument('--profile', action='store_true',
+                        help='print a per-stage timing breakdown (runs the jobs in this process)')
+    parser.add_argument('--trace', default=None, help='also write the profile as Chrome trace JSON (implies --profile)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compress:
+        try:
+            tile_glb.compressor_path(args.compress)
+        except RuntimeError as ex:
+            print(ex, file=sys.stderr)
+            return 2
+    out_dir = os.path.abspath(args.out)
+    recipes = tile_biomes.load_recipes(tile_biomes.RECIPES_DIR, *args.recipes)
+    jobs = make_jobs(out_dir, args.variants, args.biomes, args.sizes, args.seed,
+                     merge=args.merge, instanced=args.instanced, resolution=args.resolution, lods=args.lods,
+                     seamless=args.seamless, recipes=recipes, palette=args.palette, quantize=args.quantize,
+                     compress=args.compress, optimize=args.optimize, max_tris=args.max_tris,
+                     bake_normals=args.bake_normals, impostors=args.impostors)
+    profile = args.profile or bool(args.trace)
+    if profile:
+        # spans are per process, so profiled jobs run inline
+        prof.enable()
+        args.workers = 1
+    start = time.perf_counter()
+    cache = tile_cache.BuildCache(out_dir)
+    if args.force:
+        cache.entries.clear()
+    entries = run_batch(jobs, args.workers, cache)
+    manifest = write_manifest(out_dir, entries)
+    total = sum(e['bytes'] for e in entries)
+    built = sum(1 for e in entries if not e['cached'])
+    print(f'Built {built} of {len(entries)} variants ({len(entries) - built} up to date, {total} bytes) '
+          f'in {time.perf_counter() - start:.2f}s -> {manifest}')
+    timed = [e for e in entries if not e['cached'] and 'seconds' in e]
+    if timed:
+        slowest = max(timed, key=lambda e: e['seconds'])
+        print(f"Slowest: {os.path.relpath(slowest['output'], out_dir)} ({slowest['seconds']:.2f}s)")
+    for entry in entries:
+        if entry.get('decimation') and not entry['cached']:
+            print(tile_decimate.format_stats(os.path.relpath(entry['output'], out_dir), entry['decimation']))
+        if entry.get('normal_map') and not entry['cached']:
+            print(tile_bake.format_stats(os.path.relpath(entry['output'], out_dir), entry['normal_map']))
+        if entry.get('index_stats') and not entry['cached']:
+            print(tile_optimize.format_stats(os.path.relpath(entry['output'], out_dir), entry['index_stats']))
+    if args.quantize or args.compress:
+        # cache records from older builds may lack raw_bytes; counting their compressed size as raw
+        # would understate the saving, so compare only the variants measured both ways
+        measured = [e for e in entries if 'raw_bytes' in e]
+        raw = sum(e['raw_bytes'] for e in measured)
+        packed = sum(e['bytes'] for e in measured)
+        skipped = len(entries) - len(measured)
+        note = f', {skipped} variants without a recorded raw size left out' if skipped else ''
+        if raw:
+            print(f'Compression: {raw} -> {packed} bytes ({100.0 * (1 - packed / raw):.1f}% smaller){note}')
+    if args.pack:
+        for path, index in write_packs(entries):
+            print(f"Packed {len(index['entries'])} GLBs ({os.path.getsize(path)} bytes) -> {path}")
+    if profile:
+        print(prof.report())
+        if args.trace:
+            print('Trace ->', prof.write_chrome_trace(args.trace))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
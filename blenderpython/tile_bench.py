@@ -0,0 +1,287 @@
+"""tile_bench.py
+
+Benchmark harness for tile generation and export.
+
+Generates tiles at several counts and top resolutions and records, per
+case, wall time per stage, peak memory, vertices / triangles / draw
+primitives per tile and GLB bytes per tile. Results are written as JSON and
+can be compared against a stored baseline, so asset-pipeline regressions
+(slower builds, heavier tiles) show up in review.
+
+PATHS
+=====
+- core: the bpy-free path (`tile_geometry` + `tile_glb`), stages
+  plan / base (hex + displacement) / scatter / serialize / write.
+- bpy: when run inside Blender, the same cases through
+  `generate_grassland_tiles.build_variation` and `export_collection`
+  (stages build / export). Skipped when `bpy` is not importable.
+
+Each case runs --repeat times and keeps the fastest run (sizes are
+deterministic). Peak memory comes from one extra run under tracemalloc
+(Python and NumPy allocations; tracing slows Python code several-fold, so
+timed runs are untraced); `max_rss_mb` is the process high-water mark.
+
+BASELINE
+========
+`--baseline [FILE]` compares against a previous result: a case regresses when
+its bytes / vertices / triangles / primitives per tile grow by more than
+--size-tolerance (default 1%). Those are deterministic; wall time depends on
+the machine and its load, so it only gates when asked for with
+--time-tolerance (e.g. 0.25 for +25%, on the machine that wrote the
+baseline). Regressions are printed and the exit code is 1.
+`--update-baseline` rewrites FILE with the new results.
+blenderpython/bench_baseline.json is the reference for the core path.
+
+USAGE:
+    python blenderpython/tile_bench.py --out bench.json --baseline blenderpython/bench_baseline.json
+    python blenderpython/tile_bench.py --counts 3 48 --resolutions 1 8 --repeat 5
+    blender --background --python blenderpython/tile_bench.py -- --out bench_bpy.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import numpy as np
+
+import tile_biomes
+import tile_geometry as geo
+import tile_glb
+
+try:
+    import bpy  # only inside Blender
+except ImportError:
+    bpy = None
+
+DEFAULT_COUNTS = (3, 12, 48)
+DEFAULT_RESOLUTIONS = (1, 4, 8)
+DEFAULT_BASELINE = os.path.join(SCRIPT_DIR, 'bench_baseline.json')
+SIZE_METRICS = ('bytes_per_tile', 'vertices_per_tile', 'triangles_per_tile', 'primitives_per_tile')
+
+
+def glb_primitives(gltf) -> int:
+    """Draw primitives of a glTF: the primitives of every mesh node (an instanced node draws once)."""
+    return sum(len(gltf['meshes'][node['mesh']]['primitives']) for node in gltf.get('nodes', []) if 'mesh' in node)
+
+
+def _case_result(path, count, resolution, biome, merge, seconds, peak, vertices, triangles, primitives, size):
+    return {
+        'path': path,
+        'count': count,
+        'resolution': resolution,
+        'biome': biome,
+        'merge': merge,
+        'seconds': {k: round(v, 6) for k, v in seconds.items()},
+        'per_tile_ms': round(1000.0 * seconds['total'] / count, 4),
+        'peak_mb': round(peak / 2 ** 20, 3),
+        'vertices_per_tile': round(vertices / count, 2),
+        'triangles_per_tile': round(triangles / count, 2),
+        'primitives_per_tile': round(primitives / count, 2),
+        'bytes_per_tile': round(size / count, 1),
+    }
+
+
+def bench_core(count, resolution, biome='grass', seed=geo.SEED, merge=True, trace_memory=False):
+    """One run of the bpy-free path: build and write `count` tiles into a temp directory."""
+    variations = tile_biomes.recipe_variations(tile_biomes.RECIPES[biome])
+    materials = tile_biomes.recipe_materials(tile_biomes.RECIPES[biome])
+    seconds = dict.fromkeys(('plan', 'base', 'scatter', 'serialize', 'write'), 0.0)
+    vertices = triangles = primitives = size = peak = 0
+    if trace_memory:
+        tracemalloc.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(count):
+            params = dict(variations[i % len(variations)], resolution=resolution)
+            t0 = time.perf_counter()
+            plan = geo.plan_tile(i % len(variations), params, seed, 100, rng=random.Random())
+            t1 = time.perf_counter()
+            parts = [geo.build_tile_base(plan)]
+            t2 = time.perf_counter()
+            for placement in plan['placements']:
+                parts += geo.build_placement_parts(placement)
+            t3 = time.perf_counter()
+            builder = tile_glb.build_tile_glb(parts, materials, merge=merge)
+            data = builder.to_bytes()
+            t4 = time.perf_counter()
+            with open(os.path.join(tmp, f'{biome}_{i}.glb'), 'wb') as fh:
+                fh.write(data)
+            t5 = time.perf_counter()
+            for stage, dt in zip(seconds, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                seconds[stage] += dt
+            vertices += sum(p.mesh.vertex_count for p in parts)
+            triangles += sum(p.mesh.triangle_count for p in parts)
+            primitives += glb_primitives(builder.gltf)
+            size += len(data)
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    seconds['total'] = sum(seconds.values())
+    return _case_result('core', count, resolution, biome, merge, seconds, peak, vertices, triangles, primitives, size)
+
+
+def bench_bpy(count, resolution, biome='grass', seed=geo.SEED, merge=True, trace_memory=False):
+    """One run of the Blender path: `build_variation` + `export_collection` per tile."""
+    import generate_grassland_tiles as ggt
+
+    variations = tile_biomes.recipe_variations(tile_biomes.RECIPES[biome])
+    materials = tile_biomes.recipe_materials(tile_biomes.RECIPES[biome])
+    seconds = {'build': 0.0, 'export': 0.0}
+    vertices = triangles = primitives = size = peak = 0
+    ggt.clear_collection('BenchTiles')
+    top_col = bpy.data.collections.new('BenchTiles')
+    bpy.context.scene.collection.children.link(top_col)
+    random.seed(seed)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(count):
+                params = dict(variations[i % len(variations)], resolution=resolution)
+                t0 = time.perf_counter()
+                ggt.build_variation(i, top_col, seed_offset=100, params=params, seed=seed, materials=materials)
+                t1 = time.perf_counter()
+                tile_col = top_col.children[f'tile_{i}_col']
+                out = os.path.join(tmp, f'{biome}_{i}.glb')
+                ggt.export_collection(tile_col, out, merge=merge)
+                t2 = time.perf_counter()
+                seconds['build'] += t1 - t0
+                seconds['export'] += t2 - t1
+                for obj in tile_col.objects:
+                    if obj.type == 'MESH':
+                        obj.data.calc_loop_triangles()
+                        vertices += len(obj.data.vertices)
+                        triangles += len(obj.data.loop_triangles)
+                gltf, _ = tile_glb.read_glb(out)
+                primitives += glb_primitives(gltf)
+                size += os.path.getsize(out)
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        ggt.clear_collection('BenchTiles')
+    seconds['total'] = sum(seconds.values())
+    return _case_result('bpy', count, resolution, biome, merge, seconds, peak, vertices, triangles, primitives, size)
+
+
+def run_cases(counts=DEFAULT_COUNTS, resolutions=DEFAULT_RESOLUTIONS, biome='grass', repeat=3, merge=True,
+              paths=None):
+    """Run every (path, count, resolution) case `repeat` times; keep each case's fastest run."""
+    if paths is None:
+        paths = ('core', 'bpy') if bpy is not None else ('core',)
+    runners = {'core': bench_core, 'bpy': bench_bpy}
+    cases = []
+    for path in paths:
+        for resolution in resolutions:
+            for count in counts:
+                runs = [runners[path](count, resolution, biome, merge=merge) for _ in range(max(1, repeat))]
+                best = min(runs, key=lambda r: r['seconds']['total'])
+                best['peak_mb'] = runners[path](count, resolution, biome, merge=merge, trace_memory=True)['peak_mb']
+                cases.append(best)
+                print(format_case(best))
+    return {
+        'generator': tile_glb.GENERATOR,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'blender': bpy.app.version_string if bpy is not None else None,
+            'platform': platform.platform(),
+        },
+        'repeat': repeat,
+        'cases': cases,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+    }
+
+
+def format_case(case) -> str:
+    stages = ' '.join(f'{k}={1000 * v:.1f}ms' for k, v in case['seconds'].items() if k != 'total')
+    return (f"{case['path']:>4} n={case['count']:<3} r={case['resolution']:<2} "
+            f"{case['per_tile_ms']:8.2f} ms/tile  {case['bytes_per_tile']:9.0f} B/tile  "
+            f"{case['triangles_per_tile']:7.0f} tris  {case['primitives_per_tile']:5.1f} prims  "
+            f"peak {case['peak_mb']:.1f} MB  [{stages}]")
+
+
+def _case_key(case):
+    return (case['path'], case['count'], case['resolution'], case['biome'], case['merge'])
+
+
+def compare(results, baseline, time_tolerance=None, size_tolerance=0.01):
+    """Return regression messages of `results` against `baseline` (cases matched by path/count/resolution/biome/merge).
+
+    Per-tile time is only checked when `time_tolerance` is given.
+    """
+    reference = {_case_key(c): c for c in baseline.get('cases', [])}
+    messages = []
+    for case in results['cases']:
+        base = reference.get(_case_key(case))
+        if base is None:
+            continue
+        label = f"{case['path']} n={case['count']} r={case['resolution']} {case['biome']}"
+        if time_tolerance is not None and case['per_tile_ms'] > base['per_tile_ms'] * (1.0 + time_tolerance):
+            messages.append(f"{label}: {case['per_tile_ms']:.2f} ms/tile vs baseline {base['per_tile_ms']:.2f}")
+        for metric in SIZE_METRICS:
+            if case[metric] > base[metric] * (1.0 + size_tolerance):
+                messages.append(f'{label}: {metric} {case[metric]} vs baseline {base[metric]}')
+    return messages
+
+
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description='Benchmark tile generation and export.')
+    parser.add_argument('--counts', nargs='+', type=int, default=list(DEFAULT_COUNTS), help='tiles per case')
+    parser.add_argument('--resolutions', nargs='+', type=int, default=list(DEFAULT_RESOLUTIONS),
+                        help='hex top resolutions')
+    parser.add_argument('--biome', '-b', default='grass', help='recipe key')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case (fastest is kept)')
+    parser.add_argument('--no-merge', action='store_true', help='one primitive per part instead of per material')
+    parser.add_argument('--path', choices=('core', 'bpy'), nargs='+', default=None,
+                        help='paths to run (default: core, plus bpy inside Blender)')
+    parser.add_argument('--out', '-o', default=None, help='write results JSON here')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE, default=None,
+                        help='compare against this results JSON (default: bench_baseline.json)')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results to --baseline')
+    parser.add_argument('--time-tolerance', type=float, default=None,
+                        help='also fail when per-tile time grows by more than this fraction (off by default)')
+    parser.add_argument('--size-tolerance', type=float, default=0.01)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.path and 'bpy' in args.path and bpy is None:
+        print('The bpy path needs Blender: blender --background --python tile_bench.py -- ...', file=sys.stderr)
+        return 2
+    results = run_cases(args.counts, args.resolutions, args.biome, args.repeat, not args.no_merge, args.path)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
+        print('Results ->', args.out)
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
+        print('Baseline updated ->', args.baseline)
+        return 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as fh:
+            regressions = compare(results, json.load(fh), args.time_tolerance, args.size_tolerance)
+        for message in regressions:
+            print('REGRESSION', message)
+        print(f'{len(regressions)} regression(s) against {args.baseline}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
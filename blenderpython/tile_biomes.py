@@ -0,0 +1,105 @@
+"""tile_biomes.py
+
+Data-driven biome recipe registry for the tile generator.
+
+Each biome is a JSON file in `blenderpython/biomes/` (one file per registry
+key, named `<key>.json`). Adding or retuning a biome is a data edit: the
+batch driver, the map chunk baker and the Blender script all read the same
+recipes, and every recipe runs on the shared hex base and scatter
+primitives of `tile_geometry`.
+
+RECIPE FORMAT
+=============
+    {
+      "key": "desert",                 registry key (BiomeType value in src/game/types.ts)
+      "aliases": ["sand"],             other map biome names that use this recipe (optional)
+      "materials": {                   extra material specs (optional; may override MATERIALS)
+        "Sand_Mat": {"base_color": [0.82, 0.7, 0.43, 1.0], "metallic": 0.0, "roughness": 0.95}
+      },
+      "defaults": {...},               params shared by every variation (optional)
+      "variations": [{...}, ...]       one params dict per variant (at least one)
+    }
+
+Params are the `tile_geometry.plan_tile` params (rocks, tufts, tree_prob,
+trees, height_amp, noise_scale, resolution, shape, materials, density,
+...). `defaults` and each variation are merged key by key; the nested
+`shape`, `materials` and `density` dicts are merged one level deep.
+"""
+
+import json
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RECIPES_DIR = os.path.join(SCRIPT_DIR, 'biomes')
+
+# Nested param dicts merged key by key (defaults <- variation).
+_NESTED = ('shape', 'materials', 'density')
+
+
+def merge_params(defaults, variation):
+    """Merge `variation` over `defaults` (nested `_NESTED` dicts one level deep)."""
+    params = dict(defaults)
+    for key, value in variation.items():
+        if key in _NESTED and isinstance(value, dict):
+            params[key] = dict(params.get(key) or {}, **value)
+        else:
+            params[key] = value
+    return params
+
+
+def load_recipe(path: str):
+    """Read and check one recipe file; raises ValueError naming the file on bad data."""
+    with open(path, 'r', encoding='utf-8') as fh:
+        try:
+            recipe = json.load(fh)
+        except ValueError as ex:
+            raise ValueError(f'{path}: invalid JSON ({ex})') from ex
+    if not isinstance(recipe, dict) or not recipe.get('key'):
+        raise ValueError(f'{path}: recipe needs a "key"')
+    variations = recipe.get('variations')
+    if not isinstance(variations, list) or not variations or not all(isinstance(v, dict) for v in variations):
+        raise ValueError(f'{path}: recipe needs a non-empty "variations" list of objects')
+    for name, spec in (recipe.get('materials') or {}).items():
+        if 'base_color' not in spec or len(spec['base_color']) != 4:
+            raise ValueError(f'{path}: material {name} needs an RGBA "base_color"')
+    return recipe
+
+
+def load_recipes(*directories):
+    """Load every `*.json` recipe from the directories (default: RECIPES_DIR), later ones overriding earlier.
+
+    Returns {key: recipe} sorted by key.
+    """
+    recipes = {}
+    for directory in directories or (RECIPES_DIR,):
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.json'):
+                recipe = load_recipe(os.path.join(directory, name))
+                recipes[recipe['key']] = recipe
+    return dict(sorted(recipes.items()))
+
+
+def recipe_variations(recipe):
+    """Params per variant: `defaults` merged with each variation."""
+    defaults = recipe.get('defaults') or {}
+    return [merge_params(defaults, variation) for variation in recipe['variations']]
+
+
+def recipe_materials(recipe):
+    """Material specs a recipe adds ({name: spec} with tuple colours)."""
+    return {name: dict(spec, base_color=tuple(spec['base_color']))
+            for name, spec in (recipe.get('materials') or {}).items()}
+
+
+def biome_aliases(recipes):
+    """Map every alias (and key) to its registry key."""
+    aliases = {}
+    for key, recipe in recipes.items():
+        for alias in recipe.get('aliases') or ():
+            aliases[alias] = key
+        aliases[key] = key
+    return aliases
+
+
+# Built-in recipes, loaded once on import.
+RECIPES = load_recipes()
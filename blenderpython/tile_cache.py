@@ -0,0 +1,107 @@
+"""tile_cache.py
+
+Content-addressed incremental build cache for exported tiles.
+
+A variant's cache key is the SHA-256 of everything that determines its
+bytes: seed, params, hex radius and thickness, export options and a
+fingerprint of the generator source files (so editing the scripts
+invalidates every key). Before building, callers ask the cache whether the
+key is already recorded for an output file that still exists with the
+recorded size; only stale variants are regenerated and re-exported.
+
+The cache lives next to the outputs as `.tile-cache.json`:
+
+    {"version": 1, "entries": {"<key>": {"output": "grass_v0.glb", "bytes": 22356, ...}}}
+
+Both `tile_batch.py` and the headless Blender run use it.
+"""
+
+import hashlib
+import json
+import os
+
+CACHE_NAME = '.tile-cache.json'
+CACHE_VERSION = 1
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose source affects generated bytes. Callers add their own entry
+# script (e.g. generate_grassland_tiles.py) on top of these. Instrumentation
+# such as tile_profile.py is left out: editing it must not rebuild the library.
+CORE_SOURCES = ('tile_noise.py', 'tile_geometry.py', 'tile_glb.py', 'tile_optimize.py',
+                'tile_decimate.py', 'tile_bake.py', 'tile_impostor.py', 'tile_rng.py')
+
+
+def source_fingerprint(names=CORE_SOURCES, base_dir=SCRIPT_DIR) -> str:
+    """Hash the given generator source files (missing files hash as absent)."""
+    h = hashlib.sha256()
+    for name in sorted(names):
+        h.update(name.encode('utf-8') + b'\0')
+        try:
+            with open(os.path.join(base_dir, name), 'rb') as fh:
+                h.update(fh.read())
+        except OSError:
+            h.update(b'<missing>')
+    return h.hexdigest()
+
+
+def cache_key(inputs: dict, fingerprint: str) -> str:
+    """Return the content key for a variant's generation inputs (any JSON-serializable dict)."""
+    payload = json.dumps({'inputs': inputs, 'source': fingerprint}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class BuildCache:
+    """hash -> output manifest stored in `<out_dir>/.tile-cache.json`."""
+
+    def __init__(self, out_dir: str, path=None):
+        self.out_dir = out_dir
+        self.path = path or os.path.join(out_dir, CACHE_NAME)
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == CACHE_VERSION:
+            self.entries = data.get('entries', {})
+
+    def save(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'version': CACHE_VERSION, 'entries': self.entries}, fh, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _abs(self, output: str) -> str:
+        return output if os.path.isabs(output) else os.path.join(self.out_dir, output)
+
+    def _rel(self, output: str) -> str:
+        return os.path.relpath(self._abs(output), self.out_dir).replace(os.sep, '/')
+
+    def is_fresh(self, key: str, output: str) -> bool:
+        """True if `key` was built to `output` and the file is still there with the recorded size."""
+        entry = self.entries.get(key)
+        if not entry or entry.get('output') != self._rel(output):
+            return False
+        try:
+            return os.path.getsize(self._abs(output)) == entry.get('bytes')
+        except OSError:
+            return False
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def record(self, key: str, output: str, size=None, **meta):
+        """Record that `key` produced `output`, replacing older keys for the same file."""
+        rel = self._rel(output)
+        for old in [k for k, e in self.entries.items() if e.get('output') == rel and k != key]:
+            del self.entries[old]
+        if size is None:
+            size = os.path.getsize(self._abs(output))
+        entry = dict(meta)
+        entry.update({'output': rel, 'bytes': size})
+        self.entries[key] = entry
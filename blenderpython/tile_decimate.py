@@ -0,0 +1,299 @@
+"""tile_decimate.py
+
+Per-tile triangle budgets via quadric-error decimation (no Blender needed).
+
+`fit_budget` takes a tile's parts (and instance groups) and, if the tile has
+more than `max_tris` triangles, removes vertices by half-edge collapses in
+order of Garland-Heckbert quadric error until it fits. All meshes of the
+tile share one priority queue, so triangles go first where they cost the
+least error: a flat displaced top loses rings before a rock loses its
+shape. Collapses keep an existing vertex (position, UV), so no attributes
+are interpolated; boundaries of open meshes are held by constraint planes,
+collapses that would flip a triangle or make the mesh non-manifold are
+skipped, and instance prototypes count once per instance (their error is
+measured at their largest instance scale). Seamless tiles keep every
+vertex of the top rim, so neighbouring tiles decimated to different
+budgets still share their edge vertices (no T-junctions).
+
+The error reported is the largest distance from an original vertex to the
+decimated surface (one-sided Hausdorff, in Blender units), per tile.
+
+USAGE:
+    import tile_decimate
+    parts, groups, stats = tile_decimate.fit_budget(parts, groups, max_tris=400)
+    print(tile_decimate.format_stats('grass_v0', stats))
+
+    python blenderpython/tile_batch.py --out out --max-tris 400   # prints one line per decimated variant
+"""
+
+import heapq
+
+import numpy as np
+
+import tile_geometry as geo
+
+# Weight of the planes that hold open boundaries in place (relative to face planes).
+BOUNDARY_WEIGHT = 10.0
+
+
+def _face_planes(pos, tris):
+    """Unit normals (T, 3) and plane offsets (T,) of triangles; degenerate faces get zero normals."""
+    a, b, c = pos[tris[:, 0]], pos[tris[:, 1]], pos[tris[:, 2]]
+    n = np.cross(b - a, c - a)
+    length = np.linalg.norm(n, axis=1, keepdims=True)
+    np.divide(n, length, out=n, where=length > 0)
+    n[length[:, 0] == 0] = 0.0
+    return n, -np.einsum('ij,ij->i', n, a)
+
+
+def _quadrics(pos, tris):
+    """Per-vertex 4x4 error quadrics: face planes plus boundary constraint planes."""
+    q = np.zeros((len(pos), 4, 4))
+    if not len(tris):
+        return q
+    n, d = _face_planes(pos, tris)
+    planes = np.column_stack([n, d])
+    k = np.einsum('ti,tj->tij', planes, planes)
+    for c in range(3):
+        np.add.at(q, tris[:, c], k)
+    # open edges (used by one triangle) get a plane through the edge, perpendicular to the face
+    edges = np.concatenate([tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]])
+    faces = np.tile(np.arange(len(tris)), 3)
+    key = np.sort(edges, axis=1)
+    _, inverse, counts = np.unique(key, axis=0, return_inverse=True, return_counts=True)
+    open_edge = counts[inverse.ravel()] == 1
+    if open_edge.any():
+        e, f = edges[open_edge], faces[open_edge]
+        direction = pos[e[:, 1]] - pos[e[:, 0]]
+        bn = np.cross(direction, n[f])
+        length = np.linalg.norm(bn, axis=1, keepdims=True)
+        np.divide(bn, length, out=bn, where=length > 0)
+        bplanes = np.column_stack([bn, -np.einsum('ij,ij->i', bn, pos[e[:, 0]])])
+        bk = BOUNDARY_WEIGHT * np.einsum('ti,tj->tij', bplanes, bplanes)
+        for c in range(2):
+            np.add.at(q, e[:, c], bk)
+    return q
+
+
+def _normal(a, b, c):
+    """Unnormalized normal of triangle (a, b, c) given as 3-sequences."""
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    return uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+
+
+class _Collapser:
+    """Greedy half-edge collapse over a (possibly multi-component) triangle mesh."""
+
+    def __init__(self, pos, tris, tri_weight, quadrics, pinned=None):
+        self.pos = pos.tolist()
+        self.pinned = [False] * len(pos) if pinned is None else list(pinned)
+        self.hom = np.column_stack([pos, np.ones(len(pos))])
+        self.tris = [list(t) for t in tris.tolist()]
+        self.tri_weight = tri_weight
+        self.alive = [True] * len(self.tris)
+        self.q = quadrics
+        self.vert_tris = [set() for _ in range(len(pos))]
+        for t, tri in enumerate(self.tris):
+            for v in tri:
+                self.vert_tris[v].add(t)
+        self.stamp = [0] * len(pos)
+        self.heap = []
+        self.total = float(sum(tri_weight))
+        for v in range(len(pos)):
+            self._push_around(v)
+
+    def _cost(self, u, v):
+        p = self.hom[v]
+        return float(p @ (self.q[u] + self.q[v]) @ p)
+
+    def _neighbours(self, v):
+        out = set()
+        for t in self.vert_tris[v]:
+            out.update(self.tris[t])
+        out.discard(v)
+        return out
+
+    def _push_around(self, v):
+        for w in self._neighbours(v):
+            heapq.heappush(self.heap, (self._cost(v, w), v, w, self.stamp[v], self.stamp[w]))
+            heapq.heappush(self.heap, (self._cost(w, v), w, v, self.stamp[w], self.stamp[v]))
+
+    def _can_collapse(self, u, v):
+        if self.pinned[u]:
+            return False  # u would disappear
+        shared = [t for t in self.vert_tris[u] if v in self.tris[t]]
+        if not shared or len(self.vert_tris[u] | self.vert_tris[v]) == len(shared):
+            return False  # not an edge, or the last triangle(s) of an isolated piece
+        # link condition: the only common neighbours are the apexes of the shared triangles
+        if len(self._neighbours(u) & self._neighbours(v)) != len(shared):
+            return False
+        pv = self.pos[v]
+        for t in self.vert_tris[u]:
+            tri = self.tris[t]
+            if v in tri:
+                continue
+            before = _normal(*(self.pos[k] for k in tri))
+            after = _normal(*(pv if k == u else self.pos[k] for k in tri))
+            dot = before[0] * after[0] + before[1] * after[1] + before[2] * after[2]
+            if dot <= 1e-12 * (before[0] ** 2 + before[1] ** 2 + before[2] ** 2) + 1e-30:
+                return False  # the triangle would flip or collapse
+        return True
+
+    def _collapse(self, u, v):
+        for t in list(self.vert_tris[u]):
+            tri = self.tris[t]
+            if v in tri:
+                self.alive[t] = False
+                self.total -= self.tri_weight[t]
+                for k in tri:
+                    self.vert_tris[k].discard(t)
+            else:
+                tri[tri.index(u)] = v
+                self.vert_tris[v].add(t)
+        self.vert_tris[u] = set()
+        self.q[v] += self.q[u]
+        self.stamp[u] += 1
+        self.stamp[v] += 1
+        self._push_around(v)
+
+    def run(self, budget, max_cost=None):
+        """Collapse cheapest edges until the weighted triangle total is <= budget (or max_cost is reached)."""
+        while self.total > budget and self.heap:
+            cost, u, v, su, sv = heapq.heappop(self.heap)
+            if su != self.stamp[u] or sv != self.stamp[v] or not self.vert_tris[u]:
+                continue
+            if max_cost is not None and cost > max_cost:
+                break
+            if self._can_collapse(u, v):
+                self._collapse(u, v)
+        return self.total
+
+    def triangles(self):
+        return np.asarray([tri for tri, alive in zip(self.tris, self.alive) if alive], dtype=np.int64).reshape(-1, 3)
+
+
+def point_surface_distance(points, mesh):
+    """Distance from each of `points` (P, 3) to the nearest triangle of `mesh` (P,)."""
+    pts = np.asarray(points, dtype=np.float64)
+    pos = mesh.positions.astype(np.float64)
+    tris = mesh.indices.astype(np.int64)
+    if not len(tris):
+        return np.full(len(pts), np.inf)
+    a, b, c = pos[tris[:, 0]], pos[tris[:, 1]], pos[tris[:, 2]]
+    p = pts[:, None, :]
+    # inside the prism over the triangle: distance to its plane
+    n = np.cross(b - a, c - a)
+    nn = np.einsum('ij,ij->i', n, n)
+    safe = np.where(nn > 0, nn, 1.0)
+    ap = p - a
+    inside = ((np.einsum('ptk,tk->pt', np.cross(b - a, ap), n) >= 0)
+              & (np.einsum('ptk,tk->pt', np.cross(c - b, p - b), n) >= 0)
+              & (np.einsum('ptk,tk->pt', np.cross(a - c, p - c), n) >= 0)
+              & (nn > 0))
+    plane = np.abs(np.einsum('ptk,tk->pt', ap, n)) / np.sqrt(safe)
+    # otherwise: nearest edge
+    best = np.full(inside.shape, np.inf)
+    for s, e in ((a, b), (b, c), (c, a)):
+        d = e - s
+        dd = np.einsum('ij,ij->i', d, d)
+        t = np.clip(np.einsum('ptk,tk->pt', p - s, d) / np.where(dd > 0, dd, 1.0), 0.0, 1.0)
+        closest = s + t[..., None] * d
+        best = np.minimum(best, np.linalg.norm(p - closest, axis=2))
+    return np.where(inside, np.minimum(plane, best), best).min(axis=1)
+
+
+def simplify_meshes(meshes, budget, weights=None, scales=None, max_error=None, pinned=None):
+    """Decimate several meshes together until sum(weight * triangles) <= budget.
+
+    `weights` counts each mesh's triangles (e.g. its instance count) and
+    `scales` converts its local units to tile units for the error (default 1).
+    `pinned` holds a boolean mask per mesh (or None) of vertices that are
+    never collapsed away. Collapses stop early once the quadric error would
+    exceed `max_error`. Returns (meshes, errors) with the Hausdorff error
+    per mesh.
+    """
+    meshes = list(meshes)
+    weights = [1] * len(meshes) if weights is None else list(weights)
+    scales = [1.0] * len(meshes) if scales is None else list(scales)
+    pinned = [None] * len(meshes) if pinned is None else list(pinned)
+    offsets = np.cumsum([0] + [m.vertex_count for m in meshes])
+    pos = np.vstack([m.positions.astype(np.float64) * s for m, s in zip(meshes, scales)]) if meshes else np.zeros((0, 3))
+    tris = (np.vstack([m.indices.astype(np.int64) + o for m, o in zip(meshes, offsets[:-1])])
+            if meshes else np.zeros((0, 3), dtype=np.int64))
+    tri_weight = np.concatenate([np.full(m.triangle_count, w, dtype=np.float64) for m, w in zip(meshes, weights)]) \
+        if meshes else np.zeros(0)
+    keep = np.concatenate([np.zeros(m.vertex_count, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+                           for m, mask in zip(meshes, pinned)]) if meshes else np.zeros(0, dtype=bool)
+    collapser = _Collapser(pos, tris, tri_weight.tolist(), _quadrics(pos, tris), keep.tolist())
+    collapser.run(budget, None if max_error is None else max_error ** 2)
+    kept = collapser.triangles()
+    out, errors = [], []
+    for k, mesh in enumerate(meshes):
+        lo, hi = offsets[k], offsets[k + 1]
+        mine = kept[(kept[:, 0] >= lo) & (kept[:, 0] < hi)] - lo
+        if len(mine) == mesh.triangle_count:
+            out.append(mesh)
+            errors.append(0.0)
+            continue
+        used = np.unique(mine)
+        remap = np.full(mesh.vertex_count, -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        simplified = geo.MeshData(mesh.positions[used], remap[mine], None if mesh.uvs is None else mesh.uvs[used])
+        out.append(simplified)
+        errors.append(float(point_surface_distance(mesh.positions, simplified).max()) * scales[k]
+                      if len(mine) else float('inf'))
+    return out, errors
+
+
+def triangle_count(parts, groups=()):
+    """Triangles a tile draws: parts plus every instance of every group."""
+    return (sum(p.mesh.triangle_count for p in parts)
+            + sum(g.mesh.triangle_count * g.count for g in groups or ()))
+
+
+def rim_vertices(mesh, radius=geo.HEX_RADIUS, thickness=geo.HEX_THICKNESS):
+    """Boolean mask of `mesh`'s vertices on the top rim of the hex (the outline at the top height)."""
+    pos = mesh.positions.astype(np.float64)
+    tol = 1e-5 * radius
+    on_outline = np.abs(geo.hex_edge_distance(pos[:, 0], pos[:, 1], radius)) <= tol
+    return on_outline & (np.abs(pos[:, 2] - thickness / 2.0) <= tol)
+
+
+def fit_budget(parts, groups=None, max_tris=None, max_error=None, seamless=False,
+               radius=geo.HEX_RADIUS, thickness=geo.HEX_THICKNESS):
+    """Decimate a tile's parts and instance prototypes until it has <= max_tris triangles.
+
+    Returns (parts, groups, stats) with new TileParts / InstanceGroups for
+    the meshes that changed and stats = {'triangles': (before, after),
+    'budget': max_tris, 'error': max distance}. Tiles already within budget
+    come back unchanged. A budget below what the meshes can reach (without
+    degenerating) leaves the tile over budget; `stats['triangles'][1]`
+    tells. With `seamless` the parts' top-rim vertices (`rim_vertices` of
+    a `radius` x `thickness` hex) are kept.
+    """
+    groups = list(groups or ())
+    before = triangle_count(parts, groups)
+    stats = {'triangles': (before, before), 'budget': max_tris, 'error': 0.0}
+    if not max_tris or before <= max_tris:
+        return parts, groups, stats
+    meshes = [p.mesh for p in parts] + [g.mesh for g in groups]
+    weights = [1] * len(parts) + [g.count for g in groups]
+    scales = [1.0] * len(parts) + [float(np.abs(g.scales).max()) if g.count else 1.0 for g in groups]
+    pinned = [rim_vertices(p.mesh, radius, thickness) for p in parts] if seamless else None
+    if pinned is not None:
+        pinned += [None] * len(groups)
+    simplified, errors = simplify_meshes(meshes, max_tris, weights, scales, max_error, pinned)
+    new_parts = [geo.TilePart(p.name, m, p.material) for p, m in zip(parts, simplified)]
+    new_groups = [geo.InstanceGroup(g.name, m, g.material, g.translations, g.scales, g.rotations)
+                  for g, m in zip(groups, simplified[len(parts):])]
+    stats['triangles'] = (before, triangle_count(new_parts, new_groups))
+    stats['error'] = round(max(errors), 6)
+    return new_parts, new_groups, stats
+
+
+def format_stats(name: str, stats) -> str:
+    """One report line: triangles before -> after against the budget, and the error introduced."""
+    before, after = stats['triangles']
+    over = '' if after <= stats['budget'] else ' (over budget)'
+    return f"{name}: triangles {before} -> {after} (budget {stats['budget']}){over}, max error {stats['error']:.4f}"
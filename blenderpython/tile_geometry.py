@@ -0,0 +1,1120 @@
+"""tile_geometry.py
+
+bpy-free geometry core for the hex tile generator.
+
+Every shape the Blender script used to build through bmesh / `bpy.ops`
+(hex prism, displaced top, rocks, grass tufts, trees) is produced here as
+NumPy vertex/index arrays. `generate_grassland_tiles.py` turns these arrays
+into Blender meshes; plain CPython callers (batch builds, exporters, tests of
+the geometry itself) can use them directly without starting Blender.
+
+CONVENTIONS
+===========
+- Coordinates are in Blender space: +Z is up, the hex point sits on +Y.
+  Exporters convert to glTF's Y-up frame (x, z, -y).
+- Tile-local: the hex is centered at the origin. Callers add any layout
+  offset (e.g. the side-by-side preview row in Blender).
+- Triangles are wound counter-clockwise when seen from outside.
+
+USAGE (plain CPython):
+    import tile_geometry as geo
+    parts = geo.build_tile_parts(0, {'tufts': 22, 'rocks': 2})
+    for part in parts:
+        print(part.name, part.material, part.mesh.triangle_count)
+"""
+
+import random
+from math import ceil, pi, sin, cos, sqrt
+
+import numpy as np
+
+import tile_rng
+from tile_noise import noise3_array
+from tile_profile import span
+
+
+# --- Parameters (aligned to repo defaults) ----------------------------------
+# NOTE: Keep in sync with `DEFAULT_HEX_SIZE` in the web project (coords.ts).
+HEX_RADIUS = 0.51
+HEX_THICKNESS = 0.08
+SEED = 42
+
+# Shared material definitions (name -> principled BSDF inputs). Both the
+# Blender adapter and the exporters read these so colours stay identical.
+MATERIALS = {
+    'Grass_Mat': {'base_color': (0.22, 0.55, 0.18, 1.0), 'metallic': 0.0, 'roughness': 0.9},
+    'Rock_Mat': {'base_color': (0.45, 0.45, 0.48, 1.0), 'metallic': 0.0, 'roughness': 0.8},
+    'Tuft_Mat': {'base_color': (0.16, 0.6, 0.12, 1.0), 'metallic': 0.0, 'roughness': 0.9},
+    'Trunk_Mat': {'base_color': (0.35, 0.2, 0.08, 1.0), 'metallic': 0.0, 'roughness': 0.9},
+    'Leaf_Mat': {'base_color': (0.12, 0.5, 0.14, 1.0), 'metallic': 0.0, 'roughness': 0.8},
+}
+
+# Material used for each role of a tile; biome recipes override these by role.
+DEFAULT_ROLE_MATERIALS = {
+    'ground': 'Grass_Mat',
+    'rock': 'Rock_Mat',
+    'tuft': 'Tuft_Mat',
+    'trunk': 'Trunk_Mat',
+    'leaf': 'Leaf_Mat',
+}
+
+# The hand-tuned grassland variations (tufts/rocks/tree mix per variant).
+GRASSLAND_VARIATIONS = [
+    {'tufts': 22, 'rocks': 2, 'tree_prob': 0.45, 'height_amp': 0.06},
+    {'tufts': 12, 'rocks': 5, 'rock_scale_mult': 1.6, 'tree_prob': 0.25, 'height_amp': 0.05},
+    {'tufts': 14, 'rocks': 3, 'tree_prob': 0.6, 'trunk_height': 0.2, 'crown_radius': 0.18, 'height_amp': 0.07},
+]
+
+
+def variation_params(index: int, variations=GRASSLAND_VARIATIONS):
+    """Return the params for variant `index`, cycling through `variations`.
+
+    Variants past the hand-tuned list reuse its params; they still differ
+    because the tile seed includes the index.
+    """
+    return dict(variations[index % len(variations)])
+
+
+class MeshData:
+    """Triangle mesh as NumPy arrays.
+
+    positions: (N, 3) float32
+    indices:   (M, 3) uint32, counter-clockwise
+    normals:   (N, 3) float32 smooth vertex normals (computed on demand)
+    uvs:       (N, 2) float32 or None
+    """
+
+    __slots__ = ('positions', 'indices', 'uvs', '_normals')
+
+    def __init__(self, positions, indices, uvs=None, normals=None):
+        self.positions = np.ascontiguousarray(positions, dtype=np.float32).reshape(-1, 3)
+        self.indices = np.ascontiguousarray(indices, dtype=np.uint32).reshape(-1, 3)
+        self.uvs = None if uvs is None else np.ascontiguousarray(uvs, dtype=np.float32).reshape(-1, 2)
+        self._normals = None if normals is None else np.ascontiguousarray(normals, dtype=np.float32).reshape(-1, 3)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.positions)
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.indices)
+
+    @property
+    def normals(self):
+        if self._normals is None:
+            self._normals = compute_vertex_normals(self.positions, self.indices)
+        return self._normals
+
+    def invalidate_normals(self):
+        """Drop cached normals after positions were edited in place."""
+        self._normals = None
+
+    def copy(self):
+        return MeshData(self.positions.copy(), self.indices.copy(),
+                        None if self.uvs is None else self.uvs.copy(),
+                        None if self._normals is None else self._normals.copy())
+
+    def translated(self, offset):
+        """Return a copy moved by `offset` (normals are unchanged by translation)."""
+        out = self.copy()
+        out.positions += np.asarray(offset, dtype=np.float32)
+        return out
+
+    def transformed(self, matrix):
+        """Return a copy with a 4x4 affine `matrix` applied to positions."""
+        m = np.asarray(matrix, dtype=np.float64)
+        pos = self.positions.astype(np.float64) @ m[:3, :3].T + m[:3, 3]
+        return MeshData(pos, self.indices.copy(), None if self.uvs is None else self.uvs.copy())
+
+
+class TilePart:
+    """One generated object of a tile: a mesh plus its material name."""
+
+    __slots__ = ('name', 'mesh', 'material')
+
+    def __init__(self, name: str, mesh: MeshData, material: str):
+        self.name = name
+        self.mesh = mesh
+        self.material = material
+
+    def __repr__(self):
+        return f'TilePart({self.name!r}, verts={self.mesh.vertex_count}, tris={self.mesh.triangle_count}, material={self.material!r})'
+
+
+def compute_vertex_normals(positions, indices):
+    """Area-weighted smooth vertex normals (matches Blender's shade smooth)."""
+    pos = np.asarray(positions, dtype=np.float64)
+    tri = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    normals = np.zeros_like(pos)
+    if len(tri):
+        a, b, c = pos[tri[:, 0]], pos[tri[:, 1]], pos[tri[:, 2]]
+        face_n = np.cross(b - a, c - a)
+        for k in range(3):
+            np.add.at(normals, tri[:, k], face_n)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, length, out=normals, where=length > 0)
+    return normals.astype(np.float32)
+
+
+def _rotation_x(angle):
+    c, s = cos(angle), sin(angle)
+    return np.array([[1, 0, 0, 0], [0, c, -s, 0], [0, s, c, 0], [0, 0, 0, 1]], dtype=np.float64)
+
+
+def _trs(location=(0, 0, 0), rotation=None, scale=(1, 1, 1)):
+    m = np.diag([scale[0], scale[1], scale[2], 1.0]).astype(np.float64)
+    if rotation is not None:
+        m = rotation @ m
+    m[:3, 3] = location
+    return m
+
+
+def _normalized_rows(v):
+    length = np.linalg.norm(v, axis=1, keepdims=True)
+    return np.divide(v, length, out=np.zeros_like(v), where=length > 0)
+
+
+# --- Primitives ---------------------------------------------------------------
+
+def hex_corners(radius=HEX_RADIUS):
+    """Return the 6 pointy-top corners as a (6, 2) array, first corner on +Y."""
+    angles = np.radians([0, 60, 120, 180, 240, 300])
+    return np.stack([radius * np.sin(angles), radius * np.cos(angles)], axis=1)
+
+
+def planar_uvs(positions, radius=HEX_RADIUS):
+    """Top-down planar UVs used by the hex tile ((x / r + 1) / 2, (y / r + 1) / 2)."""
+    return np.stack([(positions[:, 0] / radius + 1) * 0.5, (positions[:, 1] / radius + 1) * 0.5], axis=1)
+
+
+def axial_to_world(q, r, size=HEX_RADIUS):
+    """Center of axial hex (q, r) in Blender XY, matching `axialToWorld` in coords.ts.
+
+    The web layout puts tiles at (worldX, worldZ) on three.js' XZ plane; the
+    glTF export maps Blender (x, y) to (x, -y) there, so Y is negated here.
+    """
+    return size * np.sqrt(3.0) * (q + r / 2.0), -size * 1.5 * r
+
+
+def hex_edge_distance(x, y, radius=HEX_RADIUS):
+    """Distance from (x, y) to the nearest edge of the pointy-top hex (negative outside).
+
+    Works on scalars or arrays. Edge normals of a pointy-top hex point at 0,
+    60 and 120 degrees from +X.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    s = np.sqrt(3.0) / 2.0
+    reach = np.maximum(np.abs(x), np.maximum(np.abs(0.5 * x + s * y), np.abs(-0.5 * x + s * y)))
+    return radius * s - reach
+
+
+def hex_grid_vertex(k: int, m: int) -> int:
+    """Index of vertex `m` (0 <= m < 6k, wrapping) on ring `k` of a triangulated hex grid (ring 0 = center)."""
+    if k == 0:
+        return 0
+    return 1 + 3 * k * (k - 1) + m % (6 * k)
+
+
+def build_hex_grid(radius=HEX_RADIUS, resolution=2):
+    """Triangulated flat hex in the XY plane: a center vertex plus `resolution` rings.
+
+    Ring k has 6k vertices (corners plus k - 1 points per edge), so there are
+    1 + 3n(n + 1) vertices and 6n^2 triangles, all facing +Z. The last
+    6n vertices form the boundary, starting at the +Y corner, clockwise.
+    Returns (xy (V, 2), tris (T, 3)).
+    """
+    n = max(1, int(resolution))
+    corners = hex_corners(radius)
+    xy = [(0.0, 0.0)]
+    for k in range(1, n + 1):
+        for j in range(6):
+            c0, c1 = corners[j], corners[(j + 1) % 6]
+            for t in range(k):
+                f = t / k
+                xy.append(((c0[0] + (c1[0] - c0[0]) * f) * k / n, (c0[1] + (c1[1] - c0[1]) * f) * k / n))
+    tris = []
+    for k in range(1, n + 1):
+        for j in range(6):
+            outer = [hex_grid_vertex(k, j * k + t) for t in range(k + 1)]
+            inner = [hex_grid_vertex(k - 1, j * (k - 1) + t) for t in range(k)]
+            # rings run clockwise seen from above, so emit (a, c, b) to face +Z
+            for t in range(k):
+                tris.append((outer[t], inner[t], outer[t + 1]))
+            for t in range(k - 1):
+                tris.append((inner[t], inner[t + 1], outer[t + 1]))
+    return np.asarray(xy, dtype=np.float64), np.asarray(tris, dtype=np.int64)
+
+
+def build_base_hex(radius=HEX_RADIUS, thickness=HEX_THICKNESS, resolution=1) -> MeshData:
+    """POINTY-TOP hexagonal prism centered at origin.
+
+    resolution=1 (default) is the original 12-vertex prism: vertices 0-5 are
+    the top ring (z = +thickness / 2, corner 0 on +Y), 6-11 the bottom ring.
+    resolution=n > 1 replaces the top with a triangulated hex grid of n rings
+    (see `build_hex_grid`) so displacement shapes real terrain; the bottom is
+    a fan around a center vertex sharing the same boundary, keeping the
+    prism watertight. Top vertices always come first. The corners run
+    clockwise seen from above, so fans are emitted reversed to face +Z.
+    """
+    if resolution <= 1:
+        corners = hex_corners(radius)
+        top = np.column_stack([corners, np.full(6, thickness / 2.0)])
+        bottom = np.column_stack([corners, np.full(6, -thickness / 2.0)])
+        positions = np.vstack([top, bottom])
+        tris = []
+        for i in range(1, 5):
+            tris.append((0, i + 1, i))               # top, facing +Z
+            tris.append((6, 6 + i, 6 + i + 1))       # bottom, facing -Z
+        for i in range(6):
+            j = (i + 1) % 6
+            tris.append((i, j, 6 + j))               # sides, facing outward
+            tris.append((i, 6 + j, 6 + i))
+        return MeshData(positions, tris, uvs=planar_uvs(positions, radius))
+
+    xy, top_tris = build_hex_grid(radius, resolution)
+    n_top = len(xy)
+    n_ring = 6 * int(resolution)
+    boundary = np.arange(n_top - n_ring, n_top)
+    bottom_center = n_top
+    bottom_ring = n_top + 1 + np.arange(n_ring)
+    positions = np.vstack([
+        np.column_stack([xy, np.full(n_top, thickness / 2.0)]),
+        [(0.0, 0.0, -thickness / 2.0)],
+        np.column_stack([xy[boundary], np.full(n_ring, -thickness / 2.0)]),
+    ])
+    tris = [top_tris]
+    m = np.arange(n_ring)
+    m1 = (m + 1) % n_ring
+    tris.append(np.column_stack([np.full(n_ring, bottom_center), bottom_ring[m], bottom_ring[m1]]))  # bottom, -Z
+    tris.append(np.column_stack([boundary[m], boundary[m1], bottom_ring[m1]]))                       # sides
+    tris.append(np.column_stack([boundary[m], bottom_ring[m1], bottom_ring[m]]))
+    return MeshData(positions, np.vstack(tris), uvs=planar_uvs(positions, radius))
+
+
+def build_icosphere(radius=1.0, subdivisions=2) -> MeshData:
+    """Icosphere with Blender's `primitive_ico_sphere_add` subdivision semantics.
+
+    subdivisions=1 is the bare icosahedron (12 verts); each extra level splits
+    every triangle in four (subdivisions=2 -> 42 verts / 80 tris).
+    """
+    t = (1.0 + 5 ** 0.5) / 2.0
+    verts = [(-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0),
+             (0, -1, t), (0, 1, t), (0, -1, -t), (0, 1, -t),
+             (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1)]
+    faces = [(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+             (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+             (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+             (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)]
+    verts = [list(v) for v in verts]
+    for _ in range(max(0, subdivisions - 1)):
+        cache = {}
+
+        def midpoint(a, b):
+            key = (a, b) if a < b else (b, a)
+            idx = cache.get(key)
+            if idx is None:
+                va, vb = verts[a], verts[b]
+                verts.append([(va[0] + vb[0]) / 2, (va[1] + vb[1]) / 2, (va[2] + vb[2]) / 2])
+                idx = cache[key] = len(verts) - 1
+            return idx
+
+        new_faces = []
+        for a, b, c in faces:
+            ab, bc, ca = midpoint(a, b), midpoint(b, c), midpoint(c, a)
+            new_faces += [(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)]
+        faces = new_faces
+    pos = _normalized_rows(np.asarray(verts, dtype=np.float64)) * radius
+    return MeshData(pos, faces)
+
+
+def build_cylinder(radius=1.0, depth=2.0, vertices=8) -> MeshData:
+    """Capped cylinder centered at origin along Z (like `primitive_cylinder_add`)."""
+    ang = np.arange(vertices) * (2 * pi / vertices)
+    ring = np.stack([radius * np.cos(ang), radius * np.sin(ang)], axis=1)
+    top = np.column_stack([ring, np.full(vertices, depth / 2.0)])
+    bottom = np.column_stack([ring, np.full(vertices, -depth / 2.0)])
+    positions = np.vstack([top, bottom])
+    n = vertices
+    tris = []
+    for i in range(1, n - 1):
+        tris.append((0, i, i + 1))               # top cap (ring is CCW from above)
+        tris.append((n, n + i + 1, n + i))       # bottom cap
+    for i in range(n):
+        j = (i + 1) % n
+        tris.append((i, n + i, n + j))
+        tris.append((i, n + j, j))
+    return MeshData(positions, tris)
+
+
+def build_plane(size=1.0) -> MeshData:
+    """Single quad in the XY plane, vertex order matching `primitive_plane_add`."""
+    h = size / 2.0
+    positions = [(-h, -h, 0), (h, -h, 0), (-h, h, 0), (h, h, 0)]
+    return MeshData(positions, [(0, 1, 3), (0, 3, 2)])
+
+
+# --- Displacement -------------------------------------------------------------
+
+def shape_height(x, y, wx, wy, radius=HEX_RADIUS, shape=None):
+    """Deterministic relief added on top of the noise (scalars or arrays).
+
+    shape keys (all optional, 0 = off):
+    - peak: height of a central mound that falls to zero on every hex edge
+      (hills, mountains).
+    - dune_amp / dune_freq / dune_angle: parallel sine ridges sampled at the
+      world position (wx, wy), so dunes continue across map-baked tiles.
+    """
+    h = np.zeros(np.broadcast(x, y).shape)
+    if not shape:
+        return h
+    if shape.get('peak'):
+        t = np.clip(hex_edge_distance(x, y, radius) / (radius * np.sqrt(3.0) / 2.0), 0.0, 1.0)
+        h = h + shape['peak'] * t * t
+    if shape.get('dune_amp'):
+        angle = np.radians(shape.get('dune_angle', 30.0))
+        along = wx * np.cos(angle) + wy * np.sin(angle)
+        h = h + shape['dune_amp'] * np.sin(2 * pi * shape.get('dune_freq', 2.0) * along)
+    return h
+
+
+def top_displacement(x, y, amplitude=0.06, scale=1.5, seed=0, offset=(0.0, 0.0), radius=HEX_RADIUS, edge_band=0.0,
+                     shape=None):
+    """Vertical displacement of the tile top at tile-local (x, y) (scalars or arrays).
+
+    Noise is sampled at the world position (x + offset) so tiles baked at
+    their map position share one continuous field. With edge_band > 0 the
+    displacement fades to exactly zero on the hex boundary (smoothstep over
+    `edge_band` inward), pinning edges to the flat top so any tile can sit
+    next to any other without cracks. `shape` adds biome relief
+    (see `shape_height`) before the edge fade.
+    """
+    wx, wy = np.asarray(x, dtype=np.float64) + offset[0], np.asarray(y, dtype=np.float64) + offset[1]
+    disp = noise3_array(wx * scale + seed, wy * scale + seed, seed) * amplitude
+    if shape:
+        disp = disp + shape_height(x, y, wx, wy, radius, shape)
+    if edge_band > 0:
+        t = np.clip(hex_edge_distance(x, y, radius) / edge_band, 0.0, 1.0)
+        disp = disp * (t * t * (3.0 - 2.0 * t))
+    return disp
+
+
+def displace_top(mesh: MeshData, amplitude=0.06, scale=1.5, seed=0,
+                 offset=(0.0, 0.0), radius=HEX_RADIUS, edge_band=0.0, shape=None) -> MeshData:
+    """Noise-displace vertices with local Z >= 0 in place and return the mesh.
+
+    Each vertex moves by `noise * amplitude` along +Z plus 15% of that
+    outward from the center, sampled at (x * scale + seed, y * scale + seed, seed).
+    Noise is evaluated for all top vertices in one batched call. `offset`,
+    `edge_band` and `shape` select world-space sampling, pinned edges and
+    biome relief (see `top_displacement`); the defaults keep the original
+    per-tile behaviour.
+    """
+    pos = mesh.positions.astype(np.float64)
+    top = pos[:, 2] >= 0
+    x, y = pos[top, 0], pos[top, 1]
+    disp = top_displacement(x, y, amplitude, scale, seed, offset, radius, edge_band, shape)
+    pos[top, 0], pos[top, 1] = _displaced_xy(x, y, disp)
+    pos[top, 2] += disp
+    mesh.positions[:] = pos
+    mesh.invalidate_normals()
+    return mesh
+
+
+def _displaced_xy(x, y, disp):
+    """Lateral part of the top displacement: 15% of `disp` outward from the center."""
+    length = np.hypot(x, y)
+    safe = np.where(length > 0, length, 1.0)
+    lateral = np.where(length > 0, disp * 0.15 / safe, 0.0)
+    return x + x * lateral, y + y * lateral
+
+
+def top_surface_points(plan, x, y):
+    """Displaced top-surface points (..., 3) of a planned tile for undisplaced tile-local (x, y) arrays.
+
+    Exactly where `build_tile_base` moves a top vertex that starts at (x, y),
+    so sampling a fine grid gives the tile's full-resolution surface.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    disp = top_displacement(x, y, plan['height_amp'], plan['noise_scale'], plan['displace_seed'],
+                            plan.get('offset', (0.0, 0.0)), plan['radius'], plan.get('edge_band', 0.0),
+                            plan.get('shape'))
+    dx, dy = _displaced_xy(x, y, disp)
+    return np.stack([dx, dy, plan['thickness'] / 2 + disp], axis=-1)
+
+
+def roughen_radial(mesh: MeshData, frequency, strength, seed=0) -> MeshData:
+    """Push vertices along their direction from the origin by noise(co * frequency + seed) * strength."""
+    pos = mesh.positions.astype(np.float64)
+    n = noise3_array(pos[:, 0] * frequency + seed, pos[:, 1] * frequency + seed, pos[:, 2] * frequency + seed)
+    length = np.linalg.norm(pos, axis=1)
+    k = np.where(length > 0, n * strength / np.where(length > 0, length, 1.0), 0.0)
+    mesh.positions[:] = pos + pos * k[:, None]
+    mesh.invalidate_normals()
+    return mesh
+
+
+# --- Merging ------------------------------------------------------------------
+
+def merge_meshes(meshes) -> MeshData:
+    """Concatenate meshes into one, offsetting indices. UVs are kept only if every input has them."""
+    meshes = list(meshes)
+    if not meshes:
+        return MeshData(np.zeros((0, 3)), np.zeros((0, 3)))
+    offsets = np.cumsum([0] + [m.vertex_count for m in meshes[:-1]])
+    positions = np.vstack([m.positions for m in meshes])
+    indices = np.vstack([m.indices + np.uint32(o) for m, o in zip(meshes, offsets)])
+    normals = np.vstack([m.normals for m in meshes])
+    uvs = np.vstack([m.uvs for m in meshes]) if all(m.uvs is not None for m in meshes) else None
+    return MeshData(positions, indices, uvs=uvs, normals=normals)
+
+
+def merge_parts_by_material(parts, name=None):
+    """Join parts into one TilePart per material, in first-seen material order.
+
+    Each input keeps its own smooth normals (no welding across objects), so
+    the merged result shades exactly like the separate objects did. The
+    merged parts are all named `name` (default: the first part's name).
+    """
+    parts = list(parts)
+    if not parts:
+        return []
+    name = name or parts[0].name
+    by_material = {}
+    for part in parts:
+        by_material.setdefault(part.material, []).append(part.mesh)
+    return [TilePart(name, merge_meshes(meshes), material) for material, meshes in by_material.items()]
+
+
+# --- Scatter objects ----------------------------------------------------------
+
+def build_rock(location=(0, 0, 0), scale=0.07, seed=0) -> MeshData:
+    """Low-poly rock: icosphere displaced by noise, then moved to `location`."""
+    rock = build_icosphere(radius=scale, subdivisions=2)
+    roughen_radial(rock, 3, scale * 0.35, seed)
+    return rock.translated(location)
+
+
+def draw_tuft_bend(rng=random):
+    """Draw the (x bend, z lift) pair for each of the tuft's two top vertices."""
+    return [(rng.uniform(-0.02, 0.02) + 0.02, rng.uniform(0.01, 0.03)) for _ in range(2)]
+
+
+def tuft_prototype_bends(seed=SEED, variants=4):
+    """The bends of the run's tuft prototypes (`build_scatter_prototypes`), in prototype order.
+
+    Planned tufts take their bend from this set, so a tuft has the same
+    shape whether it is built on its own or drawn as a prototype instance.
+    """
+    proto_rng = random.Random(seed)
+    return [draw_tuft_bend(proto_rng) for _ in range(max(1, variants))]
+
+
+def build_tuft(location=(0, 0, 0), scale=0.06, rng=random, bend=None) -> MeshData:
+    """Grass tuft: a bent unit plane, scaled thin and stood upright at `location`.
+
+    `bend` comes from `draw_tuft_bend`; when omitted it is drawn from `rng`
+    (two values per top vertex, in the same order the Blender version did).
+    The bend is applied to the unit plane, so the shape scales with the
+    tuft: a tuft built at `scale` equals the unit-scale prototype scaled by
+    `scale` (the instanced path).
+    """
+    if bend is None:
+        bend = draw_tuft_bend(rng)
+    plane = build_plane(1.0)
+    pos = plane.positions
+    top = [i for i in range(len(pos)) if pos[i, 1] > 0]
+    for i, (dx, dz) in zip(top, bend):
+        pos[i, 0] += dx
+        pos[i, 2] += dz
+    matrix = _trs(location, _rotation_x(pi / 2), (scale * 0.25, scale * 0.02, scale))
+    return plane.transformed(matrix)
+
+
+def build_tree(location=(0, 0, 0), trunk_height=0.18, crown_radius=0.16, seed=0):
+    """Low-poly tree: 8-sided trunk + roughened icosphere crown. Returns (trunk, crown)."""
+    trunk = build_cylinder(radius=trunk_height * 0.12, depth=trunk_height, vertices=8)
+    trunk = trunk.translated((location[0], location[1], location[2] + trunk_height / 2))
+    crown = build_icosphere(radius=crown_radius, subdivisions=2)
+    roughen_radial(crown, 2, crown_radius * 0.12, seed)
+    crown = crown.translated((location[0], location[1], location[2] + trunk_height + crown_radius * 0.6))
+    return trunk, crown
+
+
+def random_point_on_hex(radius=HEX_RADIUS, margin=0.0, rng=random):
+    """Return a random (x, y) point by rejection sampling within a circle then an axial bounds test.
+
+    Legacy sampler kept so params['sampler'] = 'legacy' reproduces old
+    layouts: its bounds test is flat-top and points may overlap. New code
+    should use `sample_in_hex` / `poisson_disk_hex`.
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        r = rng.random() ** 0.5 * (radius - margin)
+        theta = rng.random() * 2 * pi
+        x = r * cos(theta)
+        y = r * sin(theta)
+        q = (2.0 / 3.0) * x / radius
+        r_ax = (-1.0 / 3.0) * x / radius + (1.0 / 3.0) * (2 ** 0.5) * y / radius
+        if abs(q) <= 1.0 and abs(r_ax) <= 1.0:
+            return x, y
+        if attempts > 50:
+            # give up and return a near-center point
+            return x * 0.5, y * 0.5
+
+
+_SQRT3_2 = sqrt(3.0) / 2.0
+# Spacing of a counted Poisson class as a fraction of sqrt(area / count): about half of what
+# random dart throwing can fill, so the count is reached in a few darts per point.
+COUNT_SPACING = 0.6
+
+
+def sample_in_hex(radius=HEX_RADIUS, rng=random):
+    """Exact uniform (x, y) inside the pointy-top hex: pick one of its 6 triangles, then a barycentric point."""
+    k = min(5, int(rng.random() * 6))
+    u, v = rng.random(), rng.random()
+    if u + v > 1.0:
+        u, v = 1.0 - u, 1.0 - v
+    a0, a1 = pi / 3 * k, pi / 3 * (k + 1)
+    return (radius * (u * sin(a0) + v * sin(a1)), radius * (u * cos(a0) + v * cos(a1)))
+
+
+def density_map(spec, radius=HEX_RADIUS, seed=0):
+    """Build a density function (x, y) -> [0, 1] from a recipe spec, or None for uniform.
+
+    spec keys (all optional):
+    - noise_scale / contrast: 0.5 + contrast * noise(x * noise_scale + seed, ...)
+      clusters objects in patches (contrast 0.5 = full range, default 0.5).
+    - radial: > 0 favours the center, < 0 the rim (-1..1).
+    """
+    if not spec:
+        return None
+    apothem = radius * sqrt(3.0) / 2.0
+    noise_scale = spec.get('noise_scale')
+    contrast = spec.get('contrast', 0.5)
+    radial = spec.get('radial', 0.0)
+
+    def density(x, y):
+        d = 1.0
+        if noise_scale:
+            d = 0.5 + contrast * float(noise3_array(x * noise_scale + seed, y * noise_scale + seed, seed))
+        if radial:
+            t = float(hex_edge_distance(x, y, radius)) / apothem
+            d *= 1.0 + radial * (2.0 * t - 1.0)
+        return min(1.0, max(0.0, d))
+    return density
+
+
+def poisson_disk_hex(radius=HEX_RADIUS, classes=(), rng=random, k=30):
+    """Multi-class Poisson-disk (blue-noise) scatter inside a pointy-top hex.
+
+    classes: dicts, placed in order (put large objects first):
+      kind      key of the result
+      min_dist  spacing to points of the same class; two classes keep
+                (min_dist_a + min_dist_b) / 2 apart
+      extent    fraction of `radius` the class may use (default 1)
+      margin    extra inset from that hex's edge
+      count     place at most this many; None fills the class's area
+      density   optional (x, y) -> [0, 1] acceptance probability
+      rng       optional generator for this class instead of `rng`
+
+    A class without a count is grown with Bridson's algorithm (k annulus
+    candidates per active point) into a maximal set. A class with a count
+    throws at most k * count uniform darts and stops once count points
+    fit; its own spacing grows to COUNT_SPACING * sqrt(area / count) (never
+    below min_dist), so the points spread over the whole area and darts
+    rarely miss. Growing the maximal set and keeping a few of its points
+    cost thousands of candidates per tile. Every class keeps a background
+    grid of cell spacing / sqrt(2) (at most one point per cell), so each
+    candidate checks a constant number of cells and a run is linear in the
+    number of points. Returns {kind: [(x, y), ...]}.
+    """
+    out = {}
+    apothem = radius * _SQRT3_2
+    grids = []  # (cell, min_dist, {cell: (x, y)}) per placed class
+
+    for cls in classes:
+        count = cls.get('count')
+        limit = apothem * cls.get('extent', 1.0) - cls.get('margin', 0.0)
+        if (count is not None and count <= 0) or limit <= 0:
+            out[cls['kind']] = []
+            continue
+        min_dist = r = cls['min_dist']
+        if count is not None:
+            r = max(r, COUNT_SPACING * sqrt(2.0 * sqrt(3.0) * limit * limit / count))
+        cell = r / sqrt(2.0)
+        own = {}
+        density = cls.get('density')
+        crng = cls.get('rng', rng)
+        checks = [(c, int(ceil((min_dist + d) / 2.0 / c)), ((min_dist + d) / 2.0) ** 2, g) for c, d, g in grids]
+        checks.append((cell, 2, r * r, own))
+
+        def fits(x, y):
+            # scalar form of hex_edge_distance(x, y, radius) >= apothem - limit
+            if abs(x) > limit or abs(0.5 * x + _SQRT3_2 * y) > limit or abs(-0.5 * x + _SQRT3_2 * y) > limit:
+                return False
+            for c, reach, need2, grid in checks:
+                gx, gy = int(x // c), int(y // c)
+                for i in range(gx - reach, gx + reach + 1):
+                    for j in range(gy - reach, gy + reach + 1):
+                        other = grid.get((i, j))
+                        if other is not None and (other[0] - x) ** 2 + (other[1] - y) ** 2 < need2:
+                            return False
+            return density is None or crng.random() < density(x, y)
+
+        points, active = [], []
+
+        def add(x, y):
+            own[(int(x // cell), int(y // cell))] = (x, y)
+            points.append((x, y))
+            active.append(len(points) - 1)
+
+        if count is not None:
+            for _ in range(k * count):
+                x, y = sample_in_hex(limit / _SQRT3_2, crng)
+                if fits(x, y):
+                    add(x, y)
+                    if len(points) == count:
+                        break
+        while count is None:
+            # seed (and reseed pockets Bridson growth cannot reach) with uniform darts
+            for _ in range(k):
+                x, y = sample_in_hex(radius, crng)
+                if fits(x, y):
+                    add(x, y)
+                    break
+            if not active:
+                break
+            while active:
+                a = int(crng.random() * len(active))
+                px, py = points[active[a]]
+                for _ in range(k):
+                    rho = r * sqrt(1.0 + 3.0 * crng.random())  # uniform by area in [r, 2r]
+                    theta = crng.random() * 2 * pi
+                    x, y = px + rho * cos(theta), py + rho * sin(theta)
+                    if fits(x, y):
+                        add(x, y)
+                        break
+                else:
+                    active[a] = active[-1]
+                    active.pop()
+
+        grids.append((cell, min_dist, own))
+        out[cls['kind']] = points
+    return out
+
+
+# --- Tiles --------------------------------------------------------------------
+
+def ground_material_for_tile(index: int, rng=random, base_name='Grass_Mat', base_color=None):
+    """Return (name, spec) for a per-tile ground material (`<base_name>_v<index>`) with tiny colour/roughness jitter."""
+    if base_color is None:
+        base_color = MATERIALS[base_name]['base_color']
+    jitter = (rng.uniform(-0.03, 0.03), rng.uniform(-0.03, 0.03), rng.uniform(-0.03, 0.03), 0)
+    color = tuple(max(0.0, min(1.0, base_color[i] + jitter[i])) for i in range(4))
+    rough = max(0.2, min(1.0, 0.85 + rng.uniform(-0.12, 0.12)))
+    return f'{base_name}_v{index}', {'base_color': color, 'metallic': 0.0, 'roughness': rough}
+
+
+def tile_stream(params, seed, seed_offset, index, *name, rng=random):
+    """Generator for one named draw of a tile (e.g. 'ground', 'material').
+
+    A counter-based `tile_rng.Stream` keyed by (seed, seed_offset, index,
+    *name), so the draw does not depend on anything drawn before it; with
+    params['sampler'] = 'legacy' the shared sequential `rng` instead, so
+    legacy tiles keep their original draw order.
+    """
+    if (params or {}).get('sampler', 'poisson') == 'legacy':
+        return rng
+    return tile_rng.Stream(seed, seed_offset, index, *name)
+
+
+def grass_material_for_tile(index: int, rng=random, base_color=MATERIALS['Grass_Mat']['base_color']):
+    """Return (name, spec) for a per-tile grass material with tiny colour/roughness jitter."""
+    return ground_material_for_tile(index, rng, 'Grass_Mat', base_color)
+
+
+def plan_surface(index: int, params=None, seed=SEED, seed_offset=0,
+                 radius=HEX_RADIUS, thickness=HEX_THICKNESS):
+    """The surface part of `plan_tile`: displacement and material settings, no placements.
+
+    Draws nothing from any rng, so tools that only need the tile's ground
+    (e.g. `tile_bake`) can evaluate it without replaying the scatter.
+    """
+    if params is None:
+        params = {}
+    plan = {
+        'index': index,
+        'radius': radius,
+        'thickness': thickness,
+        'height_amp': params.get('height_amp', 0.06),
+        'noise_scale': params.get('noise_scale', 1.5),
+        'displace_seed': seed + index + seed_offset,
+        'resolution': params.get('resolution', 1),
+        'offset': (0.0, 0.0),
+        'edge_band': 0.0,
+        'tile_name': params.get('tile_name', 'grassland_tile'),
+        'shape': dict(params.get('shape') or {}),
+        'materials': dict(DEFAULT_ROLE_MATERIALS, **params.get('materials', {})),
+        'placements': [],
+    }
+    if params.get('seamless'):
+        plan['edge_band'] = params.get('edge_band', 0.2) * radius
+        if params.get('axial') is not None:
+            q, r = params['axial']
+            plan['offset'] = axial_to_world(q, r, radius)
+            plan['displace_seed'] = seed + seed_offset
+    return plan
+
+
+def plan_tile(index: int, params=None, seed=SEED, seed_offset=0,
+              radius=HEX_RADIUS, thickness=HEX_THICKNESS, rng=random):
+    """Draw every random decision of one tile variation without building geometry.
+
+    Returns a dict with the top displacement settings and a list of
+    placements ({'kind', 'name', 'location', 'scale', ...}) in tile-local
+    coordinates. Every random decision comes from its own counter-based
+    stream keyed by (seed, seed_offset, index, object class[, instance])
+    (see `tile_rng`), so e.g. changing the rock count leaves every tuft's
+    size and shape alone, any part of a plan can be regenerated on its own
+    and results never depend on draw order or process. Layout only couples
+    classes through spacing: each class keeps its distance to the classes
+    placed before it.
+
+    With params['resolution'] > 1 the top is a real displaced surface, so
+    placements sit on it (`surface_height`) instead of the flat top plane.
+
+    With params['seamless'] the top's edges are pinned flat (band of
+    params['edge_band'] x radius, default 0.2) so variants tile without
+    cracks. Giving params['axial'] = (q, r) additionally samples noise at
+    the tile's map position with one seed shared by every tile, so
+    neighbouring tiles continue the same terrain across their shared edge.
+
+    Scatter positions come from `poisson_disk_hex` (params['sampler'] =
+    'poisson', the default): objects keep per-class spacing
+    (params['rock_spacing'], 'tuft_spacing', 'tree_spacing') and may follow
+    params['density'] = {kind: density spec} (see `density_map`). 'tufts'
+    and 'rocks' are upper bounds when the spacing cannot fit that many.
+    params['sampler'] = 'legacy' reproduces the original rejection-sampled
+    layouts: it reseeds `rng` with `seed + seed_offset + index` and draws
+    everything from it in the original Blender order.
+
+    Biome recipes (see `tile_biomes.py`) add: params['materials'] (role ->
+    material name for ground/rock/tuft/trunk/leaf), params['tile_name'] (base
+    part name prefix, default 'grassland_tile'), params['shape'] (relief,
+    see `shape_height`) and params['trees'] (a fixed number of trees with
+    +-20% size jitter instead of the single `tree_prob` tree).
+    """
+    if params is None:
+        params = {}
+    plan = plan_surface(index, params, seed, seed_offset, radius, thickness)
+    placements = plan['placements']
+    mats = plan['materials']
+
+    def ground(x, y):
+        if plan['resolution'] <= 1:
+            return thickness / 2
+        return surface_height(plan, x, y)
+
+    if params.get('sampler', 'poisson') != 'legacy':
+        with span('plan.scatter'):
+            _plan_scatter_poisson(plan, params, seed, seed_offset, index, ground)
+        return plan
+
+    rng.seed(seed + seed_offset + index)
+
+    for i in range(params.get('rocks', 3)):
+        rx, ry = random_point_on_hex(radius=radius * 0.7, margin=0.02, rng=rng)
+        rock_scale = rng.uniform(0.045, 0.12) * params.get('rock_scale_mult', 1.0)
+        placements.append({'kind': 'rock', 'name': f'rock_{i}', 'location': (rx, ry, ground(rx, ry) + 0.01),
+                           'scale': rock_scale, 'seed': seed + i + index, 'material': mats['rock']})
+
+    for i in range(params.get('tufts', 18)):
+        tx, ty = random_point_on_hex(radius=radius * 0.92, margin=0.02, rng=rng)
+        tuft_scale = rng.uniform(0.04, 0.09)
+        placements.append({'kind': 'tuft', 'name': f'tuft_{i}', 'location': (tx, ty, ground(tx, ty) + 0.002),
+                           'scale': tuft_scale, 'bend': draw_tuft_bend(rng), 'material': mats['tuft']})
+
+    tree_materials = (mats['trunk'], mats['leaf'])
+    if 'trees' in params:
+        for i in range(params['trees']):
+            tx, ty = random_point_on_hex(radius=radius * 0.8, margin=0.05, rng=rng)
+            size = rng.uniform(0.8, 1.2)
+            placements.append({'kind': 'tree', 'name': f'tree_{i}', 'location': (tx, ty, ground(tx, ty)),
+                               'trunk_height': params.get('trunk_height', 0.16) * size,
+                               'crown_radius': params.get('crown_radius', 0.14) * size,
+                               'materials': tree_materials})
+    elif rng.random() < params.get('tree_prob', 0.35):
+        tx, ty = random_point_on_hex(radius=radius * 0.6, margin=0.05, rng=rng)
+        placements.append({'kind': 'tree', 'name': 'tree', 'location': (tx, ty, ground(tx, ty)),
+                           'trunk_height': params.get('trunk_height', 0.16),
+                           'crown_radius': params.get('crown_radius', 0.14),
+                           'materials': tree_materials})
+    return plan
+
+
+def _plan_scatter_poisson(plan, params, seed, seed_offset, index, ground):
+    """Fill plan['placements'] from one multi-class Poisson-disk pass (see `plan_tile`).
+
+    Each class grows from its own stream and per-instance attributes are
+    batch draws indexed by instance.
+    """
+    radius, mats = plan['radius'], plan['materials']
+    crown_radius = params.get('crown_radius', 0.14)
+
+    def key(*name):
+        return tile_rng.key(seed, seed_offset, index, *name)
+
+    if 'trees' in params:
+        n_trees, tree_extent = params['trees'], 0.8
+    else:
+        n_trees = int(tile_rng.uniforms(key('tree', 'presence'), 1)[0] < params.get('tree_prob', 0.35))
+        tree_extent = 0.6
+    density = params.get('density') or {}
+    classes = [
+        {'kind': 'tree', 'min_dist': params.get('tree_spacing', crown_radius * 1.5), 'extent': tree_extent,
+         'margin': 0.05, 'count': n_trees},
+        {'kind': 'rock', 'min_dist': params.get('rock_spacing', 0.12 * params.get('rock_scale_mult', 1.0)),
+         'extent': 0.7, 'margin': 0.02, 'count': params.get('rocks', 3)},
+        {'kind': 'tuft', 'min_dist': params.get('tuft_spacing', 0.06), 'extent': 0.92, 'margin': 0.02,
+         'count': params.get('tufts', 18)},
+    ]
+    with span('plan.density'):
+        for k, cls in enumerate(classes):
+            cls['density'] = density_map(density.get(cls['kind']), radius, plan['displace_seed'] + 7 * (k + 1))
+            cls['rng'] = tile_rng.Stream(seed, seed_offset, index, 'layout', cls['kind'])
+    with span('plan.poisson'):
+        points = poisson_disk_hex(radius, classes)
+    placements = plan['placements']
+
+    rock_scales = tile_rng.uniform(key('rock', 'scale'), len(points['rock']), 0.045, 0.12)
+    for i, (rx, ry) in enumerate(points['rock']):
+        placements.append({'kind': 'rock', 'name': f'rock_{i}', 'location': (rx, ry, ground(rx, ry) + 0.01),
+                           'scale': float(rock_scales[i]) * params.get('rock_scale_mult', 1.0),
+                           'seed': seed + i + index, 'material': mats['rock']})
+    n_tufts = len(points['tuft'])
+    tuft_scales = tile_rng.uniform(key('tuft', 'scale'), n_tufts, 0.04, 0.09)
+    bends = tuft_prototype_bends(seed)
+    shapes = (tile_rng.uniforms(key('tuft', 'shape'), n_tufts) * len(bends)).astype(int)
+    for i, (tx, ty) in enumerate(points['tuft']):
+        placements.append({'kind': 'tuft', 'name': f'tuft_{i}', 'location': (tx, ty, ground(tx, ty) + 0.002),
+                           'scale': float(tuft_scales[i]), 'variant': int(shapes[i]), 'bend': bends[shapes[i]],
+                           'material': mats['tuft']})
+    sizes = tile_rng.uniform(key('tree', 'size'), len(points['tree']), 0.8, 1.2)
+    for i, (tx, ty) in enumerate(points['tree']):
+        size = float(sizes[i]) if 'trees' in params else 1.0
+        placements.append({'kind': 'tree', 'name': f'tree_{i}' if 'trees' in params else 'tree',
+                           'location': (tx, ty, ground(tx, ty)),
+                           'trunk_height': params.get('trunk_height', 0.16) * size,
+                           'crown_radius': crown_radius * size,
+                           'materials': (mats['trunk'], mats['leaf'])})
+
+
+def surface_height(plan, x, y) -> float:
+    """Top-surface Z of a planned tile at (x, y), from the same noise as `displace_top`.
+
+    Ignores the small lateral shift of displaced vertices, which is well
+    below scatter placement precision.
+    """
+    disp = top_displacement(x, y, plan['height_amp'], plan['noise_scale'], plan['displace_seed'],
+                            plan.get('offset', (0.0, 0.0)), plan['radius'], plan.get('edge_band', 0.0),
+                            plan.get('shape'))
+    return plan['thickness'] / 2 + float(disp)
+
+
+def build_tile_base(plan, resolution=None) -> TilePart:
+    """Build the displaced hex base of a planned tile (resolution defaults to the plan's)."""
+    if resolution is None:
+        resolution = plan['resolution']
+    with span('base.hex'):
+        base = build_base_hex(plan['radius'], plan['thickness'], resolution)
+    with span('base.displace'):
+        displace_top(base, amplitude=plan['height_amp'], scale=plan['noise_scale'], seed=plan['displace_seed'],
+                     offset=plan.get('offset', (0.0, 0.0)), radius=plan['radius'],
+                     edge_band=plan.get('edge_band', 0.0), shape=plan.get('shape'))
+    return TilePart(f"{plan.get('tile_name', 'grassland_tile')}_{plan['index']}", base, plan.get('materials', DEFAULT_ROLE_MATERIALS)['ground'])
+
+
+def build_placement_parts(placement):
+    """Build the unique mesh part(s) for one planned placement."""
+    kind = placement['kind']
+    with span('scatter.' + kind):
+        return _build_placement_parts(kind, placement)
+
+
+def _build_placement_parts(kind, placement):
+    if kind == 'rock':
+        mesh = build_rock(placement['location'], scale=placement['scale'], seed=placement['seed'])
+        return [TilePart(placement['name'], mesh, placement.get('material', 'Rock_Mat'))]
+    if kind == 'tuft':
+        mesh = build_tuft(placement['location'], scale=placement['scale'], bend=placement['bend'])
+        return [TilePart(placement['name'], mesh, placement.get('material', 'Tuft_Mat'))]
+    if kind == 'tree':
+        trunk, crown = build_tree(placement['location'], trunk_height=placement['trunk_height'],
+                                  crown_radius=placement['crown_radius'])
+        trunk_mat, leaf_mat = placement.get('materials', ('Trunk_Mat', 'Leaf_Mat'))
+        return [TilePart(f"{placement['name']}_trunk", trunk, trunk_mat),
+                TilePart(f"{placement['name']}_crown", crown, leaf_mat)]
+    raise ValueError('Unknown placement kind: ' + str(kind))
+
+
+def build_tile_parts(index: int, params=None, seed=SEED, seed_offset=0,
+                     radius=HEX_RADIUS, thickness=HEX_THICKNESS, rng=random):
+    """Generate one tile variation as a list of TileParts (tile-local coordinates).
+
+    Mirrors the Blender `build_variation`: the displaced hex first, then one
+    unique mesh per rock, tuft and tree placement from `plan_tile`.
+    """
+    with span('plan'):
+        plan = plan_tile(index, params, seed, seed_offset, radius, thickness, rng)
+    parts = [build_tile_base(plan)]
+    for placement in plan['placements']:
+        parts += build_placement_parts(placement)
+    return parts
+
+
+# --- LOD ----------------------------------------------------------------------
+
+# LOD0 is the full tile; coarser levels reduce the top grid and drop the
+# smallest scatter. Every level shares the same plan, so rocks and the tree
+# stay put when the runtime switches levels.
+DEFAULT_LODS = (
+    {'resolution': 8},
+    {'resolution': 3},
+    {'resolution': 1, 'drop': ('tuft',)},
+)
+
+
+def build_tile_lods(index: int, params=None, seed=SEED, seed_offset=0,
+                    radius=HEX_RADIUS, thickness=HEX_THICKNESS, rng=random, lods=DEFAULT_LODS):
+    """Generate one tile variation at several levels of detail.
+
+    Returns a list (LOD0 first) of TilePart lists. Scatter is placed on the
+    LOD0 surface, so every level shares the same placements.
+    """
+    params = dict(params or {})
+    params['resolution'] = lods[0].get('resolution', 1)
+    with span('plan'):
+        plan = plan_tile(index, params, seed, seed_offset, radius, thickness, rng)
+    levels = []
+    for lod in lods:
+        parts = [build_tile_base(plan, lod.get('resolution', 1))]
+        drop = lod.get('drop', ())
+        for placement in plan['placements']:
+            if placement['kind'] not in drop:
+                parts += build_placement_parts(placement)
+        levels.append(parts)
+    return levels
+
+
+# --- Instancing ---------------------------------------------------------------
+
+# Rock prototypes are built at a typical rock size so their noise frequency
+# matches the per-rock meshes; instances scale them by `scale / ROCK_PROTOTYPE_SCALE`.
+# Crowns work the same way with CROWN_PROTOTYPE_RADIUS.
+ROCK_PROTOTYPE_SCALE = 0.08
+CROWN_PROTOTYPE_RADIUS = 0.14
+
+
+class InstanceGroup:
+    """One prototype mesh drawn at many transforms (glTF EXT_mesh_gpu_instancing).
+
+    translations: (K, 3) float32
+    scales:       (K, 3) float32
+    rotations:    (K, 4) float32 quaternions (x, y, z, w) or None for identity
+    """
+
+    __slots__ = ('name', 'mesh', 'material', 'translations', 'scales', 'rotations')
+
+    def __init__(self, name: str, mesh: MeshData, material: str, translations, scales, rotations=None):
+        self.name = name
+        self.mesh = mesh
+        self.material = material
+        self.translations = np.asarray(translations, dtype=np.float32).reshape(-1, 3)
+        self.scales = np.asarray(scales, dtype=np.float32).reshape(-1, 3)
+        self.rotations = None if rotations is None else np.asarray(rotations, dtype=np.float32).reshape(-1, 4)
+
+    @property
+    def count(self) -> int:
+        return len(self.translations)
+
+    def __repr__(self):
+        return f'InstanceGroup({self.name!r}, instances={self.count}, tris={self.mesh.triangle_count}, material={self.material!r})'
+
+
+def build_scatter_prototypes(seed=SEED, tuft_variants=4, rock_variants=2, crown_variants=3):
+    """Return {'tuft': [...], 'rock': [...], 'trunk': [...], 'crown': [...]} MeshData prototypes for instancing.
+
+    Tufts are unit-size bent planes (instances scale them uniformly by the
+    tuft size); rocks are noise-varied icospheres at ROCK_PROTOTYPE_SCALE;
+    the trunk is a unit-height cylinder standing on z = 0 (instances scale
+    it by the trunk height) and crowns are roughened icospheres at
+    CROWN_PROTOTYPE_RADIUS. Prototypes depend only on `seed`, so every tile
+    of a run shares them.
+    """
+    tufts = [build_tuft((0, 0, 0), scale=1.0, bend=bend) for bend in tuft_prototype_bends(seed, tuft_variants)]
+    rocks = [build_rock((0, 0, 0), scale=ROCK_PROTOTYPE_SCALE, seed=seed + k) for k in range(max(1, rock_variants))]
+    trunk = build_cylinder(radius=0.12, depth=1.0, vertices=8).translated((0, 0, 0.5))
+    crowns = []
+    for k in range(max(1, crown_variants)):
+        crown = build_icosphere(radius=CROWN_PROTOTYPE_RADIUS, subdivisions=2)
+        crowns.append(roughen_radial(crown, 2, CROWN_PROTOTYPE_RADIUS * 0.12, seed + k))
+    return {'tuft': tufts, 'rock': rocks, 'trunk': [trunk], 'crown': crowns}
+
+
+def build_tile_instanced(index: int, params=None, seed=SEED, seed_offset=0,
+                         radius=HEX_RADIUS, thickness=HEX_THICKNESS, rng=random,
+                         prototypes=None):
+    """Generate one tile variation with all scatter as instances of shared prototypes.
+
+    Placements are identical to `build_tile_parts` (same plan and draw
+    order); each rock/tuft/tree picks a prototype variant by its placement
+    index (planned tufts carry their own 'variant', whose bend they were
+    planned with, so both paths draw the same tufts), and a tree becomes
+    one trunk plus one crown instance. Pass the
+    same `prototypes` (from `build_scatter_prototypes`) for every tile of a
+    run so all tiles share one small mesh pool. Returns (parts, groups):
+    the hex base as a TilePart and one InstanceGroup per prototype (and
+    material) that has at least one instance.
+    """
+    with span('plan'):
+        plan = plan_tile(index, params, seed, seed_offset, radius, thickness, rng)
+    if prototypes is None:
+        prototypes = build_scatter_prototypes(seed)
+    parts = [build_tile_base(plan)]
+    buckets = {}
+    counters = {'rock': 0, 'tuft': 0, 'tree': 0}
+
+    def add(kind, variant, material, location, factor):
+        bucket = buckets.setdefault((kind, variant, material), ([], []))
+        bucket[0].append(location)
+        bucket[1].append((factor, factor, factor))
+
+    for placement in plan['placements']:
+        kind = placement['kind']
+        if kind not in counters:
+            parts += build_placement_parts(placement)
+            continue
+        n = counters[kind]
+        counters[kind] += 1
+        if kind == 'tree':
+            x, y, z = placement['location']
+            height, crown_radius = placement['trunk_height'], placement['crown_radius']
+            trunk_mat, leaf_mat = placement.get('materials', (plan['materials']['trunk'], plan['materials']['leaf']))
+            add('trunk', 0, trunk_mat, (x, y, z), height)
+            add('crown', n % len(prototypes['crown']), leaf_mat, (x, y, z + height + crown_radius * 0.6),
+                crown_radius / CROWN_PROTOTYPE_RADIUS)
+            continue
+        factor = placement['scale'] / ROCK_PROTOTYPE_SCALE if kind == 'rock' else placement['scale']
+        variant = placement.get('variant', n) % len(prototypes[kind])
+        add(kind, variant, placement.get('material', plan['materials'][kind]),
+            placement['location'], factor)
+    groups = []
+    multi = {}
+    for kind, variant, material in buckets:
+        multi[(kind, variant)] = multi.get((kind, variant), 0) + 1
+    for (kind, variant, material), (translations, scales) in sorted(buckets.items()):
+        name = f'{kind}_proto_{variant}' if multi[(kind, variant)] == 1 else f'{kind}_proto_{variant}_{material}'
+        groups.append(InstanceGroup(name, prototypes[kind][variant], material, translations, scales))
+    return parts, groups
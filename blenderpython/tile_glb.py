@@ -0,0 +1,593 @@
+"""tile_glb.py
+
+Direct binary glTF (GLB) writer for tile meshes.
+
+Replaces the `bpy.ops.export_scene.gltf` round trip (temporary scene,
+duplicated objects, add-on export) with a small serializer that writes the
+NumPy arrays from `tile_geometry.py` straight into a GLB:
+
+- one interleaved vertex bufferView per primitive (POSITION, NORMAL,
+  TEXCOORD_0), 4-byte aligned, with `byteStride` set; parts without a UV
+  layout (scatter) get zero UVs, so every primitive of a tile has the same
+  attribute set and the web loader can merge them (palette exports carry
+  no UVs at all);
+- an index bufferView per primitive, UNSIGNED_SHORT when every index fits
+  in 16 bits, UNSIGNED_INT otherwise;
+- POSITION accessors carry `min` / `max` (required by the glTF spec);
+- materials are `pbrMetallicRoughness` factors, double-sided, matching what
+  the Blender add-on emitted for our principled materials;
+- scatter prototypes can be written once and drawn many times through
+  `EXT_mesh_gpu_instancing` (per-instance TRANSLATION/ROTATION/SCALE
+  accessors), which three.js' GLTFLoader turns into an `InstancedMesh`;
+- palette mode bakes each material's base colour into a normalized
+  UNSIGNED_BYTE COLOR_0 attribute and points every primitive at the one
+  shared PALETTE_MATERIAL, so every tile of every biome uses one material
+  (and a merged tile is a single primitive);
+- quantize=True stores attributes as KHR_mesh_quantization integers:
+  POSITION as UNSIGNED_SHORT (dequantized by the node's uniform scale and
+  translation, or folded into the instance transforms), NORMAL as
+  normalized BYTE and TEXCOORD_0 as normalized UNSIGNED_SHORT, i.e. 16 or
+  20 bytes per vertex instead of 32 (UVs stay float32 for the whole file
+  when any of them leaves [0, 1]);
+- optimize=True welds, cache/overdraw-orders and fetch-orders every
+  primitive first (`tile_optimize.optimize_mesh`) and collects ACMR/ATVR
+  statistics;
+- a material spec with 'normal_texture' (PNG bytes, see `tile_bake.py`)
+  gets an embedded image + texture as its `normalTexture` (TEXCOORD_0);
+- compress='meshopt' post-processes the written file with meshoptimizer's
+  `gltfpack` (EXT_meshopt_compression), decoded in three.js by
+  `MeshoptDecoder`.
+
+Input geometry is in Blender space (+Z up); it is converted to glTF's +Y up
+frame as (x, z, -y) and UV v is flipped, exactly like the Blender exporter, so
+`loadGLTFOnce` in `src/scene/assets/biome-assets.ts` loads the result as-is.
+
+USAGE:
+    import tile_geometry as geo, tile_glb
+    parts = geo.build_tile_parts(0)
+    tile_glb.write_tile_glb('grass_v0.glb', parts)
+"""
+
+import json
+import os
+import shutil
+import struct
+import subprocess
+
+import numpy as np
+
+from tile_profile import span
+
+GLB_MAGIC = 0x46546C67  # 'glTF'
+CHUNK_JSON = 0x4E4F534A  # 'JSON'
+CHUNK_BIN = 0x004E4942  # 'BIN\0'
+
+FLOAT = 5126
+BYTE = 5120
+UNSIGNED_BYTE = 5121
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+LINEAR = 9729
+LINEAR_MIPMAP_LINEAR = 9987
+CLAMP_TO_EDGE = 33071
+
+GENERATOR = 'CivWeb-Lite tile_glb'
+EXT_INSTANCING = 'EXT_mesh_gpu_instancing'
+KHR_QUANTIZATION = 'KHR_mesh_quantization'
+COMPRESSORS = ('meshopt',)
+
+# The single material of palette-mode exports: white base colour, so COLOR_0
+# (multiplied in by the loader) is the final albedo.
+PALETTE_MATERIAL = 'Tile_Mat'
+PALETTE_SPEC = {'base_color': (1.0, 1.0, 1.0, 1.0), 'metallic': 0.0, 'roughness': 0.85}
+
+
+def to_gltf_space(vectors):
+    """Convert (N, 3) Blender Z-up vectors to glTF Y-up: (x, y, z) -> (x, z, -y)."""
+    v = np.asarray(vectors, dtype=np.float32).reshape(-1, 3)
+    return np.stack([v[:, 0], v[:, 2], -v[:, 1]], axis=1)
+
+
+def quat_to_gltf_space(quats):
+    """Convert (N, 4) Blender-space (x, y, z, w) rotations to glTF's frame: (x, z, -y, w)."""
+    q = np.asarray(quats, dtype=np.float32).reshape(-1, 4)
+    return np.stack([q[:, 0], q[:, 2], -q[:, 1], q[:, 3]], axis=1)
+
+
+def scale_to_gltf_space(scales):
+    """Convert (N, 3) Blender-space axis scales to glTF's frame: (sx, sz, sy)."""
+    s = np.asarray(scales, dtype=np.float32).reshape(-1, 3)
+    return np.stack([s[:, 0], s[:, 2], s[:, 1]], axis=1)
+
+
+def gltf_uvs(mesh):
+    """(N, 2) float64 TEXCOORD_0 values of a mesh: v flipped, zeros when it has no UVs."""
+    if mesh.uvs is None:
+        return np.zeros((mesh.vertex_count, 2), dtype=np.float64)
+    uv = mesh.uvs.astype(np.float64)
+    uv[:, 1] = 1.0 - uv[:, 1]
+    return uv
+
+
+def uvs_in_unit_range(meshes) -> bool:
+    """True when every glTF-space UV of `meshes` lies in [0, 1] (fits normalized UNSIGNED_SHORT)."""
+    for mesh in meshes:
+        uv = gltf_uvs(mesh)
+        if uv.size and (uv.min() < 0.0 or uv.max() > 1.0):
+            return False
+    return True
+
+
+def _pad4(data: bytes, fill=b'\x00') -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def quat_rotate(quats, vectors):
+    """Rotate (N, 3) vectors by (N, 4) (x, y, z, w) unit quaternions."""
+    q = np.asarray(quats, dtype=np.float64).reshape(-1, 4)
+    v = np.asarray(vectors, dtype=np.float64).reshape(-1, 3)
+    u, w = q[:, :3], q[:, 3:4]
+    t = 2.0 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+
+def vertex_colors(color, count: int):
+    """Return (count, 4) uint8 RGBA for one linear `color`, as written to COLOR_0."""
+    rgba = np.clip(np.round(np.asarray(color, dtype=np.float64)[:4] * 255.0), 0, 255).astype(np.uint8)
+    return np.tile(rgba, (count, 1))
+
+
+class GlbBuilder:
+    """Accumulates materials, meshes and nodes and serializes them as one GLB."""
+
+    def __init__(self, quantize=False, optimize=False, uvs=True, uv_float=False):
+        self.quantize = quantize
+        self.optimize = optimize
+        # every primitive gets TEXCOORD_0 (zeros where a mesh has none); False writes none at all
+        self.uvs = uvs
+        # quantized TEXCOORD_0 encoding for the whole file: normalized UNSIGNED_SHORT, or float32
+        # when some UV leaves [0, 1] (see `uvs_in_unit_range`)
+        self.uv_float = uv_float
+        # per-primitive `tile_optimize.optimize_mesh` stats when optimize is set
+        self.stats = []
+        # mesh index -> (origin, step) dequantization of its quantized positions (glTF space)
+        self._dequant = {}
+        self.gltf = {
+            'asset': {'version': '2.0', 'generator': GENERATOR},
+            'scene': 0,
+            'scenes': [{'name': 'Scene', 'nodes': []}],
+            'nodes': [],
+            'meshes': [],
+            'materials': [],
+            'accessors': [],
+            'bufferViews': [],
+            'buffers': [],
+        }
+        self._bin = bytearray()
+        self._material_index = {}
+
+    # -- low level ---------------------------------------------------------
+    def add_buffer_view(self, data: bytes, target=None, byte_stride=None) -> int:
+        """Append `data` (4-byte aligned) to the binary chunk and return its bufferView index."""
+        self._bin += b'\x00' * (-len(self._bin) % 4)
+        view = {'buffer': 0, 'byteOffset': len(self._bin), 'byteLength': len(data)}
+        if byte_stride:
+            view['byteStride'] = byte_stride
+        if target:
+            view['target'] = target
+        self._bin += data
+        self.gltf['bufferViews'].append(view)
+        return len(self.gltf['bufferViews']) - 1
+
+    def add_accessor(self, view: int, component_type: int, count: int, type_: str,
+                     byte_offset=0, minimum=None, maximum=None, normalized=False) -> int:
+        acc = {'bufferView': view, 'componentType': component_type, 'count': int(count), 'type': type_}
+        if byte_offset:
+            acc['byteOffset'] = byte_offset
+        if normalized:
+            acc['normalized'] = True
+        if minimum is not None:
+            acc['min'] = [float(x) for x in minimum]
+        if maximum is not None:
+            acc['max'] = [float(x) for x in maximum]
+        self.gltf['accessors'].append(acc)
+        return len(self.gltf['accessors']) - 1
+
+    def add_texture(self, data: bytes, mime_type='image/png') -> int:
+        """Embed an image in the binary chunk and return the index of a texture sampling it.
+
+        Every texture shares one linear, mipmapped, edge-clamped sampler.
+        """
+        if 'samplers' not in self.gltf:
+            self.gltf['samplers'] = [{'magFilter': LINEAR, 'minFilter': LINEAR_MIPMAP_LINEAR,
+                                      'wrapS': CLAMP_TO_EDGE, 'wrapT': CLAMP_TO_EDGE}]
+        images = self.gltf.setdefault('images', [])
+        images.append({'bufferView': self.add_buffer_view(bytes(data)), 'mimeType': mime_type})
+        textures = self.gltf.setdefault('textures', [])
+        textures.append({'sampler': 0, 'source': len(images) - 1})
+        return len(textures) - 1
+
+    # -- materials ---------------------------------------------------------
+    def add_material(self, name: str, spec=None) -> int:
+        """Register a material once by name; `spec` has base_color/metallic/roughness[/normal_texture]."""
+        if name in self._material_index:
+            return self._material_index[name]
+        spec = spec or {}
+        mat = {
+            'name': name,
+            'doubleSided': True,
+            'pbrMetallicRoughness': {
+                'baseColorFactor': [float(c) for c in spec.get('base_color', (0.8, 0.8, 0.8, 1.0))],
+                'metallicFactor': float(spec.get('metallic', 0.0)),
+                'roughnessFactor': float(spec.get('roughness', 0.5)),
+            },
+        }
+        if spec.get('normal_texture'):
+            mat['normalTexture'] = {'index': self.add_texture(spec['normal_texture'])}
+        self.gltf['materials'].append(mat)
+        self._material_index[name] = len(self.gltf['materials']) - 1
+        return self._material_index[name]
+
+    # -- geometry ----------------------------------------------------------
+    def add_primitive(self, mesh, material=None, colors=None, dequant=None) -> dict:
+        """Write one `tile_geometry.MeshData` as an interleaved primitive dict.
+
+        `colors` is an optional (N, 4) uint8 RGBA array written as COLOR_0.
+        `dequant` (origin, step) switches to the quantized layout (see
+        `add_quantized_vertices`).
+        """
+        if dequant is not None:
+            attributes = self.add_quantized_vertices(mesh, *dequant)
+            count = mesh.vertex_count
+        else:
+            attributes, count = self.add_float_vertices(mesh)
+        if colors is not None:
+            cview = self.add_buffer_view(np.ascontiguousarray(colors, dtype=np.uint8).tobytes(), ARRAY_BUFFER)
+            attributes['COLOR_0'] = self.add_accessor(cview, UNSIGNED_BYTE, count, 'VEC4', normalized=True)
+
+        indices = mesh.indices.ravel()
+        if count <= 0xFFFF:
+            idx_bytes, idx_type = indices.astype(np.uint16).tobytes(), UNSIGNED_SHORT
+        else:
+            idx_bytes, idx_type = indices.astype(np.uint32).tobytes(), UNSIGNED_INT
+        iview = self.add_buffer_view(idx_bytes, ELEMENT_ARRAY_BUFFER)
+        prim = {
+            'attributes': attributes,
+            'indices': self.add_accessor(iview, idx_type, len(indices), 'SCALAR'),
+            'mode': TRIANGLES,
+        }
+        if material is not None:
+            prim['material'] = material
+        return prim
+
+    def add_float_vertices(self, mesh):
+        """Interleaved float32 POSITION/NORMAL[/TEXCOORD_0]; returns (attributes, count)."""
+        pos = to_gltf_space(mesh.positions)
+        nrm = to_gltf_space(mesh.normals)
+        columns = [pos, nrm, gltf_uvs(mesh)] if self.uvs else [pos, nrm]
+        interleaved = np.ascontiguousarray(np.hstack(columns), dtype=np.float32)
+        stride = interleaved.shape[1] * 4
+        count = len(interleaved)
+        vview = self.add_buffer_view(interleaved.tobytes(), ARRAY_BUFFER, stride)
+        attributes = {
+            'POSITION': self.add_accessor(vview, FLOAT, count, 'VEC3', 0, pos.min(axis=0), pos.max(axis=0)),
+            'NORMAL': self.add_accessor(vview, FLOAT, count, 'VEC3', 12),
+        }
+        if self.uvs:
+            attributes['TEXCOORD_0'] = self.add_accessor(vview, FLOAT, count, 'VEC2', 24)
+        return attributes, count
+
+    def add_quantized_vertices(self, mesh, origin, step):
+        """Interleaved KHR_mesh_quantization vertices; returns the attributes dict.
+
+        POSITION is UNSIGNED_SHORT (x, y, z, pad) with value = origin + step * q,
+        NORMAL is normalized BYTE (x, y, z, pad) and TEXCOORD_0 is normalized
+        UNSIGNED_SHORT (float32 with `uv_float`), so every attribute stays
+        4-byte aligned. The UV encoding is the builder's, not the mesh's, so
+        every primitive of a file matches and the loader can merge them.
+        """
+        self.use_extension(KHR_QUANTIZATION, required=True)
+        count = mesh.vertex_count
+        q = np.zeros((count, 4), dtype=np.uint16)
+        q[:, :3] = np.clip(np.round((to_gltf_space(mesh.positions) - origin) / step), 0, 0xFFFF)
+        n = np.zeros((count, 4), dtype=np.int8)
+        n[:, :3] = np.clip(np.round(to_gltf_space(mesh.normals) * 127.0), -127, 127)
+        columns = [q.view(np.uint8), n.view(np.uint8)]
+        uv_type = None
+        if self.uvs:
+            uv = gltf_uvs(mesh)
+            if self.uv_float:
+                uv_type = FLOAT
+                columns.append(np.ascontiguousarray(uv, dtype=np.float32).view(np.uint8))
+            else:
+                if not uvs_in_unit_range([mesh]):
+                    raise ValueError('UVs outside [0, 1] need a GlbBuilder with uv_float=True')
+                uv_type = UNSIGNED_SHORT
+                columns.append(np.round(uv * 0xFFFF).astype(np.uint16).view(np.uint8))
+        interleaved = np.ascontiguousarray(np.hstack(columns))
+        vview = self.add_buffer_view(interleaved.tobytes(), ARRAY_BUFFER, interleaved.shape[1])
+        attributes = {
+            'POSITION': self.add_accessor(vview, UNSIGNED_SHORT, count, 'VEC3', 0,
+                                          q[:, :3].min(axis=0), q[:, :3].max(axis=0)),
+            'NORMAL': self.add_accessor(vview, BYTE, count, 'VEC3', 8, normalized=True),
+        }
+        if uv_type is not None:
+            attributes['TEXCOORD_0'] = self.add_accessor(vview, uv_type, count, 'VEC2', 12,
+                                                         normalized=uv_type == UNSIGNED_SHORT)
+        return attributes
+
+    def add_mesh(self, name: str, primitives) -> int:
+        """Add a mesh from [(MeshData, material_index_or_None[, colors]), ...].
+
+        With quantize, all primitives share one (origin, step) dequantization
+        over the mesh's bounds, applied by the nodes that use it.
+        """
+        if self.optimize:
+            import tile_optimize
+
+            optimized = []
+            for mesh, material, *rest in primitives:
+                with span('export.optimize'):
+                    mesh, colors, stats = tile_optimize.optimize_mesh(mesh, rest[0] if rest else None)
+                self.stats.append(dict(stats, name=name))
+                optimized.append((mesh, material, colors))
+            primitives = optimized
+        dequant = None
+        if self.quantize:
+            pos = np.vstack([to_gltf_space(p[0].positions) for p in primitives]).astype(np.float64)
+            if len(pos):
+                origin = pos.min(axis=0)
+                extent = float((pos.max(axis=0) - origin).max())
+                dequant = (origin, extent / 0xFFFF if extent > 0 else 1.0)
+        prims = [self.add_primitive(*primitive, dequant=dequant) for primitive in primitives]
+        self.gltf['meshes'].append({'name': name, 'primitives': prims})
+        index = len(self.gltf['meshes']) - 1
+        if dequant is not None:
+            self._dequant[index] = dequant
+        return index
+
+    def add_node(self, name: str, mesh=None, translation=None, root=True, **extra) -> int:
+        """Add a node; a quantized mesh's dequantization becomes its scale and (extra) translation."""
+        node = {'name': name}
+        if mesh is not None:
+            node['mesh'] = mesh
+        dequant = self._dequant.get(mesh) if not extra.get('extensions', {}).get(EXT_INSTANCING) else None
+        if dequant is not None:
+            origin, step = dequant
+            translation = origin + (np.zeros(3) if translation is None else np.asarray(translation, dtype=np.float64))
+            node['scale'] = [float(step)] * 3
+        if translation is not None:
+            node['translation'] = [float(x) for x in translation]
+        node.update(extra)
+        self.gltf['nodes'].append(node)
+        index = len(self.gltf['nodes']) - 1
+        if root:
+            self.gltf['scenes'][0]['nodes'].append(index)
+        return index
+
+    def use_extension(self, name: str, required=False):
+        lists = ('extensionsUsed', 'extensionsRequired') if required else ('extensionsUsed',)
+        for key in lists:
+            names = self.gltf.setdefault(key, [])
+            if name not in names:
+                names.append(name)
+
+    def add_instanced_node(self, name: str, mesh: int, translations, scales=None, rotations=None,
+                           translation=None) -> int:
+        """Add a node drawing `mesh` once per instance (EXT_mesh_gpu_instancing).
+
+        Transforms are Blender-space arrays and are converted to glTF's frame;
+        `translation` is the node's own offset, already in glTF space like
+        `add_node`'s. The extension is listed as used, not required: loaders without it
+        draw a single copy at the node origin. A quantized mesh's
+        dequantization is folded into every instance transform (the node's
+        own transform would also scale the instance offsets).
+        """
+        self.use_extension(EXT_INSTANCING)
+        attributes = {}
+        t = to_gltf_space(translations)
+        r = None if rotations is None else quat_to_gltf_space(rotations)
+        s = None if scales is None else scale_to_gltf_space(scales)
+        dequant = self._dequant.get(mesh)
+        if dequant is not None:
+            origin, step = dequant
+            offset = np.tile(origin, (len(t), 1)) * (1.0 if s is None else s)
+            t = t + (offset if r is None else quat_rotate(r, offset))
+            s = (np.ones((len(t), 3)) if s is None else s) * step
+        columns = [('TRANSLATION', t, 'VEC3')]
+        if r is not None:
+            columns.append(('ROTATION', r, 'VEC4'))
+        if s is not None:
+            columns.append(('SCALE', s, 'VEC3'))
+        for key, values, type_ in columns:
+            view = self.add_buffer_view(np.ascontiguousarray(values, dtype=np.float32).tobytes())
+            attributes[key] = self.add_accessor(view, FLOAT, len(values), type_)
+        return self.add_node(name, mesh=mesh, translation=translation,
+                             extensions={EXT_INSTANCING: {'attributes': attributes}})
+
+    # -- output ------------------------------------------------------------
+    def to_bytes(self) -> bytes:
+        gltf = dict(self.gltf)
+        gltf['buffers'] = [{'byteLength': len(self._bin)}] if self._bin else []
+        for key in ('materials', 'accessors', 'bufferViews', 'buffers', 'meshes', 'nodes'):
+            if not gltf[key]:
+                del gltf[key]
+        json_chunk = _pad4(json.dumps(gltf, separators=(',', ':')).encode('utf-8'), b' ')
+        bin_chunk = _pad4(bytes(self._bin))
+        total = 12 + 8 + len(json_chunk) + (8 + len(bin_chunk) if bin_chunk else 0)
+        out = bytearray(struct.pack('<III', GLB_MAGIC, 2, total))
+        out += struct.pack('<II', len(json_chunk), CHUNK_JSON) + json_chunk
+        if bin_chunk:
+            out += struct.pack('<II', len(bin_chunk), CHUNK_BIN) + bin_chunk
+        return bytes(out)
+
+    def write(self, path: str) -> int:
+        """Write the GLB to `path` and return the number of bytes written."""
+        data = self.to_bytes()
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        return len(data)
+
+
+def read_glb(path_or_bytes):
+    """Return (gltf_json, bin_bytes) from a GLB file path or bytes (for checks and tooling)."""
+    if isinstance(path_or_bytes, (bytes, bytearray, memoryview)):
+        data = bytes(path_or_bytes)
+    else:
+        with open(path_or_bytes, 'rb') as fh:
+            data = fh.read()
+    magic, version, length = struct.unpack_from('<III', data, 0)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError('Not a glTF 2.0 binary')
+    offset, gltf, bin_chunk = 12, None, b''
+    while offset < length:
+        chunk_len, chunk_type = struct.unpack_from('<II', data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_len]
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(chunk.decode('utf-8'))
+        elif chunk_type == CHUNK_BIN:
+            bin_chunk = chunk
+        offset += 8 + chunk_len
+    return gltf, bin_chunk
+
+
+def write_tile_glb(path: str, parts, materials=None, merge=False, instances=None, translation=None,
+                   palette=False, quantize=False, compress=None, optimize=False, stats=None) -> int:
+    """Write tile parts to a GLB and return the number of bytes written.
+
+    See `build_tile_glb` for the layout options; `compress` ('meshopt')
+    then rewrites the file with `compress_glb`. With optimize, the
+    per-primitive optimization stats are appended to the `stats` list.
+    """
+    with span('export.layout'):
+        builder = build_tile_glb(parts, materials, merge, instances, translation, palette, quantize, optimize)
+    with span('export.serialize'):
+        size = builder.write(path)
+    if stats is not None:
+        stats.extend(builder.stats)
+    if compress:
+        with span('export.compress'):
+            size = compress_glb(path, compress)
+    return size
+
+
+def build_tile_glb(parts, materials=None, merge=False, instances=None, translation=None, palette=False,
+                   quantize=False, optimize=False) -> GlbBuilder:
+    """Lay tile parts out in a GlbBuilder (not yet serialized).
+
+    merge=False: one node + mesh per part (same layout as the Blender add-on).
+    merge=True: a single node + mesh named after the first part (the hex
+    base) with one primitive per material, so the runtime gets one draw call
+    per material and no per-object meshes to merge.
+    instances: optional `tile_geometry.InstanceGroup`s, each written as one
+    prototype mesh plus an EXT_mesh_gpu_instancing node.
+
+    `materials` maps material name -> spec; names missing from it fall back to
+    `tile_geometry.MATERIALS`. `translation` (Blender space) offsets every
+    node, e.g. to place a baked map chunk at its world position.
+    palette=True writes each material's base colour as COLOR_0 and uses
+    PALETTE_MATERIAL for everything; with merge the tile is one primitive.
+    quantize=True writes KHR_mesh_quantization attributes; optimize=True
+    runs `tile_optimize.optimize_mesh` on every primitive.
+    """
+    import tile_geometry as geo
+
+    specs = dict(geo.MATERIALS)
+    specs.update(materials or {})
+    parts = list(parts)
+    uv_float = quantize and not palette and not uvs_in_unit_range(
+        [p.mesh for p in parts] + [g.mesh for g in instances or ()])
+    builder = GlbBuilder(quantize=quantize, optimize=optimize, uvs=not palette, uv_float=uv_float)
+    if translation is not None:
+        translation = (translation[0], translation[2], -translation[1])
+    if palette:
+        _add_palette_nodes(builder, parts, specs, merge, instances, translation)
+        return builder
+    if merge:
+        merged = geo.merge_parts_by_material(parts)
+        if merged:
+            prims = [(p.mesh, builder.add_material(p.material, specs.get(p.material))) for p in merged]
+            builder.add_node(merged[0].name, mesh=builder.add_mesh(merged[0].name, prims), translation=translation)
+    else:
+        for part in parts:
+            mat = builder.add_material(part.material, specs.get(part.material))
+            builder.add_node(part.name, mesh=builder.add_mesh(part.name, [(part.mesh, mat)]), translation=translation)
+    for group in instances or ():
+        mat = builder.add_material(group.material, specs.get(group.material))
+        mesh = builder.add_mesh(group.name, [(group.mesh, mat)])
+        builder.add_instanced_node(group.name, mesh, group.translations, group.scales, group.rotations,
+                                   translation=translation)
+    return builder
+
+
+def compressor_path(method='meshopt') -> str:
+    """Return the executable used for `method`; raises RuntimeError when it is not installed."""
+    if method not in COMPRESSORS:
+        raise ValueError(f'unknown compression {method!r} (expected one of {COMPRESSORS})')
+    exe = shutil.which('gltfpack')
+    if exe is None:
+        raise RuntimeError('--compress meshopt needs `gltfpack` on PATH (npm install -g gltfpack)')
+    return exe
+
+
+def compress_glb(path: str, method='meshopt') -> int:
+    """Compress a written GLB in place and return its new size.
+
+    'meshopt' runs meshoptimizer's `gltfpack` (EXT_meshopt_compression plus
+    its own quantization; names and materials are kept). Raises RuntimeError
+    when the tool is not installed or fails (with the tool's error output).
+    """
+    exe = compressor_path(method)
+    tmp = path + '.tmp.glb'
+    try:
+        try:
+            subprocess.run([exe, '-i', path, '-o', tmp, '-c', '-kn', '-km', '-ke'], check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as ex:
+            detail = ex.stderr.decode('utf-8', errors='replace').strip() if ex.stderr else ''
+            raise RuntimeError(f'{os.path.basename(exe)} failed on {path} (exit {ex.returncode})'
+                               + (f': {detail}' if detail else '')) from ex
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return os.path.getsize(path)
+
+
+def _add_palette_nodes(builder, parts, specs, merge, instances, translation):
+    """Palette-mode body of `write_tile_glb`: per-material colours in COLOR_0, one shared material.
+
+    UVs are dropped (the palette material has no texture and the builder
+    is made with uvs=False), so every primitive carries the same
+    POSITION/NORMAL/COLOR_0 attribute set and the runtime can merge them
+    all into one geometry.
+    """
+    import tile_geometry as geo
+
+    mat = builder.add_material(PALETTE_MATERIAL, PALETTE_SPEC)
+    default = geo.MATERIALS['Grass_Mat']
+
+    def colors_for(material, count):
+        return vertex_colors(specs.get(material, default)['base_color'], count)
+
+    def untextured(mesh):
+        return geo.MeshData(mesh.positions, mesh.indices, normals=mesh.normals)
+
+    parts = list(parts)
+    if merge and parts:
+        mesh = untextured(geo.merge_meshes(p.mesh for p in parts))
+        colors = np.vstack([colors_for(p.material, p.mesh.vertex_count) for p in parts])
+        builder.add_node(parts[0].name, mesh=builder.add_mesh(parts[0].name, [(mesh, mat, colors)]),
+                         translation=translation)
+    elif not merge:
+        for part in parts:
+            prim = (untextured(part.mesh), mat, colors_for(part.material, part.mesh.vertex_count))
+            builder.add_node(part.name, mesh=builder.add_mesh(part.name, [prim]), translation=translation)
+    for group in instances or ():
+        prim = (untextured(group.mesh), mat, colors_for(group.material, group.mesh.vertex_count))
+        mesh = builder.add_mesh(group.name, [prim])
+        builder.add_instanced_node(group.name, mesh, group.translations, group.scales, group.rotations,
+                                   translation=translation)
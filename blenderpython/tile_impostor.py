@@ -0,0 +1,283 @@
+"""tile_impostor.py
+
+Far-distance impostor atlases: a tile variant pre-rendered from a few views.
+
+Zoomed out over a large map, every tile still draws its full geometry
+(top, rocks, tufts, trees). `build_atlas` renders the tile from a handful
+of orthographic views with a small CPU software rasterizer (NumPy z-buffer,
+no Blender, no GPU) and packs the frames into two textures, so the scene can
+swap a distant tile for one camera-facing quad:
+
+- `<stem>_impostor.png`: RGBA albedo (sRGB material base colour) and
+  coverage alpha;
+- `<stem>_impostor_nd.png`: RGB world normal (glTF frame, n * 0.5 + 0.5,
+  so the runtime can light it like the real tile) and A depth;
+- `<stem>_impostor.json`: the index (see below).
+
+Every view frames the same bounding sphere of the tile (center and radius
+in the GLB's tile-local glTF frame), so the quad is always 2 * radius wide
+and centred there. Depth is the distance along the view direction,
+(d / radius + 1) / 2, 0 nearest the camera. Frames are 2x supersampled, and
+colour and normal are dilated a few texels past the silhouette so bilinear
+filtering and mipmaps do not pull in the background.
+
+The default views are the map camera's pitch (40 degrees above the horizon,
+as set up in app.tsx) at eight azimuths plus straight down: a 3 x 3 atlas.
+
+INDEX
+=====
+    {"version": 1, "tile": "grass_v0.glb", "frame": 128, "grid": [3, 3], "size": [384, 384],
+     "center": [x, y, z], "radius": 0.62,
+     "color": "grass_v0_impostor.png", "normal_depth": "grass_v0_impostor_nd.png",
+     "views": [{"azimuth": 0.0, "elevation": 40.0, "direction": [...], "right": [...], "up": [...],
+                "rect": [0, 0, 128, 128]}, ...]}
+`direction` points from the center towards the camera; pick the view whose
+direction is closest to the camera's and draw its `rect` (pixels, origin
+top left) on a quad spanned by `right` and `up`.
+
+USAGE:
+    import tile_geometry as geo, tile_impostor
+    parts = geo.build_tile_parts(0)
+    tile_impostor.write_impostor('out/grass_v0.glb', parts)       # next to the GLB
+
+    python blenderpython/tile_batch.py --out out --impostors 128
+"""
+
+import json
+import os
+
+import numpy as np
+
+import tile_bake
+import tile_geometry as geo
+from tile_glb import quat_rotate, to_gltf_space
+from tile_profile import span
+
+INDEX_VERSION = 1
+# (azimuth, elevation) in degrees: the map camera's pitch all around, plus top-down
+DEFAULT_VIEWS = tuple((float(azimuth), 40.0) for azimuth in range(0, 360, 45)) + ((0.0, 90.0),)
+SUPERSAMPLE = 2
+# Texels the colour/normal are grown past the silhouette.
+PADDING = 2
+
+
+def impostor_paths(output: str):
+    """(index, colour atlas, normal/depth atlas) paths next to a tile GLB `output`."""
+    stem = os.path.splitext(output)[0]
+    return f'{stem}_impostor.json', f'{stem}_impostor.png', f'{stem}_impostor_nd.png'
+
+
+def scene_triangles(parts, groups=(), materials=None):
+    """Every triangle a tile draws, in the glTF frame.
+
+    Returns (positions (T, 3, 3), vertex normals (T, 3, 3), linear RGB
+    colours (T, 3)); instance groups are expanded, colours are the material
+    base colours (`materials` over `tile_geometry.MATERIALS`).
+    """
+    specs = dict(geo.MATERIALS)
+    specs.update(materials or {})
+    positions, normals, colors = [], [], []
+
+    def add(pos, nrm, tris, material):
+        color = specs.get(material, {}).get('base_color', (0.8, 0.8, 0.8, 1.0))[:3]
+        positions.append(to_gltf_space(pos)[tris])
+        normals.append(to_gltf_space(nrm)[tris])
+        colors.append(np.tile(np.asarray(color, dtype=np.float64), (len(tris), 1)))
+
+    for part in parts:
+        add(part.mesh.positions, part.mesh.normals, part.mesh.indices, part.material)
+    for group in groups or ():
+        pos, nrm = group.mesh.positions.astype(np.float64), group.mesh.normals.astype(np.float64)
+        for k in range(group.count):
+            scale = group.scales[k].astype(np.float64)
+            p, n = pos * scale, nrm / scale
+            if group.rotations is not None:
+                quat = np.tile(group.rotations[k], (len(pos), 1))
+                p, n = quat_rotate(quat, p), quat_rotate(quat, n)
+            n /= np.maximum(np.linalg.norm(n, axis=1, keepdims=True), 1e-12)
+            add(p + group.translations[k], n, group.mesh.indices, group.material)
+    if not positions:
+        raise ValueError('nothing to render: the tile has no triangles')
+    return np.concatenate(positions), np.concatenate(normals), np.concatenate(colors)
+
+
+def view_basis(azimuth: float, elevation: float):
+    """(direction, right, up) unit vectors of a view; direction points from the tile towards the camera."""
+    az, el = np.radians(azimuth), np.radians(elevation)
+    direction = np.array([np.cos(el) * np.sin(az), np.sin(el), np.cos(el) * np.cos(az)])
+    # straight down has no horizon: keep the azimuth's 'forward' (-Z at 0 degrees) as screen up
+    world_up = np.array([0.0, 1.0, 0.0]) if elevation < 89.999 else -np.array([np.sin(az), 0.0, np.cos(az)])
+    right = np.cross(world_up, direction)
+    right /= np.linalg.norm(right)
+    return direction, right, np.cross(direction, right)
+
+
+def _rasterize(xy, z, size):
+    """Visible fragments of triangles in pixel space (z-buffered, nearest z wins).
+
+    xy (T, 3, 2) continuous pixel coordinates (pixel (i, j) centred at
+    (j + 0.5, i + 0.5)), z (T, 3) depths. Triangles are grouped by the
+    power-of-two width and height of their pixel bounding box so each group
+    is tested against one kw x kh stencil in a single vectorized pass.
+    Returns (pixel index i * size + j, triangle, barycentrics (F, 3), depth)
+    per visible pixel.
+    """
+    lo = np.clip(np.ceil(xy.min(axis=1) - 0.5), 0, size).astype(np.int64)
+    hi = np.clip(np.floor(xy.max(axis=1) - 0.5), -1, size - 1).astype(np.int64)
+    extent = hi - lo + 1
+    a, b, c = xy[:, 0], xy[:, 1], xy[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    drawable = (np.abs(area) > 1e-12) & (extent > 0).all(axis=1)
+    shape = np.ceil(np.log2(np.maximum(extent, 1))).astype(np.int64)
+    buckets = np.where(drawable, shape[:, 0] * 64 + shape[:, 1], -1)
+    pix, tri, bary, depth = [], [], [], []
+    for bucket in np.unique(buckets[buckets >= 0]):
+        kw, kh = 1 << int(bucket // 64), 1 << int(bucket % 64)
+        sel = np.flatnonzero(buckets == bucket)
+        oy, ox = (g.ravel() for g in np.mgrid[0:kh, 0:kw])
+        cols = lo[sel, 0:1] + ox
+        rows = lo[sel, 1:2] + oy
+        valid = (cols <= hi[sel, 0:1]) & (rows <= hi[sel, 1:2])
+        px, py = cols + 0.5, rows + 0.5
+        ta, tb, tc = a[sel], b[sel], c[sel]
+        inv = 1.0 / area[sel][:, None]
+        wa = ((tb[:, 0:1] - px) * (tc[:, 1:2] - py) - (tb[:, 1:2] - py) * (tc[:, 0:1] - px)) * inv
+        wb = ((tc[:, 0:1] - px) * (ta[:, 1:2] - py) - (tc[:, 1:2] - py) * (ta[:, 0:1] - px)) * inv
+        wc = 1.0 - wa - wb
+        inside = valid & (wa >= -1e-9) & (wb >= -1e-9) & (wc >= -1e-9)
+        t_idx, s_idx = np.nonzero(inside)
+        w = np.column_stack([wa[t_idx, s_idx], wb[t_idx, s_idx], wc[t_idx, s_idx]])
+        triangles = sel[t_idx]
+        pix.append(rows[t_idx, s_idx] * size + cols[t_idx, s_idx])
+        tri.append(triangles)
+        bary.append(w)
+        depth.append(np.einsum('ij,ij->i', w, z[triangles]))
+    if not pix:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, 3)), np.zeros(0)
+    pix, tri, bary, depth = np.concatenate(pix), np.concatenate(tri), np.concatenate(bary), np.concatenate(depth)
+    # depth test: per pixel keep the nearest fragment
+    order = np.lexsort((depth, pix))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = pix[order][1:] != pix[order][:-1]
+    keep = order[first]
+    return pix[keep], tri[keep], bary[keep], depth[keep]
+
+
+def render_view(triangles, center, radius, azimuth, elevation, frame=128, supersample=SUPERSAMPLE):
+    """Render one orthographic view of `scene_triangles` output.
+
+    Returns (albedo (frame, frame, 3) linear, alpha (frame, frame), normal
+    (frame, frame, 3) unit glTF-frame, depth (frame, frame) in [0, 1]).
+    """
+    positions, normals, colors = triangles
+    direction, right, up = view_basis(azimuth, elevation)
+    size = frame * supersample
+    rel = positions - center
+    xy = np.stack([(rel @ right / radius + 1) * 0.5 * size, (1 - rel @ up / radius) * 0.5 * size], axis=-1)
+    z = -(rel @ direction)
+    pix, tri, bary, depth = _rasterize(xy, z, size)
+
+    # double-sided: normals of faces seen from behind point back at the camera
+    face = np.cross(positions[:, 1] - positions[:, 0], positions[:, 2] - positions[:, 0])
+    facing = np.where(face @ direction < 0, -1.0, 1.0)
+    nrm = np.einsum('ij,ijk->ik', bary, normals[tri]) * facing[tri, None]
+    nrm /= np.maximum(np.linalg.norm(nrm, axis=1, keepdims=True), 1e-12)
+
+    cover = np.zeros(size * size)
+    albedo, normal, dist = np.zeros((size * size, 3)), np.zeros((size * size, 3)), np.zeros(size * size)
+    cover[pix] = 1.0
+    albedo[pix] = colors[tri]
+    normal[pix] = nrm
+    dist[pix] = (depth / radius + 1) * 0.5
+
+    def down(values):
+        """Box-filter the supersampled buffer to frame x frame (sums)."""
+        values = values.reshape(frame, supersample, frame, supersample, -1)
+        return values.sum(axis=(1, 3))
+
+    hits = down(cover)[..., 0]
+    alpha = hits / supersample ** 2
+    covered = hits > 0
+    safe = np.maximum(hits, 1)[..., None]
+    albedo = down(albedo) / safe
+    normal = down(normal)
+    normal /= np.maximum(np.linalg.norm(normal, axis=-1, keepdims=True), 1e-12)
+    dist = np.where(covered, down(dist)[..., 0] / safe[..., 0], 1.0)
+    albedo, _ = tile_bake.dilate(albedo, covered, PADDING)
+    normal, _ = tile_bake.dilate(normal, covered, PADDING)
+    return albedo, alpha, normal, dist
+
+
+def _to_srgb(linear):
+    linear = np.clip(linear, 0.0, 1.0)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+
+
+def _to_u8(values):
+    return np.clip(np.rint(values * 255.0), 0, 255).astype(np.uint8)
+
+
+def build_atlas(parts, groups=(), materials=None, frame=128, views=DEFAULT_VIEWS):
+    """Render every view of a tile and pack them row-major into a square-ish grid.
+
+    Returns (colour RGBA uint8, normal/depth RGBA uint8, index dict without
+    file names). `parts`/`groups`/`materials` are what `tile_glb.write_tile_glb`
+    takes.
+    """
+    frame = int(frame)
+    if frame < 4:
+        raise ValueError(f'impostor frame size must be >= 4, got {frame}')
+    triangles = scene_triangles(parts, groups, materials)
+    points = triangles[0].reshape(-1, 3)
+    center = (points.min(axis=0) + points.max(axis=0)) * 0.5
+    radius = float(np.linalg.norm(points - center, axis=1).max()) or 1.0
+    cols = int(np.ceil(np.sqrt(len(views))))
+    rows = int(np.ceil(len(views) / cols))
+    color = np.zeros((rows * frame, cols * frame, 4), dtype=np.uint8)
+    normal_depth = np.zeros((rows * frame, cols * frame, 4), dtype=np.uint8)
+    normal_depth[..., 3] = 255
+    index_views = []
+    for k, (azimuth, elevation) in enumerate(views):
+        with span('impostor.view'):
+            albedo, alpha, normal, depth = render_view(triangles, center, radius, azimuth, elevation, frame)
+        y, x = (k // cols) * frame, (k % cols) * frame
+        color[y:y + frame, x:x + frame, :3] = _to_u8(_to_srgb(albedo))
+        color[y:y + frame, x:x + frame, 3] = _to_u8(alpha)
+        normal_depth[y:y + frame, x:x + frame, :3] = _to_u8(normal * 0.5 + 0.5)
+        normal_depth[y:y + frame, x:x + frame, 3] = _to_u8(depth)
+        direction, right, up = view_basis(azimuth, elevation)
+        index_views.append({
+            'azimuth': float(azimuth), 'elevation': float(elevation),
+            'direction': [round(float(v), 6) for v in direction],
+            'right': [round(float(v), 6) for v in right],
+            'up': [round(float(v), 6) for v in up],
+            'rect': [x, y, frame, frame],
+        })
+    index = {
+        'version': INDEX_VERSION,
+        'frame': frame,
+        'grid': [cols, rows],
+        'size': [cols * frame, rows * frame],
+        'center': [round(float(v), 6) for v in center],
+        'radius': round(radius, 6),
+        'views': index_views,
+    }
+    return color, normal_depth, index
+
+
+def write_impostor(output: str, parts, groups=(), materials=None, frame=128, views=DEFAULT_VIEWS):
+    """Render and write a tile's impostor atlas next to its GLB `output`.
+
+    Returns {'index', 'color', 'normal_depth' (file names), 'bytes'}.
+    """
+    index_path, color_path, nd_path = impostor_paths(output)
+    color, normal_depth, index = build_atlas(parts, groups, materials, frame, views)
+    with span('impostor.write'):
+        size = tile_bake.write_png(color_path, color) + tile_bake.write_png(nd_path, normal_depth)
+        index = dict(index, tile=os.path.basename(output), color=os.path.basename(color_path),
+                     normal_depth=os.path.basename(nd_path))
+        with open(index_path, 'w', encoding='utf-8') as fh:
+            json.dump(index, fh, indent=2)
+        size += os.path.getsize(index_path)
+    return {'index': os.path.basename(index_path), 'color': index['color'], 'normal_depth': index['normal_depth'],
+            'bytes': size}
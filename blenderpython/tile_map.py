@@ -0,0 +1,380 @@
+"""tile_map.py
+
+Bake a whole game map into chunked GLBs (no Blender needed).
+
+The web client places one tile instance per hex, which is thousands of
+instances on a large map. This baker reads the map JSON the game produces,
+builds every hex with the same geometry core as the tile library, moves it
+to its pointy-top axial position (`axialToWorld` in src/scene/utils/coords.ts)
+and merges each N x M block of hexes into one GLB with one primitive per
+material. A large map then renders as a few dozen chunk draw calls.
+
+MAP INPUT
+=========
+Any of these JSON shapes (as written by the game's save/export code):
+    {"map": {"tiles": [{"coord": {"q": 0, "r": 0}, "biome": "grass", "elevation": 0.4}, ...]}}
+    {"contentExt": {"tiles": {"0,0": {"q": 0, "r": 0, "biome": "grassland", ...}, ...}}}
+    [{"q": 0, "r": 0, "biome": "desert"}, ...]
+Biome values may be `BiomeType` keys ('grass', 'ice', ...) or the content
+`Biome` names from src/game/content/biomes.ts ('grassland', 'snow', ...);
+recipe aliases (see tile_biomes.py) map the latter onto asset keys.
+
+LAYOUT
+======
+- A hex (q, r) belongs to chunk (q // N, r // M). Each chunk GLB has one
+  node, translated to the chunk center, so vertex positions stay small.
+- Variants are picked per hex with the same hash as the scene
+  (`variantIndexFor` in src/scene/scene.tsx), so a baked map matches the
+  instanced rendering hex for hex.
+- Tops are built seamless and sampled in world space (see
+  `tile_geometry.plan_tile`), so neighbouring hexes join without cracks.
+- Elevation is applied like the scene's instance transform
+  (Y scale 0.06 + 0.22 * elevation, resting on the ground plane).
+- Every biome with a recipe (biomes/*.json) is generated from it; unknown
+  biomes get a bare displaced hex in a flat fallback colour, so the map
+  has no holes.
+- --resolution is a minimum: recipes asking for a finer top keep theirs.
+- --palette bakes material colours into vertex colours, so each chunk is a
+  single primitive on the shared `tile_glb.PALETTE_MATERIAL`.
+- --quantize / --compress meshopt shrink chunks and --optimize reorders
+  their indices (ACMR/ATVR recorded per chunk) like the tile batch does.
+
+OUTPUT
+======
+    <out>/chunk_<cq>_<cr>.glb ...   one per non-empty chunk
+    <out>/chunks.json               chunk size, hex size and per-chunk file/origin/tile counts
+
+USAGE:
+    python blenderpython/tile_map.py --map save.json --out public/chunks --chunk 16 16 --resolution 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import numpy as np
+
+import tile_batch
+import tile_biomes
+import tile_cache
+import tile_geometry as geo
+import tile_glb
+import tile_optimize
+
+CHUNKS_MANIFEST = 'chunks.json'
+# Per-run entry fields (cache hit, wall-clock time): reported on stdout, never written to
+# the manifest or the cache, so reruns of the same inputs leave both byte-identical.
+RUN_FIELDS = ('cached', 'seconds')
+
+# Content `Biome` names -> asset/registry keys (BiomeType values in src/game/types.ts).
+BIOME_KEYS = tile_biomes.biome_aliases(tile_biomes.RECIPES)
+
+# Flat colours for biomes without a recipe.
+FALLBACK_COLORS = {
+    'ocean': (0.06, 0.2, 0.45, 1.0),
+    'coast': (0.2, 0.45, 0.6, 1.0),
+    'plains': (0.55, 0.6, 0.3, 1.0),
+    'desert': (0.8, 0.7, 0.42, 1.0),
+    'tundra': (0.5, 0.55, 0.5, 1.0),
+    'ice': (0.88, 0.92, 0.96, 1.0),
+    'forest': (0.1, 0.35, 0.12, 1.0),
+    'jungle': (0.08, 0.4, 0.2, 1.0),
+    'hills': (0.45, 0.5, 0.3, 1.0),
+    'mountain': (0.5, 0.48, 0.46, 1.0),
+}
+
+# Mirrors transformsForBucket in src/scene/scene.tsx.
+TILE_BASE_HEIGHT = 0.06
+ELEVATION_AMP = 0.22
+
+
+def _to_uint32(v) -> int:
+    return int(v) % 0x1_0000_0000
+
+
+def _to_int32(v) -> int:
+    u = _to_uint32(v)
+    return u - 0x1_0000_0000 if u >= 0x8000_0000 else u
+
+
+def variant_index_for(q: int, r: int, count: int) -> int:
+    """Port of `variantIndexFor` in src/scene/scene.tsx (JS double/int32 semantics)."""
+    if count <= 1:
+        return 0
+    x = float(int(q)) * 374_761_393.0 + float(int(r)) * 668_265_263.0
+    x = float(_to_int32(x) ^ (_to_uint32(x) >> 13)) * 1_274_126_177.0
+    x = _to_int32(x) ^ (_to_uint32(x) >> 16)
+    f = _to_uint32(x) / 0xFF_FF_FF_FF
+    return int(f * count) % count
+
+
+def load_map_tiles(source, aliases=None):
+    """Read a map (path or parsed JSON) into a list of {'q', 'r', 'biome', 'elevation'} dicts.
+
+    `aliases` maps map biome names to recipe keys (default: BIOME_KEYS).
+    """
+    aliases = BIOME_KEYS if aliases is None else aliases
+    data = source
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+    if isinstance(data, dict):
+        if isinstance(data.get('map'), dict) and 'tiles' in data['map']:
+            raw = data['map']['tiles']
+        elif isinstance(data.get('contentExt'), dict) and 'tiles' in data['contentExt']:
+            raw = data['contentExt']['tiles']
+        elif 'tiles' in data:
+            raw = data['tiles']
+        else:
+            raise ValueError('Map JSON has no tiles (expected map.tiles, contentExt.tiles or tiles)')
+    else:
+        raw = data
+    if isinstance(raw, dict):
+        raw = list(raw.values())
+    tiles = []
+    for t in raw:
+        coord = t.get('coord', t)
+        biome = t['biome']
+        tiles.append({
+            'q': int(coord['q']),
+            'r': int(coord['r']),
+            'biome': aliases.get(biome, biome),
+            'elevation': float(t.get('elevation') if t.get('elevation') is not None else 0.5),
+        })
+    return tiles
+
+
+def chunk_of(q: int, r: int, chunk=(16, 16)):
+    return q // chunk[0], r // chunk[1]
+
+
+def group_chunks(tiles, chunk=(16, 16)):
+    """Group tiles by chunk; returns {(cq, cr): [tile, ...]} with tiles in (r, q) order."""
+    chunks = {}
+    for t in sorted(tiles, key=lambda t: (t['r'], t['q'])):
+        chunks.setdefault(chunk_of(t['q'], t['r'], chunk), []).append(t)
+    return chunks
+
+
+def chunk_origin(cq: int, cr: int, chunk=(16, 16), size=geo.HEX_RADIUS):
+    """Blender-space center of chunk (cq, cr)'s axial block."""
+    x, y = geo.axial_to_world(cq * chunk[0] + (chunk[0] - 1) / 2, cr * chunk[1] + (chunk[1] - 1) / 2, size)
+    return float(x), float(y), 0.0
+
+
+def build_hex_parts(tile, size=geo.HEX_RADIUS, seed=geo.SEED, seed_offset=100, resolution=4, recipe=None):
+    """Build one map hex in tile-local space; returns (parts, material_specs).
+
+    `recipe` is the tile biome's recipe; without one the hex is a bare
+    displaced top in a fallback colour.
+    """
+    biome = tile['biome']
+    if recipe is not None:
+        variations = tile_biomes.recipe_variations(recipe)
+        variant = variant_index_for(tile['q'], tile['r'], len(variations))
+        params = geo.variation_params(variant, variations)
+        params.update(resolution=max(params.get('resolution', 1), resolution),
+                      seamless=True, axial=(tile['q'], tile['r']))
+        job = {'variant': variant, 'params': params, 'seed': seed, 'seed_offset': seed_offset,
+               'size': size, 'thickness': geo.HEX_THICKNESS, 'instanced': False,
+               'materials': tile_biomes.recipe_materials(recipe)}
+        levels, _, materials = tile_batch.build_job(job)
+        return levels[0], materials
+    plan = geo.plan_tile(0, {'resolution': resolution, 'seamless': True, 'axial': (tile['q'], tile['r']),
+                             'rocks': 0, 'tufts': 0, 'tree_prob': 0.0},
+                         seed=seed, seed_offset=seed_offset, radius=size, thickness=geo.HEX_THICKNESS)
+    base = geo.build_tile_base(plan)
+    name = f'{biome.capitalize()}_Mat'
+    base.material = name
+    color = FALLBACK_COLORS.get(biome, geo.MATERIALS['Grass_Mat']['base_color'])
+    return [base], {name: {'base_color': color, 'metallic': 0.0, 'roughness': 0.9}}
+
+
+def elevation_matrix(elevation, offset=(0.0, 0.0)):
+    """Tile-local -> chunk-local transform: the scene's elevation scale plus the hex offset.
+
+    elevation=None only moves the hex (no height scaling).
+    """
+    m = np.eye(4)
+    m[:2, 3] = offset
+    if elevation is not None:
+        y_scale = TILE_BASE_HEIGHT + ELEVATION_AMP * elevation
+        m[2, 2] = y_scale
+        m[2, 3] = y_scale * 0.5
+    return m
+
+
+def build_chunk(spec):
+    """Build one chunk's parts (merged per material) and material specs."""
+    size, chunk = spec['size'], tuple(spec['chunk'])
+    origin = chunk_origin(spec['cq'], spec['cr'], chunk, size)
+    parts, materials = [], {}
+    for tile in spec['tiles']:
+        hex_parts, specs = build_hex_parts(tile, size, spec['seed'], spec['seed_offset'], spec['resolution'],
+                                           spec['recipes'].get(tile['biome']))
+        materials.update(specs)
+        x, y = geo.axial_to_world(tile['q'], tile['r'], size)
+        offset = (x - origin[0], y - origin[1])
+        matrix = elevation_matrix(tile['elevation'] if spec['elevation'] else None, offset)
+        for part in hex_parts:
+            parts.append(geo.TilePart(part.name, part.mesh.transformed(matrix), part.material))
+    name = f"chunk_{spec['cq']}_{spec['cr']}"
+    return geo.merge_parts_by_material(parts, name), materials, origin
+
+
+def run_chunk(spec):
+    """Build and write one chunk; returns its manifest entry. Top-level so it pickles for the pool."""
+    start = time.perf_counter()
+    merged, materials, origin = build_chunk(spec)
+    os.makedirs(os.path.dirname(spec['output']) or '.', exist_ok=True)
+    palette = spec.get('palette', False)
+    stats = []
+    size = tile_glb.write_tile_glb(spec['output'], merged, materials=materials, merge=True, translation=origin,
+                                   palette=palette, quantize=spec.get('quantize', False),
+                                   compress=spec.get('compress'), optimize=spec.get('optimize', False),
+                                   stats=stats)
+    entry = {
+        'output': spec['output'],
+        'cq': spec['cq'],
+        'cr': spec['cr'],
+        'origin': [origin[0], origin[2], -origin[1]],  # glTF / three.js space
+        'tiles': len(spec['tiles']),
+        'primitives': 1 if palette and merged else len(merged),
+        'triangles': sum(p.mesh.triangle_count for p in merged),
+        'bytes': size,
+        'seconds': round(time.perf_counter() - start, 6),
+    }
+    if stats:
+        entry['index_stats'] = tile_optimize.summarize(stats)
+    return entry
+
+
+def make_chunk_specs(tiles, out_dir: str, chunk=(16, 16), size=geo.HEX_RADIUS, seed=geo.SEED,
+                     seed_offset=100, resolution=4, elevation=True, palette=False, quantize=False, compress=None,
+                     optimize=False, recipes=None):
+    """One spec per non-empty chunk, in (cr, cq) order.
+
+    Each spec carries the recipes of the biomes in its chunk (`recipes`
+    defaults to the built-in `tile_biomes.RECIPES`), so editing a recipe
+    only rebuilds the chunks that use it.
+    """
+    recipes = tile_biomes.RECIPES if recipes is None else recipes
+    specs = []
+    for (cq, cr), members in sorted(group_chunks(tiles, chunk).items(), key=lambda kv: (kv[0][1], kv[0][0])):
+        used = sorted({t['biome'] for t in members} & set(recipes))
+        specs.append({
+            'cq': cq, 'cr': cr, 'chunk': list(chunk), 'size': size, 'seed': seed, 'seed_offset': seed_offset,
+            'resolution': resolution, 'elevation': elevation, 'palette': palette, 'quantize': quantize,
+            'compress': compress, 'optimize': optimize, 'tiles': members,
+            'recipes': {biome: recipes[biome] for biome in used},
+            'output': os.path.join(out_dir, f'chunk_{cq}_{cr}.glb'),
+        })
+    return specs
+
+
+def source_fingerprint() -> str:
+    return tile_cache.source_fingerprint(tile_cache.CORE_SOURCES + ('tile_batch.py', 'tile_map.py'))
+
+
+def _run_chunks(specs, workers=None):
+    if workers == 1 or len(specs) <= 1:
+        return [run_chunk(spec) for spec in specs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_chunk, specs))
+
+
+def bake_map(specs, workers=None, cache=None):
+    """Bake chunk specs (skipping chunks fresh in `cache`); returns entries in spec order."""
+    if cache is None:
+        return _run_chunks(specs, workers)
+    fingerprint = source_fingerprint()
+    keys = [tile_batch.job_key(spec, fingerprint, cache.out_dir) for spec in specs]
+    stale = [i for i, (spec, key) in enumerate(zip(specs, keys)) if not cache.is_fresh(key, spec['output'])]
+    built = dict(zip(stale, _run_chunks([specs[i] for i in stale], workers)))
+    entries = []
+    for i, (spec, key) in enumerate(zip(specs, keys)):
+        if i in built:
+            entry = built[i]
+            cache.record(key, spec['output'], entry['bytes'],
+                         entry={k: v for k, v in entry.items() if k != 'output' and k not in RUN_FIELDS})
+            entries.append(dict(entry, cached=False))
+        else:
+            entries.append(dict(cache.get(key)['entry'], output=spec['output'], cached=True))
+    cache.save()
+    return entries
+
+
+def write_chunks_manifest(out_dir: str, entries, chunk=(16, 16), size=geo.HEX_RADIUS):
+    rows = []
+    for entry in entries:
+        row = dict(entry)
+        row['output'] = os.path.relpath(entry['output'], out_dir).replace(os.sep, '/')
+        for key in RUN_FIELDS:
+            row.pop(key, None)
+        rows.append(row)
+    path = os.path.join(out_dir, CHUNKS_MANIFEST)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({'generator': tile_glb.GENERATOR, 'chunk': list(chunk), 'hexSize': size, 'chunks': rows},
+                  fh, indent=2)
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Bake a game map into chunked GLBs.')
+    parser.add_argument('--map', required=True, help='map / save JSON file')
+    parser.add_argument('--out', '-o', required=True, help='output directory')
+    parser.add_argument('--chunk', nargs=2, type=int, default=[16, 16], metavar=('N', 'M'),
+                        help='hexes per chunk along q and r')
+    parser.add_argument('--size', '-S', type=float, default=geo.HEX_RADIUS, help='hex radius')
+    parser.add_argument('--seed', '-s', type=int, default=geo.SEED)
+    parser.add_argument('--resolution', '-r', type=int, default=4, help='minimum rings of subdivision per hex top')
+    parser.add_argument('--no-elevation', action='store_true', help='keep every hex at ground level')
+    parser.add_argument('--palette', action='store_true', help='vertex colours on one shared material per chunk')
+    parser.add_argument('--quantize', '-q', action='store_true', help='KHR_mesh_quantization attributes')
+    parser.add_argument('--optimize', action='store_true', help='weld and reorder indices (vertex cache/overdraw)')
+    parser.add_argument('--compress', choices=tile_glb.COMPRESSORS, default=None,
+                        help='compress each chunk (meshopt: needs gltfpack on PATH)')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='process count (default: all cores)')
+    parser.add_argument('--force', action='store_true', help='ignore the build cache and rebuild everything')
+    parser.add_argument('--recipes', nargs='+', default=[], help='extra recipe directories (override built-ins by key)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compress:
+        try:
+            tile_glb.compressor_path(args.compress)
+        except RuntimeError as ex:
+            print(ex, file=sys.stderr)
+            return 2
+    out_dir = os.path.abspath(args.out)
+    chunk = tuple(args.chunk)
+    recipes = tile_biomes.load_recipes(tile_biomes.RECIPES_DIR, *args.recipes)
+    tiles = load_map_tiles(args.map, tile_biomes.biome_aliases(recipes))
+    specs = make_chunk_specs(tiles, out_dir, chunk, args.size, args.seed,
+                             resolution=args.resolution, elevation=not args.no_elevation, palette=args.palette,
+                             quantize=args.quantize, compress=args.compress, optimize=args.optimize,
+                             recipes=recipes)
+    start = time.perf_counter()
+    cache = tile_cache.BuildCache(out_dir)
+    if args.force:
+        cache.entries.clear()
+    entries = bake_map(specs, args.workers, cache)
+    manifest = write_chunks_manifest(out_dir, entries, chunk, args.size)
+    built = sum(1 for e in entries if not e['cached'])
+    print(f'Baked {len(tiles)} hexes into {len(entries)} chunks ({built} rebuilt, '
+          f'{sum(e["bytes"] for e in entries)} bytes) in {time.perf_counter() - start:.2f}s -> {manifest}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
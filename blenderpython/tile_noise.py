@@ -0,0 +1,129 @@
+"""tile_noise.py
+
+Gradient (Perlin) noise for the tile generator without Blender's `mathutils`.
+
+`mathutils.noise.noise(Vector((x, y, z)))` is only available inside Blender,
+which tied every displacement step to a running Blender process. This module
+provides the same call shape (`noise3(x, y, z)` -> float in roughly [-1, 1])
+in plain Python so the geometry core (`tile_geometry.py`) runs in CPython.
+
+`noise3_array` evaluates the same function over whole NumPy arrays at once
+(one call per mesh instead of one Python call and several `Vector`
+allocations per vertex), so subdivided tops with tens of thousands of
+vertices displace in milliseconds. Both entry points return the same values.
+
+The implementation is Ken Perlin's "improved noise" with the reference
+permutation table. It is not bit-identical to Blender's PERLIN_ORIGINAL basis,
+but it keeps the same seed semantics used by the generator: callers offset
+the sample coordinates by the seed (`x * scale + seed`), so a given seed and
+input always produce the same value across runs and machines.
+"""
+
+from math import floor
+
+import numpy as np
+
+# Ken Perlin's reference permutation (improved noise, 2002), doubled to avoid
+# wrapping the index arithmetic.
+_P = [
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225,
+    140, 36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148,
+    247, 120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32,
+    57, 177, 33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175,
+    74, 165, 71, 134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122,
+    60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54,
+    65, 25, 63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169,
+    200, 196, 135, 130, 116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64,
+    52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212,
+    207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213,
+    119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9,
+    129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104,
+    218, 246, 97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162, 241,
+    81, 51, 145, 235, 249, 14, 239, 107, 49, 192, 214, 31, 181, 199, 106, 157,
+    184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205, 93,
+    222, 114, 67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+]
+PERM = _P + _P
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+
+def _lerp(t, a, b):
+    return a + t * (b - a)
+
+
+def _grad(h, x, y, z):
+    h &= 15
+    u = x if h < 8 else y
+    if h < 4:
+        v = y
+    elif h in (12, 14):
+        v = x
+    else:
+        v = z
+    return (u if (h & 1) == 0 else -u) + (v if (h & 2) == 0 else -v)
+
+
+def noise3(x: float, y: float, z: float) -> float:
+    """Return signed 3D gradient noise at (x, y, z), roughly in [-1, 1]."""
+    fx, fy, fz = floor(x), floor(y), floor(z)
+    X, Y, Z = int(fx) & 255, int(fy) & 255, int(fz) & 255
+    x -= fx
+    y -= fy
+    z -= fz
+    u, v, w = _fade(x), _fade(y), _fade(z)
+    p = PERM
+    A = p[X] + Y
+    AA = p[A] + Z
+    AB = p[A + 1] + Z
+    B = p[X + 1] + Y
+    BA = p[B] + Z
+    BB = p[B + 1] + Z
+    return _lerp(w,
+                 _lerp(v,
+                       _lerp(u, _grad(p[AA], x, y, z), _grad(p[BA], x - 1, y, z)),
+                       _lerp(u, _grad(p[AB], x, y - 1, z), _grad(p[BB], x - 1, y - 1, z))),
+                 _lerp(v,
+                       _lerp(u, _grad(p[AA + 1], x, y, z - 1), _grad(p[BA + 1], x - 1, y, z - 1)),
+                       _lerp(u, _grad(p[AB + 1], x, y - 1, z - 1), _grad(p[BB + 1], x - 1, y - 1, z - 1))))
+
+
+_PERM_NP = np.array(PERM, dtype=np.int64)
+# _grad is linear in (x, y, z), so each hash selects a fixed gradient vector.
+_GRADIENTS = np.array([[_grad(h, 1, 0, 0), _grad(h, 0, 1, 0), _grad(h, 0, 0, 1)] for h in range(16)],
+                      dtype=np.float64)
+
+
+def _grad_array(h, x, y, z):
+    g = _GRADIENTS[h & 15]
+    return g[..., 0] * x + g[..., 1] * y + g[..., 2] * z
+
+
+def noise3_array(x, y, z):
+    """Vectorized `noise3`: evaluate noise at broadcast arrays x, y, z (returns float64 array)."""
+    x, y, z = np.broadcast_arrays(np.asarray(x, dtype=np.float64),
+                                  np.asarray(y, dtype=np.float64),
+                                  np.asarray(z, dtype=np.float64))
+    fx, fy, fz = np.floor(x), np.floor(y), np.floor(z)
+    X = fx.astype(np.int64) & 255
+    Y = fy.astype(np.int64) & 255
+    Z = fz.astype(np.int64) & 255
+    x, y, z = x - fx, y - fy, z - fz
+    u, v, w = _fade(x), _fade(y), _fade(z)
+    p = _PERM_NP
+    A = p[X] + Y
+    AA = p[A] + Z
+    AB = p[A + 1] + Z
+    B = p[X + 1] + Y
+    BA = p[B] + Z
+    BB = p[B + 1] + Z
+    g = _grad_array
+    return _lerp(w,
+                 _lerp(v,
+                       _lerp(u, g(p[AA], x, y, z), g(p[BA], x - 1, y, z)),
+                       _lerp(u, g(p[AB], x, y - 1, z), g(p[BB], x - 1, y - 1, z))),
+                 _lerp(v,
+                       _lerp(u, g(p[AA + 1], x, y, z - 1), g(p[BA + 1], x - 1, y, z - 1)),
+                       _lerp(u, g(p[AB + 1], x, y - 1, z - 1), g(p[BB + 1], x - 1, y - 1, z - 1))))
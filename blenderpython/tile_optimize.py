@@ -0,0 +1,265 @@
+"""tile_optimize.py
+
+Index-buffer optimization for tile meshes before export (no Blender needed).
+
+`optimize_mesh` runs the usual pre-upload pipeline on one primitive:
+
+1. weld: vertices with identical position, normal, UV (and vertex colour)
+   are merged, so shading is unchanged but nothing is transformed twice;
+2. vertex cache: triangles are reordered with Tom Forsyth's linear-speed
+   algorithm (LRU cache of VERTEX_CACHE_SIZE) for post-transform cache hits;
+   restarts after the cache runs dry pop a lazy heap, so disjoint scatter
+   stays O(T log T);
+3. overdraw: the cache-ordered triangles are cut into clusters at cache
+   restarts and the clusters sorted outside-in (by how much they face away
+   from the mesh centre), as long as ACMR stays within OVERDRAW_THRESHOLD
+   of the cache-optimal order;
+4. vertex fetch: vertices are renumbered in first-use order.
+
+Statistics use a FIFO cache of STATS_CACHE_SIZE (a typical GPU model):
+ACMR is transformed vertices per triangle (0.5 is ideal, 3.0 is no reuse);
+ATVR is transformed vertices per unique vertex (1.0 is ideal). 16-bit
+indices are chosen by `tile_glb` whenever a primitive has <= 65535 vertices.
+
+USAGE:
+    import tile_optimize
+    mesh, colors, stats = tile_optimize.optimize_mesh(mesh)
+    print(tile_optimize.format_stats('grass_v0', tile_optimize.summarize([stats])))
+
+    python blenderpython/tile_batch.py --out out --merge --optimize   # prints one line per variant
+"""
+
+import heapq
+
+import numpy as np
+
+import tile_geometry as geo
+
+VERTEX_CACHE_SIZE = 32
+STATS_CACHE_SIZE = 16
+OVERDRAW_THRESHOLD = 1.05
+
+# Forsyth's scoring constants.
+_CACHE_DECAY_POWER = 1.5
+_LAST_TRI_SCORE = 0.75
+_VALENCE_BOOST_SCALE = 2.0
+_VALENCE_BOOST_POWER = 0.5
+
+
+def weld(mesh, colors=None, decimals=6):
+    """Merge vertices whose position, normal, UV and colour agree to `decimals` places.
+
+    Returns (MeshData, colors); the first occurrence of each vertex is kept.
+    """
+    columns = [mesh.positions, mesh.normals]
+    if mesh.uvs is not None:
+        columns.append(mesh.uvs)
+    if colors is not None:
+        columns.append(colors.astype(np.float32))
+    key = np.round(np.hstack(columns).astype(np.float64), decimals)
+    _, first, inverse = np.unique(key, axis=0, return_index=True, return_inverse=True)
+    if len(first) == mesh.vertex_count:
+        return mesh, colors
+    # keep the original order of first occurrences
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    keep = first[order]
+    indices = rank[inverse.ravel()][mesh.indices]
+    welded = geo.MeshData(mesh.positions[keep], indices, None if mesh.uvs is None else mesh.uvs[keep],
+                          normals=mesh.normals[keep])
+    return welded, None if colors is None else colors[keep]
+
+
+def _vertex_score(cache_pos, remaining, cache_size):
+    if remaining == 0:
+        return -1.0
+    score = 0.0
+    if cache_pos >= 0:
+        if cache_pos < 3:
+            score = _LAST_TRI_SCORE
+        else:
+            score = (1.0 - (cache_pos - 3) / (cache_size - 3)) ** _CACHE_DECAY_POWER
+    return score + _VALENCE_BOOST_SCALE * remaining ** -_VALENCE_BOOST_POWER
+
+
+def optimize_vertex_cache(indices, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+    """Reorder (T, 3) triangles for a post-transform vertex cache (Forsyth); returns the new (T, 3) array.
+
+    When no cached vertex has triangles left, the best remaining triangle
+    comes from a lazy max-heap of triangle scores: a triangle with no cached
+    vertex was last scored when its vertices left the cache, so only those
+    scores are pushed and outdated entries are skipped when popped.
+    """
+    tris = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    n_tris = len(tris)
+    if n_tris == 0:
+        return tris.copy()
+    tri_list = tris.tolist()
+    vert_tris = [[] for _ in range(vertex_count)]
+    for t, tri in enumerate(tri_list):
+        for v in tri:
+            vert_tris[v].append(t)
+    remaining = [len(ts) for ts in vert_tris]
+    cache_pos = [-1] * vertex_count
+    vscore = [_vertex_score(-1, remaining[v], cache_size) for v in range(vertex_count)]
+    tscore = [vscore[a] + vscore[b] + vscore[c] for a, b, c in tri_list]
+    emitted = [False] * n_tris
+    cache = []
+    out = []
+    # (-score, triangle): ties go to the lowest index
+    heap = [(-score, t) for t, score in enumerate(tscore)]
+    heapq.heapify(heap)
+    best = -1
+    while True:
+        if best < 0:
+            # cache ran dry: fall back to the best remaining triangle
+            while heap and (emitted[heap[0][1]] or -heap[0][0] != tscore[heap[0][1]]):
+                heapq.heappop(heap)
+            if not heap:
+                break
+            best = heapq.heappop(heap)[1]
+        tri = tri_list[best]
+        emitted[best] = True
+        out.append(tri)
+        for v in tri:
+            remaining[v] -= 1
+            vert_tris[v].remove(best)
+        new_cache = list(tri) + [v for v in cache if v not in tri]
+        evicted = new_cache[cache_size:]
+        cache = new_cache[:cache_size]
+        for v in evicted:
+            cache_pos[v] = -1
+            vscore[v] = _vertex_score(-1, remaining[v], cache_size)
+        for pos, v in enumerate(cache):
+            cache_pos[v] = pos
+            vscore[v] = _vertex_score(pos, remaining[v], cache_size)
+        best, best_score = -1, -1.0
+        for v in cache:
+            for t in vert_tris[v]:
+                a, b, c = tri_list[t]
+                tscore[t] = vscore[a] + vscore[b] + vscore[c]
+                if tscore[t] > best_score:
+                    best, best_score = t, tscore[t]
+        for v in evicted:
+            for t in vert_tris[v]:
+                a, b, c = tri_list[t]
+                tscore[t] = vscore[a] + vscore[b] + vscore[c]
+                heapq.heappush(heap, (-tscore[t], t))
+    return np.asarray(out, dtype=np.int64)
+
+
+def simulate_cache(indices, cache_size=STATS_CACHE_SIZE):
+    """Return (misses, per-triangle miss counts) of a FIFO vertex cache over (T, 3) indices."""
+    fifo = []
+    resident = set()
+    misses = 0
+    per_tri = []
+    for tri in np.asarray(indices).reshape(-1, 3).tolist():
+        tri_misses = 0
+        for v in tri:
+            if v not in resident:
+                tri_misses += 1
+                fifo.append(v)
+                resident.add(v)
+                if len(fifo) > cache_size:
+                    resident.discard(fifo.pop(0))
+        misses += tri_misses
+        per_tri.append(tri_misses)
+    return misses, per_tri
+
+
+def cache_stats(indices, vertex_count, cache_size=STATS_CACHE_SIZE):
+    """Return {'acmr', 'atvr'} for (T, 3) indices over `vertex_count` vertices."""
+    tris = np.asarray(indices).reshape(-1, 3)
+    if len(tris) == 0:
+        return {'acmr': 0.0, 'atvr': 0.0}
+    misses, _ = simulate_cache(tris, cache_size)
+    used = len(np.unique(tris)) or vertex_count
+    return {'acmr': round(misses / len(tris), 4), 'atvr': round(misses / used, 4)}
+
+
+def optimize_overdraw(positions, indices, threshold=OVERDRAW_THRESHOLD, cache_size=STATS_CACHE_SIZE):
+    """Sort cache-ordered triangle clusters outside-in, keeping ACMR within `threshold`.
+
+    Clusters start wherever a triangle misses the cache on all three
+    vertices (the cache order restarted), so each cluster stays cache-local.
+    """
+    tris = np.asarray(indices).reshape(-1, 3)
+    if len(tris) < 2:
+        return tris
+    misses, per_tri = simulate_cache(tris, cache_size)
+    starts = [t for t, m in enumerate(per_tri) if m == 3] or [0]
+    if starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(tris)]
+    pos = np.asarray(positions, dtype=np.float64)
+    center = pos[np.unique(tris)].mean(axis=0)
+    corners = pos[tris]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])  # area-weighted
+    centroids = corners.mean(axis=1)
+    keys = []
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        n = normals[a:b].sum(axis=0)
+        length = np.linalg.norm(n)
+        facing = 0.0 if length == 0 else float(np.dot(centroids[a:b].mean(axis=0) - center, n / length))
+        keys.append(-facing)
+    order = np.argsort(keys, kind='stable')
+    sorted_tris = np.vstack([tris[bounds[k]:bounds[k + 1]] for k in order])
+    sorted_misses, _ = simulate_cache(sorted_tris, cache_size)
+    return sorted_tris if sorted_misses <= misses * threshold else tris
+
+
+def optimize_vertex_fetch(mesh, indices, colors=None):
+    """Renumber vertices in first-use order of `indices`; unused vertices are dropped."""
+    flat = np.asarray(indices).ravel()
+    _, first = np.unique(flat, return_index=True)
+    order = flat[np.sort(first)]
+    remap = np.full(mesh.vertex_count, -1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    out = geo.MeshData(mesh.positions[order], remap[flat].reshape(-1, 3),
+                       None if mesh.uvs is None else mesh.uvs[order], normals=mesh.normals[order])
+    return out, None if colors is None else colors[order]
+
+
+def optimize_mesh(mesh, colors=None):
+    """Weld, cache-, overdraw- and fetch-optimize one primitive.
+
+    Returns (MeshData, colors, stats) with stats = {'triangles': T,
+    'vertices': (before, after), 'acmr': (before, after), 'atvr': (before,
+    after)}.
+    """
+    before = cache_stats(mesh.indices, mesh.vertex_count)
+    vertices_before = mesh.vertex_count
+    mesh, colors = weld(mesh, colors)
+    tris = optimize_vertex_cache(mesh.indices, mesh.vertex_count)
+    tris = optimize_overdraw(mesh.positions, tris)
+    mesh, colors = optimize_vertex_fetch(mesh, tris, colors)
+    after = cache_stats(mesh.indices, mesh.vertex_count)
+    stats = {
+        'triangles': mesh.triangle_count,
+        'vertices': (vertices_before, mesh.vertex_count),
+        'acmr': (before['acmr'], after['acmr']),
+        'atvr': (before['atvr'], after['atvr']),
+    }
+    return mesh, colors, stats
+
+
+def summarize(stats):
+    """Combine per-primitive stats into one triangle-weighted {'vertices', 'acmr', 'atvr'} summary."""
+    if not stats:
+        return {}
+    weights = np.array([s['triangles'] for s in stats], dtype=np.float64)
+    total = weights.sum() or 1.0
+    return {
+        'vertices': [int(sum(s['vertices'][k] for s in stats)) for k in (0, 1)],
+        'acmr': [round(float(np.dot(weights, [s['acmr'][k] for s in stats]) / total), 3) for k in (0, 1)],
+        'atvr': [round(float(np.dot(weights, [s['atvr'][k] for s in stats]) / total), 3) for k in (0, 1)],
+    }
+
+
+def format_stats(name: str, summary) -> str:
+    """One report line: vertices and ACMR/ATVR before -> after."""
+    v, acmr, atvr = summary['vertices'], summary['acmr'], summary['atvr']
+    return (f'{name}: vertices {v[0]} -> {v[1]}, ACMR {acmr[0]:.3f} -> {acmr[1]:.3f}, '
+            f'ATVR {atvr[0]:.3f} -> {atvr[1]:.3f}')
@@ -0,0 +1,281 @@
+"""tile_pack.py
+
+Packed tile library: every variant GLB of an output directory in one file.
+
+The web loader used to fetch `<biome>_v<N>.glb` one file at a time, so a
+library with dozens of variants per biome cost hundreds of requests at
+startup. `pack_directory` writes them all into `tiles.pack`, which the
+loader (src/scene/assets/tile-pack.ts) reads with one fetch, or lazily
+with HTTP range requests, and tooling can mmap:
+
+    offset  size
+    0       4     magic b'TPAK'
+    4       4     format version (uint32, little-endian)
+    8       4     index length in bytes (uint32)
+    12      4     offset of the first blob (uint32, a multiple of ALIGNMENT)
+    16      ...   index: UTF-8 JSON, space-padded up to the first blob
+    ...           GLB blobs, each starting on an ALIGNMENT boundary
+
+The index is {"version", "generator", "alignment", "entries": [...]}, one
+entry per GLB:
+
+    {"name": "grass_v0", "biome": "grass", "variant": 0, "lod": 0,
+     "offset": 4096, "length": 22356, "triangles": 412, "vertices": 318, ...}
+
+`offset` is absolute in the file, so a blob is one range request
+(`bytes=offset-(offset+length-1)`). Entries are sorted by biome, variant
+and LOD, so one biome's variants are contiguous and load with a single
+range. Triangle / vertex counts, size and seed come from the batch
+`manifest.json` when the file is listed there (Blender exports are packed
+with just the fields in their file name).
+
+USAGE:
+    python blenderpython/tile_pack.py src/scene/assets             # -> src/scene/assets/tiles.pack
+    python blenderpython/tile_pack.py out --output out/library.pack
+    python blenderpython/tile_pack.py --list src/scene/assets/tiles.pack
+    python blenderpython/tile_batch.py --out out --pack             # after the batch, per output directory
+
+    with tile_pack.TilePack('out/tiles.pack') as pack:
+        gltf, bin_chunk = tile_glb.read_glb(pack.blob('grass_v0'))
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import tile_glb
+
+PACK_NAME = 'tiles.pack'
+PACK_MAGIC = b'TPAK'
+PACK_VERSION = 1
+HEADER = struct.Struct('<4sIII')
+# Blob alignment: keeps every GLB (and its 4-byte aligned chunks) aligned for typed-array views.
+ALIGNMENT = 16
+MANIFEST_NAME = 'manifest.json'
+
+# <biome>_v<N>.glb and LOD siblings <biome>_v<N>_lod<k>.glb (see tile_batch.lod_output)
+VARIANT_FILE = re.compile(r'^(?P<biome>[\w-]+?)_v(?P<variant>\d+)(?:_lod(?P<lod>\d+))?\.glb$')
+# Manifest fields copied into the index
+MANIFEST_FIELDS = ('size', 'seed', 'vertices', 'triangles')
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def manifest_meta(rows):
+    """File name -> index fields for manifest rows (`output` relative to the packed directory)."""
+    meta = {}
+    for row in rows:
+        fields = {key: row[key] for key in MANIFEST_FIELDS if key in row}
+        meta[row['output']] = fields
+        for lod in row.get('lod_files', ()):
+            meta[lod['output']] = {key: value for key, value in fields.items() if key != 'vertices'}
+            meta[lod['output']]['triangles'] = lod['triangles']
+    return meta
+
+
+def _read_manifest(out_dir: str):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r', encoding='utf-8') as fh:
+            return json.load(fh).get('variants', [])
+    except (OSError, ValueError):
+        return []
+
+
+def collect(out_dir: str, meta=None):
+    """Pack items for every variant GLB directly in `out_dir` (the flat layout the web loader globs).
+
+    `meta` maps file names to extra index fields; by default it comes from
+    `<out_dir>/manifest.json`.
+    """
+    if meta is None:
+        meta = manifest_meta(_read_manifest(out_dir))
+    items = []
+    for name in sorted(os.listdir(out_dir)):
+        match = VARIANT_FILE.match(name)
+        path = os.path.join(out_dir, name)
+        if not match or not os.path.isfile(path):
+            continue
+        item = {'name': name[:-len('.glb')], 'biome': match['biome'], 'variant': int(match['variant']),
+                'lod': int(match['lod'] or 0), 'path': path}
+        item.update(meta.get(name, {}))
+        items.append(item)
+    return items
+
+
+def write_pack(path: str, items, generator=tile_glb.GENERATOR):
+    """Write `items` (dicts with 'name', 'path' and index fields) as a pack; returns the index.
+
+    The file is written next to `path` and renamed into place, so readers
+    never see a half-written pack.
+    """
+    items = sorted(items, key=lambda item: (item['biome'], item['variant'], item['lod'], item['name']))
+    names = [item['name'] for item in items]
+    if len(set(names)) != len(names):
+        raise ValueError(f'duplicate entry names in pack: {sorted({n for n in names if names.count(n) > 1})}')
+    lengths = []
+    for item in items:
+        with open(item['path'], 'rb') as fh:
+            if fh.read(4) != struct.pack('<I', tile_glb.GLB_MAGIC):
+                raise ValueError(f'Not a glTF 2.0 binary: {item["path"]}')
+        lengths.append(os.path.getsize(item['path']))
+
+    def build_index(data_offset):
+        entries, offset = [], data_offset
+        for item, length in zip(items, lengths):
+            entry = {key: value for key, value in item.items() if key != 'path'}
+            entry.update({'offset': offset, 'length': length})
+            entries.append(entry)
+            offset = _align(offset + length)
+        index = {'version': PACK_VERSION, 'generator': generator, 'alignment': ALIGNMENT, 'entries': entries}
+        return index, json.dumps(index, separators=(',', ':')).encode('utf-8')
+
+    # offsets are part of the index, so grow the data offset until the index fits in front of it
+    data_offset = _align(HEADER.size)
+    while True:
+        index, text = build_index(data_offset)
+        if HEADER.size + len(text) <= data_offset:
+            break
+        data_offset = _align(HEADER.size + len(text))
+
+    tmp = path + '.tmp'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp, 'wb') as out:
+        out.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(text), data_offset))
+        out.write(text.ljust(data_offset - HEADER.size, b' '))
+        for item, entry in zip(items, index['entries']):
+            out.write(b'\0' * (entry['offset'] - out.tell()))
+            with open(item['path'], 'rb') as fh:
+                out.write(fh.read())
+    os.replace(tmp, path)
+    return index
+
+
+def pack_directory(out_dir: str, path=None, meta=None):
+    """Pack every variant GLB in `out_dir` into `path` (default `<out_dir>/tiles.pack`).
+
+    Returns (path, index). Raises ValueError when there is nothing to pack.
+    """
+    items = collect(out_dir, meta)
+    if not items:
+        raise ValueError(f'no <biome>_v<N>.glb files to pack in {out_dir}')
+    path = path or os.path.join(out_dir, PACK_NAME)
+    return path, write_pack(path, items)
+
+
+def parse_header(data):
+    """(index_length, data_offset) from the first 16 bytes of a pack."""
+    if len(data) < HEADER.size:
+        raise ValueError('truncated tile pack header')
+    magic, version, index_length, data_offset = HEADER.unpack_from(data, 0)
+    if magic != PACK_MAGIC:
+        raise ValueError('Not a tile pack')
+    if version != PACK_VERSION:
+        raise ValueError(f'Unsupported tile pack version {version} (expected {PACK_VERSION})')
+    return index_length, data_offset
+
+
+def read_index(data):
+    """The index dict of a pack held in `data` (bytes, mmap or the leading bytes of the file)."""
+    index_length, _ = parse_header(data)
+    if len(data) < HEADER.size + index_length:
+        raise ValueError('truncated tile pack index')
+    return json.loads(bytes(data[HEADER.size:HEADER.size + index_length]).decode('utf-8'))
+
+
+class TilePack:
+    """Read-only, memory-mapped view of a pack; `blob(name)` is a zero-copy memoryview.
+
+    Blobs stay readable after `close()`: while any is still held the file
+    stays mapped, and it is unmapped once the last one is released (or
+    garbage collected).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        try:
+            self.index = read_index(self._map)
+            self.entries = {entry['name']: entry for entry in self.index['entries']}
+            for entry in self.index['entries']:
+                if entry['offset'] + entry['length'] > len(self._map):
+                    raise ValueError(f'tile pack entry {entry["name"]} runs past the end of {path}')
+        except Exception:
+            self.close()  # nobody gets a handle to close it later
+            raise
+
+    def names(self, biome=None, lod=None):
+        return [e['name'] for e in self.index['entries']
+                if (biome is None or e['biome'] == biome) and (lod is None or e['lod'] == lod)]
+
+    def blob(self, name: str) -> memoryview:
+        if self._map is None:
+            raise ValueError(f'tile pack {self.path} is closed')
+        entry = self.entries[name]
+        return self._view[entry['offset']:entry['offset'] + entry['length']]
+
+    def close(self):
+        if self._map is None:
+            return
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # blobs still exported: the map is unmapped when the last one goes away
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def format_index(index) -> str:
+    """Readable listing of a pack index (one line per entry)."""
+    lines = [f"tile pack v{index['version']} ({index['generator']}), {len(index['entries'])} entries"]
+    for entry in index['entries']:
+        tris = f", {entry['triangles']} tris" if 'triangles' in entry else ''
+        lines.append(f"  {entry['name']:<24} @ {entry['offset']:>9}  {entry['length']:>8} bytes{tris}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Pack tile GLBs into one indexed library file.')
+    parser.add_argument('directory', nargs='?', help='directory holding <biome>_v<N>.glb files')
+    parser.add_argument('--output', '-o', default=None, help=f'pack path (default: <directory>/{PACK_NAME})')
+    parser.add_argument('--list', '-l', default=None, metavar='PACK', help='print the index of an existing pack')
+    args = parser.parse_args(argv)
+    if not args.directory and not args.list:
+        parser.error('give a directory to pack or --list PACK')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        if args.list:
+            with TilePack(args.list) as pack:
+                print(format_index(pack.index))
+            return 0
+        path, index = pack_directory(os.path.abspath(args.directory), args.output)
+    except (OSError, ValueError) as ex:
+        print(ex, file=sys.stderr)
+        return 1
+    print(f"Packed {len(index['entries'])} GLBs ({os.path.getsize(path)} bytes) -> {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
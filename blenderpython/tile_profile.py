@@ -0,0 +1,147 @@
+"""tile_profile.py
+
+Lightweight profiling spans and counters for the tile generator.
+
+Generation code wraps its stages in `span('stage.name')` and counts
+datablocks with `count('meshes.created')`. Both are no-ops until `enable()`
+is called (the headless `--profile` flag does), so instrumented code runs at
+full speed otherwise.
+
+Spans nest: each records its wall time and its self time (wall time minus
+nested spans), so `report()` can show where a large batch actually spends
+its time, and `write_chrome_trace()` writes the spans as Chrome trace
+events (open in chrome://tracing or https://ui.perfetto.dev).
+
+USAGE:
+    import tile_profile as prof
+    prof.enable()
+    with prof.span('base.displace'):
+        ...
+    prof.count('meshes.created')
+    print(prof.report())
+    prof.write_chrome_trace('trace.json')
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+_enabled = False
+_origin = 0.0
+_events = []    # (name, start, duration, self_time, depth)
+_counters = {}
+_stack = []     # [name, start, nested time] per open span
+_NULL = nullcontext()
+
+
+def enable(on=True):
+    """Turn profiling on (clearing previous spans and counters) or off."""
+    global _enabled, _origin
+    _enabled = on
+    reset()
+    _origin = time.perf_counter()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    _events.clear()
+    _counters.clear()
+    _stack.clear()
+
+
+class _Span:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _stack.append([self.name, time.perf_counter(), 0.0])
+        return self
+
+    def __exit__(self, *exc):
+        name, start, nested = _stack.pop()
+        duration = time.perf_counter() - start
+        if _stack:
+            _stack[-1][2] += duration
+        _events.append((name, start - _origin, duration, duration - nested, len(_stack)))
+        return False
+
+
+def span(name: str):
+    """Context manager timing one stage (a shared no-op while profiling is off)."""
+    return _Span(name) if _enabled else _NULL
+
+
+def count(name: str, n=1):
+    """Add `n` to a named counter (e.g. 'meshes.created', 'objects.freed')."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def counters():
+    return dict(_counters)
+
+
+def summary():
+    """Per-stage totals: {name: {'calls', 'total', 'self'}} in seconds, heaviest self time first."""
+    stages = {}
+    for name, _, duration, self_time, _ in _events:
+        stage = stages.setdefault(name, {'calls': 0, 'total': 0.0, 'self': 0.0})
+        stage['calls'] += 1
+        stage['total'] += duration
+        stage['self'] += self_time
+    return dict(sorted(stages.items(), key=lambda kv: -kv[1]['self']))
+
+
+def report() -> str:
+    """Text table of `summary()` plus the counters."""
+    stages = summary()
+    wall = sum(duration for _, _, duration, _, depth in _events if depth == 0) or 1e-12
+    lines = [f"{'stage':<28} {'calls':>7} {'total ms':>10} {'self ms':>10} {'self %':>7}"]
+    for name, s in stages.items():
+        lines.append(f"{name:<28} {s['calls']:>7} {1000 * s['total']:>10.1f} {1000 * s['self']:>10.1f} "
+                     f"{100 * s['self'] / wall:>6.1f}%")
+    lines.append(f"{'(profiled wall time)':<28} {'':>7} {1000 * wall:>10.1f}")
+    for name, value in sorted(_counters.items()):
+        lines.append(f'{name:<28} {value:>7}')
+    return '\n'.join(lines)
+
+
+def rss_bytes():
+    """Resident memory of this process in bytes (current on Linux, peak elsewhere; None if unknown)."""
+    try:
+        with open('/proc/self/statm', 'r') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def chrome_trace():
+    """Spans as Chrome trace 'complete' events (microseconds) plus final counter values."""
+    pid, tid = os.getpid(), threading.get_ident() % 2 ** 31
+    events = [{'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'ts': round(start * 1e6, 3),
+               'dur': round(duration * 1e6, 3), 'pid': pid, 'tid': tid}
+              for name, start, duration, _, _ in sorted(_events, key=lambda e: e[1])]
+    end = max((e[1] + e[2] for e in _events), default=0.0)
+    for name, value in sorted(_counters.items()):
+        events.append({'name': name, 'ph': 'C', 'ts': round(end * 1e6, 3), 'pid': pid, 'args': {'value': value}})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def write_chrome_trace(path: str) -> str:
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(chrome_trace(), fh)
+    return path
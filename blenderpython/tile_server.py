@@ -0,0 +1,285 @@
+"""tile_server.py
+
+Resident tile generation worker: start once, build many tiles.
+
+`tile_batch.py` and the headless Blender script pay their full startup cost
+(interpreter, NumPy, recipes, Blender itself) on every run. This worker
+loads once and then answers job requests, one JSON object per line, over
+stdin/stdout or a local TCP socket. Recipes, scatter prototypes and (inside
+Blender) materials and prototype meshes stay warm between jobs, so
+iterating on tile params from tooling costs milliseconds per tile.
+
+PROTOCOL
+========
+Requests (one per line; every field but `biome` and `output` is optional):
+    {"id": 7, "biome": "forest", "variant": 1, "seed": 42, "size": 0.51,
+     "params": {"trees": 4, "shape": {"jitter": 0.3}}, "output": "out/forest_v1.glb",
+     "merge": true, "instanced": false, "resolution": 4, "seamless": false,
+     "palette": false, "quantize": false, "compress": null, "optimize": false, "max_tris": 400,
+     "bake_normals": 256, "impostors": 128}
+`params` is merged over the recipe variation (nested dicts one level deep,
+see `tile_biomes.merge_params`). `output` may be omitted when the worker
+was started with --out (then `<out>/<biome>_v<variant>.glb`).
+
+Control requests:
+    {"op": "ping"}        -> {"ok": true, "pong": true}
+    {"op": "reload"}      re-read the biome recipes from disk
+    {"op": "stats"}       jobs served, errors, uptime and memory (Blender: datablock counts)
+    {"op": "shutdown"}    answer, then stop serving
+
+Every request gets exactly one response line, written as soon as it is
+done, echoing its `id`:
+    {"id": 7, "ok": true, "output": "...", "bytes": 10421, "vertices": 318, "triangles": 412,
+     "decimation_error": 0.0021, "ms": 6.1}
+    {"id": 8, "ok": false, "error": "Unknown biome: swamp (known: ...)"}
+`decimation_error` (max distance introduced by `max_tris`), `deviation`
+(normal-map bake) and `impostor` (atlas index path) appear only for jobs
+that asked for them; `error` always means the request failed.
+A bad request never stops the worker.
+
+USAGE:
+    python blenderpython/tile_server.py --out out                 # stdin/stdout
+    python blenderpython/tile_server.py --out out --port 8765     # 127.0.0.1:8765, one client at a time
+    blender --background --python blenderpython/generate_grassland_tiles.py -- --serve [--port 8765]
+
+    echo '{"biome": "grass", "variant": 0, "output": "out/g.glb"}' | python blenderpython/tile_server.py
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import time
+from contextlib import redirect_stdout
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import tile_batch
+import tile_biomes
+import tile_geometry as geo
+import tile_glb
+import tile_profile
+
+DEFAULT_HOST = '127.0.0.1'
+
+# Export options a request may set, with their defaults.
+JOB_OPTIONS = {
+    'merge': False,
+    'instanced': False,
+    'seamless': False,
+    'palette': False,
+    'quantize': False,
+    'compress': None,
+    'optimize': False,
+    'max_tris': None,
+    'bake_normals': None,
+    'impostors': None,
+}
+
+
+def job_from_request(request, recipes=None, out_dir=None):
+    """Turn one request into a `tile_batch` job dict; raises ValueError on bad input."""
+    recipes = tile_biomes.RECIPES if recipes is None else recipes
+    biome = request.get('biome')
+    if biome not in recipes:
+        raise ValueError(f'Unknown biome: {biome} (known: {", ".join(sorted(recipes))})')
+    variant = int(request.get('variant', 0))
+    if variant < 0:
+        raise ValueError(f'variant must be >= 0, got {variant}')
+    output = request.get('output')
+    if not output:
+        if not out_dir:
+            raise ValueError('request needs an "output" path (or start the worker with --out)')
+        output = f'{biome}_v{variant}.glb'
+    output = os.path.abspath(os.path.join(out_dir or '', output))
+    size = float(request.get('size', geo.HEX_RADIUS))
+    if not size > 0:
+        raise ValueError(f'size must be > 0, got {size}')
+    options = {key: request.get(key, default) for key, default in JOB_OPTIONS.items()}
+    if options['compress'] and options['compress'] not in tile_glb.COMPRESSORS:
+        raise ValueError(f'Unknown compressor: {options["compress"]} (known: {", ".join(tile_glb.COMPRESSORS)})')
+    job = tile_batch.make_jobs(os.path.dirname(output), variants=variant + 1, biomes=[biome],
+                               sizes=(size,),
+                               seed=int(request.get('seed', geo.SEED)), resolution=request.get('resolution'),
+                               recipes=recipes, **options)[variant]
+    overrides = request.get('params')
+    if overrides:
+        if not isinstance(overrides, dict):
+            raise ValueError('"params" must be an object')
+        job['params'] = tile_biomes.merge_params(job['params'], overrides)
+    resolution = job['params'].get('resolution', 1)
+    if isinstance(resolution, bool) or not isinstance(resolution, int) or resolution < 1:
+        raise ValueError(f'resolution must be an integer >= 1, got {resolution!r}')
+    job['output'] = output
+    return job
+
+
+class CoreWorker:
+    """Builds jobs with the bpy-free core (`tile_batch.run_job`).
+
+    Scatter prototypes are cached per seed by `tile_batch.scatter_prototypes`
+    and recipes are loaded once (again on {"op": "reload"}).
+    """
+
+    def __init__(self, out_dir=None, recipe_dirs=()):
+        self.out_dir = out_dir
+        self.recipe_dirs = tuple(recipe_dirs)
+        self.recipes = self.load_recipes()
+
+    def load_recipes(self):
+        return tile_biomes.load_recipes(tile_biomes.RECIPES_DIR, *self.recipe_dirs)
+
+    def reload(self):
+        self.recipes = self.load_recipes()
+        return {'biomes': list(self.recipes)}
+
+    def stats(self):
+        rss = tile_profile.rss_bytes()
+        return {'rss_mb': None if rss is None else round(rss / 2 ** 20, 1)}
+
+    def build(self, request):
+        job = job_from_request(request, self.recipes, self.out_dir)
+        if job['compress']:
+            tile_glb.compressor_path(job['compress'])
+        entry = tile_batch.run_job(job)
+        result = {'output': entry['output'], 'bytes': entry['bytes'], 'vertices': entry['vertices'],
+                  'triangles': entry['triangles']}
+        if entry.get('decimation'):
+            result['decimation_error'] = entry['decimation']['error']
+        if entry.get('normal_map'):
+            result['deviation'] = entry['normal_map']['deviation']
+        if entry.get('impostor'):
+            result['impostor'] = os.path.join(os.path.dirname(entry['output']), entry['impostor']['index'])
+        return result
+
+
+class Server:
+    """Dispatches request lines to a worker (anything with `build(request)`, `reload()` and `stats()`)."""
+
+    def __init__(self, worker):
+        self.worker = worker
+        self.started = time.time()
+        self.jobs = 0
+        self.errors = 0
+        self.running = True
+
+    def handle(self, request):
+        """Answer one decoded request with a response dict (never raises for bad jobs)."""
+        op = request.get('op', 'build')
+        start = time.perf_counter()
+        try:
+            if op == 'build':
+                result = self.worker.build(request)
+                self.jobs += 1
+            elif op == 'ping':
+                result = {'pong': True}
+            elif op == 'reload':
+                result = self.worker.reload()
+            elif op == 'stats':
+                result = {'jobs': self.jobs, 'errors': self.errors,
+                          'uptime': round(time.time() - self.started, 3), **self.worker.stats()}
+            elif op == 'shutdown':
+                self.running = False
+                result = {}
+            else:
+                raise ValueError(f'Unknown op: {op}')
+        except Exception as ex:  # any failure answers this request only; the worker keeps serving
+            self.errors += 1
+            response = {'ok': False, 'error': str(ex) or type(ex).__name__}
+        else:
+            response = dict(ok=True, **result, ms=round(1000 * (time.perf_counter() - start), 3))
+        if 'id' in request:
+            response = dict(id=request['id'], **response)
+        return response
+
+    def handle_line(self, line: str):
+        """Answer one request line; returns None for blank lines."""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            request = json.loads(line)
+        except ValueError as ex:
+            self.errors += 1
+            return {'ok': False, 'error': f'invalid JSON ({ex})'}
+        if not isinstance(request, dict):
+            self.errors += 1
+            return {'ok': False, 'error': 'request must be a JSON object'}
+        return self.handle(request)
+
+    def serve_lines(self, lines, write):
+        """Answer each line of `lines` through `write(str)` until EOF or a shutdown request."""
+        for line in lines:
+            response = self.handle_line(line)
+            if response is not None:
+                write(json.dumps(response) + '\n')
+            if not self.running:
+                break
+
+    def serve_stdio(self, infile=None, outfile=None):
+        infile = infile or sys.stdin
+        outfile = outfile or sys.stdout
+
+        def write(text):
+            outfile.write(text)
+            outfile.flush()
+
+        # job chatter (print) goes to stderr so stdout carries only responses
+        with redirect_stdout(sys.stderr):
+            self.serve_lines(infile, write)
+
+    def serve_socket(self, host=DEFAULT_HOST, port=0, ready=None):
+        """Serve one client connection at a time on host:port (port 0 picks a free one).
+
+        Connections are handled in this thread, so jobs never run
+        concurrently (bpy is not thread safe). `ready(port)` is called once
+        the socket listens. Returns after a shutdown request.
+        """
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                def write(text):
+                    self.wfile.write(text.encode('utf-8'))
+                    self.wfile.flush()
+
+                server.serve_lines((line.decode('utf-8') for line in self.rfile), write)
+
+        socketserver.TCPServer.allow_reuse_address = True
+        with socketserver.TCPServer((host, port), Handler) as tcp:
+            if ready:
+                ready(tcp.server_address[1])
+            while self.running:
+                tcp.handle_request()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Resident tile generation worker (JSON lines).')
+    parser.add_argument('--out', '-o', default=None, help='base directory for relative / omitted outputs')
+    parser.add_argument('--recipes', nargs='+', default=[], help='extra recipe directories (override built-ins by key)')
+    parser.add_argument('--port', '-p', type=int, default=None, help='listen on 127.0.0.1:PORT instead of stdin')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    return parser.parse_args(argv)
+
+
+def serve(server, port=None, host=DEFAULT_HOST):
+    """Run `server` on stdin/stdout, or on a socket when `port` is given (0 = any free port)."""
+    if port is None:
+        server.serve_stdio()
+    else:
+        server.serve_socket(host, port, ready=lambda p: print(f'Tile server listening on {host}:{p}',
+                                                              file=sys.stderr, flush=True))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out_dir = os.path.abspath(args.out) if args.out else None
+    serve(Server(CoreWorker(out_dir, args.recipes)), args.port, args.host)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,15 +1,95 @@
 // Runtime loader that attaches GLTF-based geometry/material to biome variant registry.
 // It looks for GLB files placed under `src/scene/assets/` and loads them once.
 
-import type { BufferAttribute, BufferGeometry, Material, Mesh, Object3D } from 'three';
-import { DoubleSide } from 'three';
-import { setVariantAssets } from './biome-variants-registry';
+import type { BufferGeometry, InstancedMesh, Material, Mesh, Object3D } from 'three';
+import { BufferAttribute, DoubleSide, Float32BufferAttribute, Matrix4 } from 'three';
+import { setVariantAssets, type VariantInstanceLayer } from './biome-variants-registry';
+import { loadTilePack, type TilePack } from './tile-pack';
 
 export const BIOME_ASSETS_EVENT = 'civweblite:biomeAssetsLoaded';
 
-// Resolve URLs relative to this module; Vite will bundle/copy these.
-function urlFor(name: string): string {
-  return new URL(`./${name}`, import.meta.url).toString();
+// Every `<biome>_v<N>.glb` next to this module (as written by blenderpython/tile_batch.py),
+// resolved to bundled URLs at build time so only files that exist are requested.
+const VARIANT_URLS = import.meta.glob('./*_v*.glb', {
+  query: '?url',
+  import: 'default',
+  eager: true,
+}) as Record<string, string>;
+
+export function variantFilesFor(biome: string): Array<{ index: number; url: string }> {
+  const pattern = new RegExp(`^\\./${biome.replaceAll(/[^\w-]/g, '')}_v(\\d+)\\.glb$`);
+  const out: Array<{ index: number; url: string }> = [];
+  for (const [path, url] of Object.entries(VARIANT_URLS)) {
+    const match = pattern.exec(path);
+    if (match) out.push({ index: Number(match[1]), url });
+  }
+  return out.sort((a, b) => a.index - b.index);
+}
+
+// Every variant in one file (blenderpython/tile_pack.py); when bundled, one request replaces the
+// per-variant fetches and the GLB files above are only a fallback.
+const PACK_URL = (
+  import.meta.glob('./tiles.pack', { query: '?url', import: 'default', eager: true }) as Record<
+    string,
+    string
+  >
+)['./tiles.pack'];
+let tilePack: Promise<TilePack> | undefined;
+
+function bundledTilePack(): Promise<TilePack> | undefined {
+  if (!PACK_URL) return undefined;
+  // Every biome shares one fetch; a failed one is retried by the next caller.
+  tilePack ??= loadTilePack(PACK_URL).catch((error) => {
+    tilePack = undefined;
+    throw error;
+  });
+  return tilePack;
+}
+
+// Forget the loaded pack so the next caller fetches it again (tests swap `fetch` between cases).
+export function resetTilePackForTests(): void {
+  tilePack = undefined;
+}
+
+type VariantSource = { index: number; source: string | ArrayBuffer; label: string };
+
+async function variantSourcesFor(biome: string): Promise<VariantSource[]> {
+  const pack = bundledTilePack();
+  if (pack) {
+    try {
+      const library = await pack;
+      const entries = library.entriesFor(biome);
+      if (entries.length > 0) {
+        const blobs = await library.blobs(entries);
+        return entries.map((entry, position) => ({
+          index: entry.variant,
+          source: blobs[position],
+          label: `${PACK_URL}#${entry.name}`,
+        }));
+      }
+    } catch (error) {
+      console.warn('[biome-assets] Tile pack unavailable, loading variant files', error);
+    }
+  }
+  return variantFilesFor(biome).map(({ index, url }) => ({ index, source: url, label: url }));
+}
+
+// Material name of palette exports (tile_batch.py --palette): colours live in COLOR_0, so
+// every variant of every biome can draw with this one material.
+export const PALETTE_MATERIAL = 'Tile_Mat';
+const sharedMaterials = new Map<string, Material>();
+
+function isPalette(mats: Material[]): boolean {
+  return mats.length > 0 && mats.every((m) => m?.name === PALETTE_MATERIAL);
+}
+
+function sharedMaterial(material: Material): Material {
+  let shared = sharedMaterials.get(material.name);
+  if (!shared) {
+    shared = material;
+    sharedMaterials.set(material.name, shared);
+  }
+  return shared;
 }
 
 function findMeshes(root: Object3D): Mesh[] {
@@ -20,6 +100,64 @@ function findMeshes(root: Object3D): Mesh[] {
   return out;
 }
 
+function isInstanced(mesh: Mesh): boolean {
+  return Boolean((mesh as any).isInstancedMesh);
+}
+
+// Tile-local matrices of an InstancedMesh (created by GLTFLoader for EXT_mesh_gpu_instancing
+// nodes): each instance's matrix under the mesh's world matrix.
+function instanceMatrices(mesh: Mesh): Matrix4[] {
+  const inst = mesh as unknown as InstancedMesh;
+  const out: Matrix4[] = [];
+  const local = new Matrix4();
+  for (let index = 0; index < inst.count; index++) {
+    inst.getMatrixAt(index, local);
+    out.push(new Matrix4().multiplyMatrices(mesh.matrixWorld, local));
+  }
+  return out;
+}
+
+// KHR_mesh_quantization stores positions/normals/UVs as (normalized) integers; expand them to
+// float before baking transforms, which would otherwise be truncated back into the int array,
+// and so parts whose UVs were written as float32 still merge with integer ones.
+function dequantizeAttributes(geometry: BufferGeometry): void {
+  for (const name of ['position', 'normal', 'uv']) {
+    const attribute = (geometry.attributes as any)?.[name] as BufferAttribute | undefined;
+    if (!attribute || attribute.array instanceof Float32Array) continue;
+    const { count, itemSize } = attribute;
+    const out = new Float32Array(count * itemSize);
+    for (let index = 0; index < count; index++) {
+      out[index * itemSize] = attribute.getX(index);
+      if (itemSize > 1) out[index * itemSize + 1] = attribute.getY(index);
+      if (itemSize > 2) out[index * itemSize + 2] = attribute.getZ(index);
+      if (itemSize > 3) out[index * itemSize + 3] = attribute.getW(index);
+    }
+    geometry.setAttribute(name, new Float32BufferAttribute(out, itemSize));
+  }
+}
+
+// mergeGeometries returns null unless every input has the same attributes. Older exports only
+// give the ground a `uv`, so zero-fill whatever some parts lack, using the array type and
+// normalization of a part that has it.
+function matchAttributes(geos: BufferGeometry[]): void {
+  const templates = new Map<string, BufferAttribute>();
+  for (const g of geos) {
+    for (const [name, attribute] of Object.entries((g as any).attributes ?? {})) {
+      if (!templates.has(name)) templates.set(name, attribute as BufferAttribute);
+    }
+  }
+  for (const g of geos) {
+    const attributes = (g as any).attributes ?? {};
+    const count = attributes.position?.count ?? 0;
+    for (const [name, template] of templates) {
+      if (attributes[name]) continue;
+      const Typed = (template.array as any).constructor as any;
+      const array = new Typed(count * template.itemSize);
+      g.setAttribute(name, new BufferAttribute(array, template.itemSize, template.normalized));
+    }
+  }
+}
+
 function pickBestMesh(meshes: Mesh[]): Mesh | undefined {
   if (meshes.length === 0) return undefined;
   // 1) Prefer name hints
@@ -70,7 +208,10 @@ function cloneSubsetGeometry(source: BufferGeometry, indices: number[]): BufferG
       const dstOffset = index * itemSize;
       for (let k = 0; k < itemSize; k++) out[dstOffset + k] = (array as any)[sourceOffset + k];
     }
-    (dst as any).setAttribute(name as string, new (attribute.constructor as any)(out, itemSize));
+    (dst as any).setAttribute(
+      name as string,
+      new (attribute.constructor as any)(out, itemSize, attribute.normalized)
+    );
   }
   const IndexTyped = (source.index!.array as any).constructor as any;
   dst.setIndex(new IndexTyped(remappedIndices));
@@ -102,35 +243,55 @@ function splitGeometryByMaterial(
 }
 
 async function loadGLTFOnce(
+  source: string | ArrayBuffer,
   url: string
 ): Promise<{
   geometry: BufferGeometry;
   material: Material | Material[];
+  instances: VariantInstanceLayer[];
   chosen: string;
   tris: number;
 }> {
   // Dynamic import to avoid bundling loader in tests/SSR unnecessarily
-  const [{ GLTFLoader }, BufferGeometryUtilities] = await Promise.all([
+  const [{ GLTFLoader }, BufferGeometryUtilities, { MeshoptDecoder }] = await Promise.all([
     import('three/examples/jsm/loaders/GLTFLoader.js' as any),
     import('three/examples/jsm/utils/BufferGeometryUtils.js' as any),
+    import('three/examples/jsm/libs/meshopt_decoder.module.js' as any),
   ]);
   const loader = new GLTFLoader();
+  // Tiles compressed with `tile_batch.py --compress meshopt` (EXT_meshopt_compression)
+  loader.setMeshoptDecoder?.(MeshoptDecoder);
+  // `source` is a URL, or GLB bytes from the tile pack (`url` then only labels errors)
   const gltf: any = await new Promise((resolve, reject) =>
-    loader.load(url, resolve, undefined, reject)
+    typeof source === 'string'
+      ? loader.load(source, resolve, undefined, reject)
+      : loader.parse(source, '', resolve, reject)
   );
   const scene = gltf.scene || gltf.scenes?.[0];
   if (!scene) throw new Error('GLTF has no scene: ' + url);
   const meshes = findMeshes(scene);
   if (meshes.length === 0) throw new Error('GLTF has no mesh: ' + url);
 
-  // Merge all meshes under the scene so each variant becomes a single instanced geometry.
+  // Merge all plain meshes under the scene so each variant becomes a single instanced geometry.
+  // Instanced scatter stays instanced: its prototype and tile-local matrices become a layer the
+  // scene draws with one InstancedMesh per prototype across every tile of the variant.
   const geos: BufferGeometry[] = [];
   const mats: Material[] = [];
+  const instances: VariantInstanceLayer[] = [];
   let totalTris = 0;
   for (const m of meshes) {
     try {
       m.updateWorldMatrix(true, true);
       const base = (m.geometry as BufferGeometry).clone();
+      dequantizeAttributes(base);
+      if (isInstanced(m)) {
+        const matrices = instanceMatrices(m);
+        const source = Array.isArray(m.material) ? m.material[0] : m.material;
+        const material = source.name === PALETTE_MATERIAL ? sharedMaterial(source) : source.clone();
+        instances.push({ geometry: base, material, matrices });
+        totalTris += (base.index ? base.index.count / 3 : 0) * matrices.length;
+        continue;
+      }
       base.applyMatrix4(m.matrixWorld);
       const { geos: parts, mats: partMats } = splitGeometryByMaterial(base, m.material as any);
       for (const [p, g] of parts.entries()) {
@@ -144,8 +305,11 @@ async function loadGLTFOnce(
     }
   }
   if (geos.length === 0) throw new Error('No geometries to merge: ' + url);
-  // Merge geometries; useGroups=true keeps one group per input sub-geometry so we can pass a matching materials array
-  const geometry: BufferGeometry = (BufferGeometryUtilities as any).mergeGeometries(geos, true);
+  // Merge geometries; useGroups=true keeps one group per input sub-geometry so we can pass a matching materials array.
+  // Palette exports need no groups: the whole variant draws with the shared palette material.
+  const palette = isPalette(mats);
+  matchAttributes(geos);
+  const geometry: BufferGeometry = (BufferGeometryUtilities as any).mergeGeometries(geos, !palette);
   // Ensure we have vertex normals for lighting; some exported assets may omit them
   try {
     if (!(geometry as any).attributes || !(geometry as any).attributes.normal) {
@@ -158,7 +322,7 @@ async function loadGLTFOnce(
   const chosen = meshes[0]?.parent?.name || meshes[0]?.name || '(merged)';
   // Ensure materials are render-ready: prefer double-sided for thin tile meshes and trigger update
   try {
-    for (const m of mats) {
+    for (const m of [...mats, ...instances.map((layer) => layer.material as Material)]) {
       if (m && (m as any).side === undefined) (m as any).side = DoubleSide;
       // Ensure materials don't require vertex colors unless the geometry provides them
       try {
@@ -172,39 +336,41 @@ async function loadGLTFOnce(
     console.warn('[biome-assets] material postprocess failed', error);
   }
 
-  return { geometry, material: mats, chosen, tris: Math.floor(totalTris) };
+  return {
+    geometry,
+    material: palette ? sharedMaterial(mats[0]) : mats,
+    instances,
+    chosen,
+    tris: Math.floor(totalTris),
+  };
 }
 
 export async function loadBiomeVariants(biome: string): Promise<void> {
   if (globalThis.window === undefined) return; // no-op in tests/SSR
-  if (biome === 'grass') {
-    const files = ['grass_v0.glb', 'grass_v1.glb', 'grass_v2.glb'];
-    for (const [index, file] of files.entries()) {
+  for (const { index, source, label } of await variantSourcesFor(biome)) {
+    try {
+      console.info('[biome-assets] Loading', biome, index, label);
+      const { geometry, material, instances, chosen, tris } = await loadGLTFOnce(source, label);
+      setVariantAssets(biome, index, geometry, material, instances);
+      console.info(
+        '[biome-assets] Loaded',
+        biome,
+        index,
+        'mesh:',
+        chosen,
+        'tris:',
+        Math.floor(tris)
+      );
+      // Notify listeners (scene) so it can re-render using assets
       try {
-        const url = urlFor(file);
-        console.info('[biome-assets] Loading', biome, index, url);
-        const { geometry, material, chosen, tris } = await loadGLTFOnce(url);
-        setVariantAssets('grass', index, geometry, material);
-        console.info(
-          '[biome-assets] Loaded',
-          biome,
-          index,
-          'mesh:',
-          chosen,
-          'tris:',
-          Math.floor(tris)
+        globalThis.dispatchEvent(
+          new CustomEvent(BIOME_ASSETS_EVENT, { detail: { biome, index: index } })
         );
-        // Notify listeners (scene) so it can re-render using assets
-        try {
-          globalThis.dispatchEvent(
-            new CustomEvent(BIOME_ASSETS_EVENT, { detail: { biome, index: index } })
-          );
-        } catch {}
-      } catch (error) {
-        // Swallow per-variant errors so others can still load
-
-        console.warn('[biome-assets] Failed', biome, index, error);
-      }
+      } catch {}
+    } catch (error) {
+      // Swallow per-variant errors so others can still load
+
+      console.warn('[biome-assets] Failed', biome, index, error);
     }
   }
 }
@@ -8,6 +8,15 @@ export type BiomeVariantDef = {
   // from cylinder to the provided BufferGeometry/Material.
   geometry?: any; // THREE.BufferGeometry
   material?: any; // THREE.Material
+  // Scatter exported with EXT_mesh_gpu_instancing: one prototype per layer, drawn at each
+  // tile-local matrix on every tile of the variant.
+  instances?: VariantInstanceLayer[];
+};
+
+export type VariantInstanceLayer = {
+  geometry: any; // THREE.BufferGeometry
+  material: any; // THREE.Material | THREE.Material[]
+  matrices: any[]; // THREE.Matrix4, tile-local
 };
 
 export const BIOME_VARIANTS: Record<string, BiomeVariantDef[]> = {
@@ -20,18 +29,27 @@ export function getVariantCount(biome: string): number {
   return Array.isArray(list) ? list.length : 0;
 }
 
-export function setVariantAssets(biome: string, index: number, geometry: any, material: any) {
+export function setVariantAssets(
+  biome: string,
+  index: number,
+  geometry: any,
+  material: any,
+  instances: VariantInstanceLayer[] = []
+) {
   const list = BIOME_VARIANTS[biome] || (BIOME_VARIANTS[biome] = []);
   if (!list[index]) list[index] = { name: `v${index}` } as BiomeVariantDef;
   list[index].geometry = geometry;
   list[index].material = material;
+  list[index].instances = instances;
 }
 
 export function getVariantAssets(
   biome: string,
   index: number
-): { geometry: any; material: any } | null {
+): { geometry: any; material: any; instances: VariantInstanceLayer[] } | null {
   const v = BIOME_VARIANTS[biome]?.[index];
-  if (v && v.geometry && v.material) return { geometry: v.geometry, material: v.material };
+  if (v && v.geometry && v.material) {
+    return { geometry: v.geometry, material: v.material, instances: v.instances ?? [] };
+  }
   return null;
 }
@@ -0,0 +1,138 @@
+// Reader for the packed tile library written by blenderpython/tile_pack.py: a 16-byte header
+// ('TPAK', version, index length, first blob offset), a JSON index, then aligned GLB blobs.
+// The whole file can come from one fetch, or the index and each biome's blobs from HTTP range
+// requests.
+
+export const TILE_PACK_MAGIC = 0x4b_41_50_54; // 'TPAK' read as little-endian uint32
+export const TILE_PACK_VERSION = 1;
+const HEADER_BYTES = 16;
+// First range request in ranged mode; indexes of a few hundred entries fit, larger ones take a
+// second request.
+const INDEX_PROBE_BYTES = 64 * 1024;
+
+export type TilePackEntry = {
+  name: string;
+  biome: string;
+  variant: number;
+  lod: number;
+  offset: number; // absolute byte offset of the GLB in the pack
+  length: number;
+  triangles?: number;
+  vertices?: number;
+  size?: number;
+};
+
+export type TilePackIndex = {
+  version: number;
+  generator?: string;
+  alignment: number;
+  entries: TilePackEntry[];
+};
+
+type FetchLike = (input: string, init?: RequestInit) => Promise<Response>;
+
+export function parseTilePackHeader(bytes: ArrayBuffer): {
+  indexLength: number;
+  dataOffset: number;
+} {
+  if (bytes.byteLength < HEADER_BYTES) throw new Error('Truncated tile pack header');
+  const view = new DataView(bytes);
+  if (view.getUint32(0, true) !== TILE_PACK_MAGIC) throw new Error('Not a tile pack');
+  const version = view.getUint32(4, true);
+  if (version !== TILE_PACK_VERSION) throw new Error(`Unsupported tile pack version ${version}`);
+  return { indexLength: view.getUint32(8, true), dataOffset: view.getUint32(12, true) };
+}
+
+// `bytes` holds the start of the pack (at least the header and the index).
+export function parseTilePackIndex(bytes: ArrayBuffer): TilePackIndex {
+  const { indexLength } = parseTilePackHeader(bytes);
+  if (bytes.byteLength < HEADER_BYTES + indexLength) throw new Error('Truncated tile pack index');
+  const text = new TextDecoder().decode(new Uint8Array(bytes, HEADER_BYTES, indexLength));
+  return JSON.parse(text) as TilePackIndex;
+}
+
+export class TilePack {
+  readonly url: string;
+  readonly index: TilePackIndex;
+  private buffer: ArrayBuffer | undefined;
+  private readonly fetchImpl: FetchLike;
+
+  // `buffer` is the whole file (single-fetch mode); without it blobs are fetched by range.
+  constructor(
+    url: string,
+    index: TilePackIndex,
+    buffer?: ArrayBuffer,
+    fetchImpl: FetchLike = fetch
+  ) {
+    this.url = url;
+    this.index = index;
+    this.buffer = buffer;
+    this.fetchImpl = fetchImpl;
+  }
+
+  entriesFor(biome: string, lod = 0): TilePackEntry[] {
+    return this.index.entries
+      .filter((entry) => entry.biome === biome && entry.lod === lod)
+      .sort((a, b) => a.variant - b.variant);
+  }
+
+  // GLB bytes of each entry; in ranged mode all of them come from one request spanning the entries.
+  async blobs(entries: TilePackEntry[]): Promise<ArrayBuffer[]> {
+    if (entries.length === 0) return [];
+    if (this.buffer) return entries.map((entry) => sliceEntry(this.buffer!, entry, 0));
+    const start = Math.min(...entries.map((entry) => entry.offset));
+    const end = Math.max(...entries.map((entry) => entry.offset + entry.length));
+    const response = await this.fetchImpl(this.url, {
+      headers: { Range: `bytes=${start}-${end - 1}` },
+    });
+    if (!response.ok) throw new Error(`Tile pack request failed (${response.status}): ${this.url}`);
+    const bytes = await response.arrayBuffer();
+    if (response.status === 206) return entries.map((entry) => sliceEntry(bytes, entry, start));
+    // Server ignored the range and sent the whole file: keep it for later biomes.
+    this.buffer = bytes;
+    return entries.map((entry) => sliceEntry(bytes, entry, 0));
+  }
+}
+
+function sliceEntry(bytes: ArrayBuffer, entry: TilePackEntry, base: number): ArrayBuffer {
+  const begin = entry.offset - base;
+  if (begin < 0 || begin + entry.length > bytes.byteLength) {
+    throw new Error(`Tile pack entry out of range: ${entry.name}`);
+  }
+  return bytes.slice(begin, begin + entry.length);
+}
+
+// Load a pack's index. By default the whole file is fetched at once; with `ranged` only the
+// index is fetched now and `TilePack.blobs` requests each biome's byte range when asked.
+export async function loadTilePack(
+  url: string,
+  options: { ranged?: boolean; fetchImpl?: FetchLike } = {}
+): Promise<TilePack> {
+  const fetchImpl = options.fetchImpl ?? fetch;
+  if (!options.ranged) {
+    const response = await fetchImpl(url);
+    if (!response.ok) throw new Error(`Tile pack request failed (${response.status}): ${url}`);
+    const bytes = await response.arrayBuffer();
+    return new TilePack(url, parseTilePackIndex(bytes), bytes, fetchImpl);
+  }
+  const response = await fetchImpl(url, { headers: { Range: `bytes=0-${INDEX_PROBE_BYTES - 1}` } });
+  if (!response.ok) throw new Error(`Tile pack request failed (${response.status}): ${url}`);
+  let bytes = await response.arrayBuffer();
+  if (response.status !== 206) {
+    return new TilePack(url, parseTilePackIndex(bytes), bytes, fetchImpl);
+  }
+  const { indexLength } = parseTilePackHeader(bytes);
+  if (bytes.byteLength < HEADER_BYTES + indexLength) {
+    const rest = await fetchImpl(url, {
+      headers: { Range: `bytes=${bytes.byteLength}-${HEADER_BYTES + indexLength - 1}` },
+    });
+    if (rest.status !== 206) {
+      throw new Error(`Tile pack range request failed (${rest.status}): ${url}`);
+    }
+    const joined = new Uint8Array(HEADER_BYTES + indexLength);
+    joined.set(new Uint8Array(bytes));
+    joined.set(new Uint8Array(await rest.arrayBuffer()), bytes.byteLength);
+    bytes = joined.buffer;
+  }
+  return new TilePack(url, parseTilePackIndex(bytes), undefined, fetchImpl);
+}
@@ -11,6 +11,9 @@ type Properties = {
   geometry: any; // THREE.BufferGeometry
   material: any; // THREE.Material | THREE.Material[]
   transforms: InstanceTransform[];
+  // Optional per-model matrices (e.g. a tile's instanced scatter): every transform is drawn
+  // once per local matrix, as transform * local.
+  localMatrices?: Matrix4[];
   castShadow?: boolean;
   receiveShadow?: boolean;
   name?: string;
@@ -25,6 +28,7 @@ export default function InstancedModels({
   geometry,
   material,
   transforms,
+  localMatrices,
   castShadow,
   receiveShadow,
   name,
@@ -39,8 +43,10 @@ export default function InstancedModels({
   const mesh = meshReference.current as any;
     if (!mesh || typeof mesh.setMatrixAt !== 'function') return; // tests/jsdom may stub this
     const temporary = new Object3D();
+    const locals = localMatrices ?? [];
+    const combined = new Matrix4();
     const count = transforms.length;
-    mesh.count = count;
+    mesh.count = locals.length > 0 ? count * locals.length : count;
     for (let index = 0; index < count; index++) {
       const t = transforms[index];
       const [x, y, z] = t.position;
@@ -50,16 +56,24 @@ export default function InstancedModels({
       else temporary.scale.setScalar(s);
       temporary.rotation.set(0, t.rotationY ?? 0, 0);
       temporary.updateMatrix();
-      mesh.setMatrixAt(index, temporary.matrix as Matrix4);
+      if (locals.length === 0) {
+        mesh.setMatrixAt(index, temporary.matrix as Matrix4);
+        continue;
+      }
+      for (const [k, local] of locals.entries()) {
+        combined.multiplyMatrices(temporary.matrix, local);
+        mesh.setMatrixAt(index * locals.length + k, combined);
+      }
     }
     if (mesh.instanceMatrix) mesh.instanceMatrix.needsUpdate = true;
-  }, [transforms]);
+  }, [transforms, localMatrices]);
 
   if (!geometry || !material || transforms.length === 0) return;
+  const capacity = transforms.length * Math.max(1, localMatrices?.length ?? 1);
   return (
     <instancedMesh
       ref={meshReference}
-      args={[geometry, material, Math.max(1, transforms.length)] as any}
+      args={[geometry, material, capacity] as any}
       castShadow={castShadow}
       receiveShadow={receiveShadow}
       name={name}
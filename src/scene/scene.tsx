@@ -129,17 +129,31 @@ function HexBucketsInstanced({ buckets, onClick, onPointerMove }: { buckets: Buc
           const geometry = assets.geometry as BufferGeometry;
           const material = assets.material as Material | Material[];
           return (
-            <InstancedModels
-              key={`${b.biome}:${b.variantIndex}:asset`}
-              geometry={geometry}
-              material={material}
-              transforms={transforms}
-              receiveShadow
-              castShadow
-              name={`bucket-${b.biome}-${b.variantIndex}`}
-              onClick={onClick}
-              onPointerMove={onPointerMove}
-            />
+            <group key={`${b.biome}:${b.variantIndex}:asset`}>
+              <InstancedModels
+                geometry={geometry}
+                material={material}
+                transforms={transforms}
+                receiveShadow
+                castShadow
+                name={`bucket-${b.biome}-${b.variantIndex}`}
+                onClick={onClick}
+                onPointerMove={onPointerMove}
+              />
+              {/* Instanced scatter: one draw per prototype for every tile of the bucket */}
+              {assets.instances.map((layer, layerIndex) => (
+                <InstancedModels
+                  key={layerIndex}
+                  geometry={layer.geometry}
+                  material={layer.material}
+                  transforms={transforms}
+                  localMatrices={layer.matrices}
+                  receiveShadow
+                  castShadow
+                  name={`bucket-${b.biome}-${b.variantIndex}-scatter-${layerIndex}`}
+                />
+              ))}
+            </group>
           );
         }
         // Fallback — procedural hex prism with per-bucket tinted material
@@ -260,12 +274,12 @@ export function ConnectedScene() {
     worldHeight: state.map.height,
   });
 
-  // Kick off loading for known assets (grassland variants)
+  // Kick off loading for every biome that has generated variant assets
   const [assetVersion, setAssetVersion] = React.useState(0);
   React.useEffect(() => {
     // Only on client
     if (globalThis.window === undefined) return;
-    loadBiomeVariants('grass').catch(() => {});
+    for (const biome of Object.values(BiomeType)) loadBiomeVariants(biome).catch(() => {});
     const handler = () => setAssetVersion((v) => v + 1);
     globalThis.addEventListener(BIOME_ASSETS_EVENT, handler as any);
     return () => globalThis.removeEventListener(BIOME_ASSETS_EVENT, handler as any);
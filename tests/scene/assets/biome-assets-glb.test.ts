@@ -0,0 +1,96 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
+import fs from 'node:fs';
+import path from 'node:path';
+import {
+  loadBiomeVariants,
+  resetTilePackForTests,
+  variantFilesFor,
+} from 'src/scene/assets/biome-assets.ts';
+import { setVariantAssets } from 'src/scene/assets/biome-variants-registry';
+import { parseTilePackIndex } from 'src/scene/assets/tile-pack';
+
+// Unlike biome-assets.test.ts, GLTFLoader and mergeGeometries are the real ones here: a committed
+// tile whose parts do not merge (mergeGeometries returns null) would leave its biome on the
+// procedural fallback.
+vi.mock('src/scene/assets/biome-variants-registry', () => ({
+  setVariantAssets: vi.fn(),
+}));
+
+const ASSETS_DIR = path.join(process.cwd(), 'src/scene/assets');
+// File names tile_pack.py packs (its VARIANT_FILE): <biome>_v<N>.glb and LOD siblings.
+const VARIANT_FILE = /^([\w-]+?)_v(\d+)(?:_lod\d+)?\.glb$/;
+
+function readPack(): Buffer {
+  return fs.readFileSync(path.join(ASSETS_DIR, 'tiles.pack'));
+}
+
+describe('loadBiomeVariants with the committed assets', () => {
+  let consoleWarnSpy: vi.SpyInstance;
+
+  beforeEach(() => {
+    consoleWarnSpy = vi.spyOn(console, 'warn').mockImplementation(() => {});
+    vi.spyOn(console, 'info').mockImplementation(() => {});
+    const file = readPack();
+    const bytes = file.buffer.slice(file.byteOffset, file.byteOffset + file.byteLength);
+    vi.stubGlobal(
+      'fetch',
+      vi.fn(async () => ({ ok: true, status: 200, arrayBuffer: async () => bytes }))
+    );
+  });
+
+  afterEach(() => {
+    vi.restoreAllMocks();
+    vi.unstubAllGlobals();
+    vi.clearAllMocks();
+    resetTilePackForTests();
+  });
+
+  it.each(['desert', 'forest'])('merges every %s variant into one geometry', async (biome) => {
+    await loadBiomeVariants(biome);
+
+    expect(consoleWarnSpy).not.toHaveBeenCalled();
+    const calls = (setVariantAssets as any).mock.calls;
+    expect(calls.map((call: any[]) => [call[0], call[1]])).toEqual([
+      [biome, 0],
+      [biome, 1],
+      [biome, 2],
+    ]);
+    for (const [, , geometry] of calls) {
+      expect(geometry).toBeTruthy();
+      const position = geometry.getAttribute('position');
+      expect(position.count).toBeGreaterThan(0);
+      expect(geometry.getAttribute('normal').count).toBe(position.count);
+      expect(geometry.getAttribute('uv').count).toBe(position.count);
+    }
+  });
+});
+
+// tiles.pack is regenerated by hand (tile_batch.py --pack); a stale pack would shadow newer
+// variant files, since the loader only falls back to them when the pack is missing.
+describe('the committed tiles.pack', () => {
+  const file = readPack();
+  const index = parseTilePackIndex(
+    file.buffer.slice(file.byteOffset, file.byteOffset + file.byteLength)
+  );
+  const files = fs.readdirSync(ASSETS_DIR).filter((name) => VARIANT_FILE.test(name));
+
+  it('indexes exactly the variant files the loader globs', () => {
+    expect(index.entries.map((entry) => `${entry.name}.glb`).sort()).toEqual(files.sort());
+    const biomes = new Set(files.map((name) => VARIANT_FILE.exec(name)![1]));
+    for (const biome of biomes) {
+      const packed = index.entries
+        .filter((entry) => entry.biome === biome && entry.lod === 0)
+        .map((entry) => entry.variant)
+        .sort((a, b) => a - b);
+      expect(variantFilesFor(biome).map((variant) => variant.index)).toEqual(packed);
+    }
+  });
+
+  it('holds every variant file byte for byte', () => {
+    for (const entry of index.entries) {
+      const glb = fs.readFileSync(path.join(ASSETS_DIR, `${entry.name}.glb`));
+      expect(entry.length).toBe(glb.byteLength);
+      expect(file.subarray(entry.offset, entry.offset + entry.length).equals(glb)).toBe(true);
+    }
+  });
+});
@@ -1,5 +1,13 @@
 import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
-import { loadBiomeVariants } from 'src/scene/assets/biome-assets.ts';
+import { BufferGeometry, Matrix4, Uint16BufferAttribute } from 'three';
+import { mergeGeometries } from 'three/examples/jsm/utils/BufferGeometryUtils.js';
+import {
+  loadBiomeVariants,
+  resetTilePackForTests,
+  variantFilesFor,
+} from 'src/scene/assets/biome-assets.ts';
+import { setVariantAssets } from 'src/scene/assets/biome-variants-registry';
+import { buildTilePack } from '../../utils/tile-pack-fixture';
 
 // Mock the deep dependencies from three.js to prevent network calls and isolate the test
 const mockMesh = {
@@ -25,6 +33,7 @@ const mockScene = {
 vi.mock('three/examples/jsm/loaders/GLTFLoader.js', () => ({
   GLTFLoader: vi.fn(() => ({
     load: vi.fn((_url, onLoad) => onLoad({ scene: mockScene })),
+    parse: vi.fn((_data, _path, onLoad) => onLoad({ scene: mockScene })),
   })),
 }));
 
@@ -49,12 +58,16 @@ describe('loadBiomeVariants', () => {
     consoleWarnSpy = vi.spyOn(console, 'warn').mockImplementation(() => {});
     // Define window to bypass the SSR guard in the function
     (globalThis as any).window = {};
+    // No tile pack server: the loader falls back to the per-variant files
+    vi.stubGlobal('fetch', vi.fn(() => Promise.reject(new Error('offline'))));
   });
 
   afterEach(() => {
     consoleWarnSpy.mockRestore();
     delete (globalThis as any).window;
+    vi.unstubAllGlobals();
     vi.clearAllMocks();
+    resetTilePackForTests();
   });
 
   it('should complete without logging a TypeError', async () => {
@@ -71,4 +84,109 @@ describe('loadBiomeVariants', () => {
     // It will PASS with the fixed code because the length will be 0.
     expect(typeErrorWarnings).toHaveLength(0);
   });
+
+  it('keeps EXT_mesh_gpu_instancing meshes instanced', async () => {
+    const applied: Matrix4[] = [];
+    const instancedMesh = {
+      ...mockMesh,
+      name: 'tuft_proto_0',
+      isInstancedMesh: true,
+      count: 3,
+      geometry: {
+        ...mockMesh.geometry,
+        clone: () => ({ applyMatrix4: (m: Matrix4) => applied.push(m.clone()), groups: [] }),
+      },
+      matrixWorld: new Matrix4().makeTranslation(1, 0, 0),
+      getMatrixAt: (index: number, target: Matrix4) => target.makeTranslation(0, 0, index),
+    };
+    mockScene.traverse.mockImplementation((callback) => {
+      callback(mockMesh);
+      callback(instancedMesh);
+    });
+
+    await loadBiomeVariants('grass');
+
+    // the prototype is never baked: only the plain tile mesh is merged
+    expect(applied).toHaveLength(0);
+    expect((mergeGeometries as any).mock.calls[0][0]).toHaveLength(1);
+    const layers = (setVariantAssets as any).mock.calls[0][4];
+    expect(layers).toHaveLength(1);
+    expect(layers[0].matrices).toHaveLength(3);
+    expect(layers[0].matrices[2].elements[12]).toBe(1);
+    expect(layers[0].matrices[2].elements[14]).toBe(2);
+    mockScene.traverse.mockImplementation((callback) => callback(mockMesh));
+  });
+
+  it('shares one material across palette variants', async () => {
+    const paletteMaterial = { isMaterial: true, name: 'Tile_Mat' };
+    const paletteMesh = { ...mockMesh, material: { clone: vi.fn(() => ({ ...paletteMaterial })) } };
+    mockScene.traverse.mockImplementation((callback) => callback(paletteMesh));
+
+    await loadBiomeVariants('grass');
+
+    expect((mergeGeometries as any).mock.calls[0][1]).toBe(false);
+    const materials = (setVariantAssets as any).mock.calls.map((call: any[]) => call[3]);
+    expect(materials).toHaveLength(3);
+    expect(materials[0].name).toBe('Tile_Mat');
+    expect(materials[1]).toBe(materials[0]);
+    expect(materials[2]).toBe(materials[0]);
+    mockScene.traverse.mockImplementation((callback) => callback(mockMesh));
+  });
+
+  it('expands quantized positions and UVs to float before baking transforms', async () => {
+    const quantized = new BufferGeometry();
+    quantized.setAttribute('position', new Uint16BufferAttribute([0, 1, 2, 65535, 0, 7], 3));
+    quantized.setAttribute('uv', new Uint16BufferAttribute([0, 65535, 65535, 0], 2, true));
+    quantized.setIndex([0, 1, 0]);
+    const quantizedMesh = {
+      ...mockMesh,
+      geometry: { ...mockMesh.geometry, clone: () => quantized.clone() },
+      matrixWorld: new Matrix4().makeScale(0.5, 0.5, 0.5),
+    };
+    mockScene.traverse.mockImplementation((callback) => callback(quantizedMesh));
+
+    await loadBiomeVariants('grass');
+
+    const baked = (mergeGeometries as any).mock.calls[0][0][0] as BufferGeometry;
+    const position = baked.getAttribute('position');
+    expect(position.array).toBeInstanceOf(Float32Array);
+    expect(position.getX(1)).toBe(32767.5);
+    expect(position.getZ(1)).toBe(3.5);
+    const uv = baked.getAttribute('uv');
+    expect(uv.array).toBeInstanceOf(Float32Array);
+    expect([uv.getX(0), uv.getY(0), uv.getX(1), uv.getY(1)]).toEqual([0, 1, 1, 0]);
+    mockScene.traverse.mockImplementation((callback) => callback(mockMesh));
+  });
+
+  it('discovers variant files per biome key', () => {
+    expect(variantFilesFor('grass').map((f) => f.index)).toEqual([0, 1, 2]);
+    expect(variantFilesFor('no-such-biome')).toEqual([]);
+  });
+
+  it('loads every variant from the bundled tile pack with one request', async () => {
+    const pack = buildTilePack([
+      { name: 'grass_v0', biome: 'grass', variant: 0, lod: 0, bytes: [1, 2, 3] },
+      { name: 'grass_v1', biome: 'grass', variant: 1, lod: 0, bytes: [4, 5] },
+      { name: 'forest_v0', biome: 'forest', variant: 0, lod: 0, bytes: [6] },
+    ]);
+    const fetchMock = vi.fn(async () => ({ ok: true, status: 200, arrayBuffer: async () => pack }));
+    vi.stubGlobal('fetch', fetchMock);
+
+    await loadBiomeVariants('grass');
+    await loadBiomeVariants('forest');
+
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+    const { GLTFLoader } = await import('three/examples/jsm/loaders/GLTFLoader.js');
+    const loaders = (GLTFLoader as any).mock.results.map((r: any) => r.value);
+    const parsed = loaders.flatMap((l: any) =>
+      l.parse.mock.calls.map((call: any[]) => [...new Uint8Array(call[0])])
+    );
+    expect(parsed).toEqual([[1, 2, 3], [4, 5], [6]]);
+    expect(loaders.every((l: any) => l.load.mock.calls.length === 0)).toBe(true);
+    expect((setVariantAssets as any).mock.calls.map((call: any[]) => [call[0], call[1]])).toEqual([
+      ['grass', 0],
+      ['grass', 1],
+      ['forest', 0],
+    ]);
+  });
 });
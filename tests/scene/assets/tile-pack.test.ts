@@ -0,0 +1,73 @@
+import { describe, it, expect, vi } from 'vitest';
+import { loadTilePack, parseTilePackIndex } from 'src/scene/assets/tile-pack';
+import { buildTilePack } from '../../utils/tile-pack-fixture';
+
+const PACK = buildTilePack([
+  { name: 'forest_v0', biome: 'forest', variant: 0, lod: 0, bytes: [9, 9] },
+  { name: 'grass_v0', biome: 'grass', variant: 0, lod: 0, bytes: [1, 2, 3] },
+  { name: 'grass_v0_lod1', biome: 'grass', variant: 0, lod: 1, bytes: [7] },
+  { name: 'grass_v1', biome: 'grass', variant: 1, lod: 0, bytes: [4, 5] },
+]);
+
+// Serves PACK, honouring Range headers unless `ranges` is false (then always the whole file).
+function packServer(ranges = true) {
+  return vi.fn(async (_url: string, init?: RequestInit) => {
+    const range = (init?.headers as Record<string, string> | undefined)?.Range;
+    const match = ranges && range ? /^bytes=(\d+)-(\d+)$/.exec(range) : null;
+    const body = match ? PACK.slice(Number(match[1]), Number(match[2]) + 1) : PACK;
+    const status = match ? 206 : 200;
+    return { ok: true, status, arrayBuffer: async () => body } as unknown as Response;
+  });
+}
+
+const bytesOf = (buffers: ArrayBuffer[]) => buffers.map((b) => [...new Uint8Array(b)]);
+
+describe('tile pack', () => {
+  it('parses the header and index', () => {
+    const index = parseTilePackIndex(PACK);
+    expect(index.version).toBe(1);
+    expect(index.entries.map((e) => e.name)).toEqual([
+      'forest_v0',
+      'grass_v0',
+      'grass_v0_lod1',
+      'grass_v1',
+    ]);
+    expect(index.entries.every((e) => e.offset % 16 === 0)).toBe(true);
+  });
+
+  it('rejects files that are not tile packs', () => {
+    expect(() => parseTilePackIndex(new Uint8Array(32).buffer)).toThrow('Not a tile pack');
+    expect(() => parseTilePackIndex(PACK.slice(0, 20))).toThrow('Truncated tile pack index');
+  });
+
+  it('slices variants from a single fetch', async () => {
+    const fetchImpl = packServer();
+    const pack = await loadTilePack('/tiles.pack', { fetchImpl });
+    const grass = pack.entriesFor('grass');
+    expect(grass.map((e) => e.name)).toEqual(['grass_v0', 'grass_v1']);
+    expect(bytesOf(await pack.blobs(grass))).toEqual([[1, 2, 3], [4, 5]]);
+    expect(bytesOf(await pack.blobs(pack.entriesFor('grass', 1)))).toEqual([[7]]);
+    expect(fetchImpl).toHaveBeenCalledTimes(1);
+  });
+
+  it('fetches the index and one range per biome in ranged mode', async () => {
+    const fetchImpl = packServer();
+    const pack = await loadTilePack('/tiles.pack', { ranged: true, fetchImpl });
+    expect(bytesOf(await pack.blobs(pack.entriesFor('grass')))).toEqual([[1, 2, 3], [4, 5]]);
+    expect(bytesOf(await pack.blobs(pack.entriesFor('forest')))).toEqual([[9, 9]]);
+    expect(fetchImpl).toHaveBeenCalledTimes(3);
+    const range: string = (fetchImpl.mock.calls[1][1] as any).headers.Range;
+    const [start, end] = range.slice('bytes='.length).split('-').map(Number);
+    const grass = pack.entriesFor('grass');
+    expect(start).toBe(grass[0].offset);
+    expect(end).toBe(grass[1].offset + grass[1].length - 1);
+  });
+
+  it('keeps the whole file when the server ignores ranges', async () => {
+    const fetchImpl = packServer(false);
+    const pack = await loadTilePack('/tiles.pack', { ranged: true, fetchImpl });
+    expect(bytesOf(await pack.blobs(pack.entriesFor('grass')))).toEqual([[1, 2, 3], [4, 5]]);
+    expect(bytesOf(await pack.blobs(pack.entriesFor('forest')))).toEqual([[9, 9]]);
+    expect(fetchImpl).toHaveBeenCalledTimes(1);
+  });
+});
@@ -0,0 +1,40 @@
+import { TILE_PACK_MAGIC, TILE_PACK_VERSION } from '../../src/scene/assets/tile-pack';
+
+type FixtureEntry = { name: string; biome: string; variant: number; lod: number; bytes: number[] };
+
+/**
+ * Builds a tile pack in the layout blenderpython/tile_pack.py writes: 16-byte header,
+ * JSON index, then each blob on a 16-byte boundary. Blob contents are arbitrary bytes.
+ */
+export function buildTilePack(items: FixtureEntry[], alignment = 16): ArrayBuffer {
+  const align = (n: number) => Math.ceil(n / alignment) * alignment;
+  const encoder = new TextEncoder();
+  let dataOffset = align(16);
+  let index = new Uint8Array(0);
+  for (;;) {
+    let offset = dataOffset;
+    const entries = items.map(({ bytes, ...entry }) => {
+      const placed = { ...entry, offset, length: bytes.length };
+      offset = align(offset + bytes.length);
+      return placed;
+    });
+    index = encoder.encode(JSON.stringify({ version: TILE_PACK_VERSION, alignment, entries }));
+    if (16 + index.length <= dataOffset) break;
+    dataOffset = align(16 + index.length);
+  }
+  let end = dataOffset;
+  for (const { bytes } of items) end = align(end + bytes.length);
+  const out = new Uint8Array(end).fill(0x20, 16, dataOffset);
+  const view = new DataView(out.buffer);
+  view.setUint32(0, TILE_PACK_MAGIC, true);
+  view.setUint32(4, TILE_PACK_VERSION, true);
+  view.setUint32(8, index.length, true);
+  view.setUint32(12, dataOffset, true);
+  out.set(index, 16);
+  let offset = dataOffset;
+  for (const { bytes } of items) {
+    out.set(bytes, offset);
+    offset = align(offset + bytes.length);
+  }
+  return out.buffer;
+}